@@ -1,1885 +1,4170 @@
-# cosmic_descent_3d.py
-# VERSÃO ATUALIZADA COM CONTROLE DE VOLUME
-
-import pygame
-import random
-import sys
-import os
-import json
-import time
-import math
-
-pygame.init()
-WIDTH, HEIGHT = 1280, 720
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("🚀 NOVA DESCENT - Controle de Volume")
-clock = pygame.time.Clock()
-
-# ---------------- CONFIGURAÇÃO DE VOLUME ----------------
-# Arquivo para salvar configurações de volume
-VOLUME_CONFIG_FILE = os.path.join(os.path.dirname(__file__), "volume_config.json")
-
-# Configurações padrão de volume
-DEFAULT_VOLUMES = {
-    "master": 0.7,      # Volume geral
-    "music": 0.6,       # Músicas de fase
-    "effects": 0.8,     # Efeitos sonoros
-    "shoot": 0.7,       # Tiro
-    "explosion": 0.8,   # Explosão
-    "powerup": 0.4,     # Powerup (reduzido por padrão)
-    "respawn": 0.6      # Respawn
-}
-
-# Carregar ou criar configuração de volume
-def load_volume_config():
-    """Carrega as configurações de volume do arquivo, ou cria padrão"""
-    try:
-        if os.path.exists(VOLUME_CONFIG_FILE):
-            with open(VOLUME_CONFIG_FILE, "r") as f:
-                return json.load(f)
-    except Exception as e:
-        print(f"⚠ Erro ao carregar configuração de volume: {e}")
-    
-    # Se não existir, cria com valores padrão
-    save_volume_config(DEFAULT_VOLUMES)
-    return DEFAULT_VOLUMES.copy()
-
-def save_volume_config(volumes):
-    """Salva as configurações de volume no arquivo"""
-    try:
-        with open(VOLUME_CONFIG_FILE, "w") as f:
-            json.dump(volumes, f, indent=2)
-    except Exception as e:
-        print(f"⚠ Erro ao salvar configuração de volume: {e}")
-
-# Carregar configurações de volume
-VOLUME_CONFIG = load_volume_config()
-
-# Funções para aplicar volume
-def set_sound_volume(sound, sound_type):
-    """Define o volume de um efeito sonoro baseado no tipo"""
-    if sound and hasattr(sound, 'set_volume'):
-        # Aplica volume de efeitos e volume específico do som
-        volume = VOLUME_CONFIG.get("master", 1.0) * VOLUME_CONFIG.get("effects", 1.0)
-        if sound_type in VOLUME_CONFIG:
-            volume *= VOLUME_CONFIG.get(sound_type, 1.0)
-        sound.set_volume(min(volume, 1.0))  # Garante que não passe de 1.0
-
-def set_music_volume():
-    """Define o volume da música de fundo"""
-    volume = VOLUME_CONFIG.get("master", 1.0) * VOLUME_CONFIG.get("music", 1.0)
-    pygame.mixer.music.set_volume(min(volume, 1.0))
-
-# ---------------- ASSET CONFIG ----------------
-ASSET_CONFIG = {
-    "assets_dir": "assets",
-    "background_global": "blue-stars.png",
-
-    "planets_phase1": [
-        {"image": "saturn.png", "x": WIDTH - 550, "y": 40, "size": 420},
-        {"image": "terra.png", "x": 80, "y": HEIGHT - 420, "size": 360},
-    ],
-    "planets_phase2": [
-        {"image": "c3po.png", "x": WIDTH - 400, "y": 100, "size": 300},
-        {"image": "marte.png", "x": 150, "y": HEIGHT - 300, "size": 250},
-    ],
-    "planets_phase3": [
-        {"image": "plutao.png", "x": WIDTH//2 - 100, "y": 50, "size": 200},
-        {"image": "netuno.png", "x": WIDTH - 200, "y": HEIGHT - 200, "size": 150},
-    ],
-    "explosion_frames": ["01.png", "02.png", "03.png", "04.png", "05.png", "06.png"],
-    "players": {"player": "player.png", "size": (100, 70)},
-    "players_dead": {"player_dead": "player_dead.png", "size": (100, 70)},
-    "bullets": {"image": "bullert.png", "size": (12, 20)},
-    "meteors": {"default": "asteroid-1.png", "evil": "asteroid-2.png"},
-    "enemies": {"enemy_small": "skill04.png", "size": (64, 64)},
-    "boss": {"image": "skill06.png", "size": (220, 220)},
-    "sounds": {
-        "shoot": "shoot.mp3",
-        "explosion": "explosion.mp3",
-        "powerup": "powerup.mp3",
-        "respawn": "respawn.wav",
-        "music_phase1": "phase1.mp3",
-        "music_phase2": "phase2.mp3",
-        "music_phase3": "phase3.mp3"
-    },
-    "explosion_scale": (90, 90),
-    "player_default_color": (0, 120, 255),
-    "player_dead_color": (100, 100, 100, 150),
-    "max_meteors": 8,
-    "points_to_next_phase": 1500,
-    "respawn_time": 5000,
-    "initial_lives": 3
-}
-
-ASSETS_DIR = os.path.join(os.path.dirname(__file__), ASSET_CONFIG["assets_dir"])
-SAVE_FILE = os.path.join(os.path.dirname(__file__), "savegame.json")
-HIGHSCORES_FILE = os.path.join(os.path.dirname(__file__), "highscores.json")
-
-# ---------------- Asset Manager ----------------
-class AssetManager:
-    def __init__(self, assets_dir):
-        self.assets_dir = assets_dir
-        self._cache = {}
-
-    def _path(self, name):
-        return os.path.join(self.assets_dir, name) if name else None
-
-    def load_image(self, name, scale=None):
-        if not name:
-            return None
-        key = f"img|{name}|{scale}"
-        if key in self._cache:
-            return self._cache[key]
-        p = self._path(name)
-        if p and os.path.isfile(p):
-            try:
-                img = pygame.image.load(p).convert_alpha()
-                if scale:
-                    img = pygame.transform.scale(img, tuple(scale))
-                self._cache[key] = img
-                return img
-            except Exception:
-                return None
-        return None
-
-    def load_sound(self, name):
-        if not name:
-            return None
-        key = f"snd|{name}"
-        if key in self._cache:
-            return self._cache[key]
-        p = self._path(name)
-        if p and os.path.isfile(p):
-            try:
-                s = pygame.mixer.Sound(p)
-                self._cache[key] = s
-                return s
-            except Exception:
-                return None
-        return None
-
-ASSETS = AssetManager(ASSETS_DIR)
-
-# ---------------- Funções de Música ----------------
-def change_music(phase_name):
-    """Troca a música conforme a fase"""
-    try:
-        music_map = {
-            "asteroids": "music_phase1",
-            "phase2": "music_phase2",
-            "phase3": "music_phase3"
-        }
-        
-        if phase_name in music_map:
-            music_file = ASSET_CONFIG.get("sounds", {}).get(music_map[phase_name])
-            if music_file:
-                mp = os.path.join(ASSETS_DIR, music_file)
-                if os.path.isfile(mp):
-                    pygame.mixer.music.stop()
-                    pygame.mixer.music.load(mp)
-                    pygame.mixer.music.play(-1)
-                    set_music_volume()  # Aplica volume atual
-    except Exception as e:
-        print(f"Erro ao trocar música: {e}")
-
-# ---------------- Helpers ----------------
-def draw_text(surf, text, size, x, y, color=(255,255,255)):
-    font = pygame.font.Font(None, size)
-    s = font.render(str(text), True, color)
-    r = s.get_rect()
-    r.midtop = (x, y)
-    surf.blit(s, r)
-
-def draw_health_bar(surf, x, y, pct):
-    pct = max(0, pct)
-    BAR_LENGTH, BAR_HEIGHT = 250, 25
-    fill = (pct / 100) * BAR_LENGTH
-    outline_rect = pygame.Rect(x, y, BAR_LENGTH, BAR_HEIGHT)
-    fill_rect = pygame.Rect(x, y, fill, BAR_HEIGHT)
-    color = (0,200,0) if pct > 50 else (200,50,50)
-    pygame.draw.rect(surf, color, fill_rect)
-    pygame.draw.rect(surf, (255,255,255), outline_rect, 2)
-
-# ---------------- Background ----------------
-class Background:
-    def draw(self, surf, phase_state="asteroids"):
-        img_name = ASSET_CONFIG.get("background_global", None)
-        img = ASSETS.load_image(img_name, scale=(WIDTH, HEIGHT)) if img_name else None
-
-        if img:
-            surf.blit(img, (0,0))
-        else:
-            surf.fill((0,0,0))
-        
-        if phase_state == "asteroids":
-            planets_config = ASSET_CONFIG.get("planets_phase1", [])
-        elif phase_state == "phase2":
-            planets_config = ASSET_CONFIG.get("planets_phase2", [])
-        elif phase_state == "phase3":
-            planets_config = ASSET_CONFIG.get("planets_phase3", [])
-        else:
-            planets_config = []
-        
-        for p in planets_config:
-            pi = ASSETS.load_image(p.get("image"), scale=(p.get("size"), p.get("size")))
-            if pi:
-                surf.blit(pi, (p.get("x"), p.get("y")))
-
-# ---------------- Sprites ----------------
-class Player(pygame.sprite.Sprite):
-    def __init__(self, x, y, controls, color=None, name="PLAYER", player_num=1):
-        super().__init__()
-        self.player_num = player_num
-        color = color if color is not None else ASSET_CONFIG.get("player_default_color", (0,120,255))
-        p_cfg = ASSET_CONFIG.get("players", {})
-        dead_cfg = ASSET_CONFIG.get("players_dead", {})
-        
-        img_name = p_cfg.get("player")
-        size = tuple(p_cfg.get("size", (100,70)))
-        img = ASSETS.load_image(img_name, scale=size) if img_name else None
-        
-        dead_img_name = dead_cfg.get("player_dead")
-        dead_img = ASSETS.load_image(dead_img_name, scale=size) if dead_img_name else None
-        
-        if img:
-            self.normal_image = img
-        else:
-            surf = pygame.Surface(size, pygame.SRCALPHA)
-            pygame.draw.polygon(surf, color, [(size[0]//2,0),(size[0]//6,size[1]),(5*size[0]//6,size[1])])
-            self.normal_image = surf
-        
-        if dead_img:
-            self.dead_image = dead_img
-        else:
-            dead_surf = pygame.Surface(size, pygame.SRCALPHA)
-            dead_color = ASSET_CONFIG.get("player_dead_color", (100, 100, 100, 150))
-            pygame.draw.polygon(dead_surf, dead_color, [(size[0]//2,0),(size[0]//6,size[1]),(5*size[0]//6,size[1])])
-            pygame.draw.line(dead_surf, (200, 50, 50, 200), (10, 10), (size[0]-10, size[1]-10), 3)
-            pygame.draw.line(dead_surf, (200, 50, 50, 200), (size[0]-10, 10), (10, size[1]-10), 3)
-            self.dead_image = dead_surf
-        
-        self.image = self.normal_image.copy()
-        self.rect = self.image.get_rect(center=(x,y))
-        self.controls = controls
-        self.speed = 6
-        self.health = 100
-        self.max_health = 100
-        self.score = 0
-        self.last_shot = 0
-        self.shoot_delay = 300
-        self.extra_guns = 0
-        self.teleport_ability = False
-        self.invulnerable_until = 0
-        self.has_shield = False
-        self.shield_time = 0
-        self.mouse_control = False
-        self.name = name
-        
-        # Sistema de vidas e respawn
-        self.lives = ASSET_CONFIG.get("initial_lives", 3)
-        self.is_alive = True
-        self.respawn_timer = 0
-        self.respawn_time = ASSET_CONFIG.get("respawn_time", 5000)
-        self.respawn_blink = 0
-        self.respawn_blink_speed = 0.1
-        
-        # Temporizadores para powerups temporários
-        self.upgrade_end_time = 0
-        self.shield_end_time = 0
-        
-        # Efeitos visuais
-        self.shield_alpha = 0
-        self.is_upgraded = False
-
-    def update(self):
-        if not self.is_alive:
-            now = pygame.time.get_ticks()
-            
-            self.respawn_blink += self.respawn_blink_speed
-            alpha = int((math.sin(self.respawn_blink) + 1) * 127.5)
-            
-            if self.respawn_timer and now < self.respawn_timer:
-                remaining = (self.respawn_timer - now) / 1000
-                self.image = self.dead_image.copy()
-                self.image.set_alpha(alpha)
-            else:
-                self.image = self.dead_image.copy()
-                self.image.set_alpha(180)
-            return
-        
-        keys = pygame.key.get_pressed()
-        if keys[self.controls['left']]:
-            self.rect.x -= self.speed
-        if keys[self.controls['right']]:
-            self.rect.x += self.speed
-        if keys[self.controls['up']]:
-            self.rect.y -= self.speed
-        if keys[self.controls['down']]:
-            self.rect.y += self.speed
-        if self.mouse_control:
-            mx,my = pygame.mouse.get_pos()
-            self.rect.centerx += int((mx - self.rect.centerx) * 0.35)
-            self.rect.centery += int((my - self.rect.centery) * 0.35)
-        self.rect.clamp_ip(screen.get_rect())
-        
-        now = pygame.time.get_ticks()
-        
-        if self.upgrade_end_time and now > self.upgrade_end_time:
-            self.extra_guns = 0
-            self.upgrade_end_time = 0
-            self.is_upgraded = False
-        
-        if self.shield_end_time and now > self.shield_end_time:
-            self.has_shield = False
-            self.shield_end_time = 0
-            self.shield_alpha = 0
-        
-        if self.invulnerable_until and now > self.invulnerable_until:
-            self.invulnerable_until = 0
-        
-        if self.has_shield:
-            self.shield_alpha = (self.shield_alpha + 10) % 255
-            shield_surf = pygame.Surface((self.rect.width + 20, self.rect.height + 20), pygame.SRCALPHA)
-            pygame.draw.circle(shield_surf, (100, 200, 255, int(self.shield_alpha)), 
-                              (shield_surf.get_width()//2, shield_surf.get_height()//2), 
-                              min(shield_surf.get_width(), shield_surf.get_height())//2, 3)
-            
-            combined = self.normal_image.copy()
-            shield_rect = shield_surf.get_rect(center=(combined.get_width()//2, combined.get_height()//2))
-            combined.blit(shield_surf, shield_rect, special_flags=pygame.BLEND_ALPHA_SDL2)
-            self.image = combined
-        elif self.is_upgraded:
-            upgraded = self.normal_image.copy()
-            glow = pygame.Surface(upgraded.get_size(), pygame.SRCALPHA)
-            pygame.draw.rect(glow, (255, 255, 100, 30), glow.get_rect(), border_radius=10)
-            upgraded.blit(glow, (0,0), special_flags=pygame.BLEND_ALPHA_SDL2)
-            self.image = upgraded
-        else:
-            self.image = self.normal_image.copy()
-
-    def shoot(self):
-        if not self.is_alive:
-            return None
-            
-        now = pygame.time.get_ticks()
-        if now - self.last_shot >= self.shoot_delay:
-            self.last_shot = now
-            bullets_out = []
-            bullets_out.append(Bullet(self.rect.centerx, self.rect.top, speed=-12, owner="player"))
-            
-            if self.extra_guns >= 1:
-                bullets_out.append(Bullet(self.rect.left+10, self.rect.centery, speed=-12, owner="player"))
-                bullets_out.append(Bullet(self.rect.right-10, self.rect.centery, speed=-12, owner="player"))
-            return bullets_out
-        return None
-
-    def take_damage(self, amount):
-        if not self.is_alive:
-            return False
-            
-        now = pygame.time.get_ticks()
-        if self.invulnerable_until and now < self.invulnerable_until:
-            return False
-        if self.has_shield:
-            return False
-            
-        self.health -= amount
-        if self.health <= 0:
-            self.die()
-        return True
-
-    def die(self):
-        self.health = 0
-        self.is_alive = False
-        self.lives -= 1
-        
-        self.extra_guns = 0
-        self.upgrade_end_time = 0
-        self.is_upgraded = False
-        self.has_shield = False
-        self.shield_end_time = 0
-        self.invulnerable_until = 0
-        self.teleport_ability = False
-        
-        return True
-
-    def respawn(self):
-        """Player ressuscita"""
-        self.is_alive = True
-        self.health = self.max_health // 2
-        self.respawn_timer = 0
-        
-        safe_x = WIDTH // 2 if self.player_num == 1 else WIDTH // 4
-        self.rect.center = (safe_x, HEIGHT - 120)
-        
-        self.invulnerable_until = pygame.time.get_ticks() + 3000
-        
-        # Aplica volume no som de respawn
-        if respawn_snd:
-            set_sound_volume(respawn_snd, "respawn")
-            respawn_snd.play()
-        return True
-
-    def teleport(self):
-        if not self.is_alive or not self.teleport_ability:
-            return False
-        self.rect.centerx = random.randint(80, WIDTH-80)
-        self.rect.centery = random.randint(80, HEIGHT-160)
-        self.invulnerable_until = pygame.time.get_ticks() + 3000
-        self.teleport_ability = False
-        return True
-    
-    def activate_upgrade(self, duration=15000):
-        if not self.is_alive:
-            return
-        self.extra_guns = 1
-        self.upgrade_end_time = pygame.time.get_ticks() + duration
-        self.is_upgraded = True
-    
-    def activate_shield(self, duration=8000):
-        if not self.is_alive:
-            return
-        self.has_shield = True
-        self.shield_end_time = pygame.time.get_ticks() + duration
-    
-    def activate_invulnerability(self, duration=5000):
-        if not self.is_alive:
-            return
-        self.invulnerable_until = pygame.time.get_ticks() + duration
-
-class Bullet(pygame.sprite.Sprite):
-    def __init__(self, x, y, speed=-12, owner="player"):
-        super().__init__()
-        bcfg = ASSET_CONFIG.get("bullets", {})
-        img_name = bcfg.get("image")
-        size = tuple(bcfg.get("size", (12,20)))
-        img = ASSETS.load_image(img_name, scale=size) if img_name else None
-        if img:
-            self.image = img
-        else:
-            surf = pygame.Surface(size, pygame.SRCALPHA)
-            c = (255,0,0) if owner=="enemy" else (255,255,0)
-            pygame.draw.rect(surf, c, (0,0,size[0],size[1]))
-            self.image = surf
-        self.rect = self.image.get_rect(center=(x,y))
-        self.speed = speed
-        self.speedx = 0
-        self.owner = owner
-
-    def update(self):
-        self.rect.y += self.speed
-        self.rect.x += self.speedx
-        if self.rect.bottom < 0 or self.rect.top > HEIGHT or self.rect.right < 0 or self.rect.left > WIDTH:
-            self.kill()
-
-class Meteor(pygame.sprite.Sprite):
-    def __init__(self, kind="default", x=None, y=None):
-        super().__init__()
-        mcfg = ASSET_CONFIG.get("meteors", {})
-        img_name = mcfg.get(kind, mcfg.get("default"))
-        size = (64,64)
-        img = ASSETS.load_image(img_name, scale=size) if img_name else None
-        if img:
-            self.base = img
-        else:
-            surf = pygame.Surface(size, pygame.SRCALPHA)
-            pygame.draw.circle(surf, (120,120,120), (size[0]//2, size[1]//2), 30)
-            self.base = surf
-        self.image = self.base.copy()
-        
-        # CORREÇÃO: Melhor inicialização de posição
-        if x is not None and y is not None:
-            self.rect = self.image.get_rect(center=(x, y))
-        else:
-            self.rect = self.image.get_rect(center=(random.randint(40, WIDTH-40), random.randint(-300, -40)))
-        
-        if kind == "evil":
-            self.speedy = random.randint(1,3)
-            self.damage = 40
-        else:
-            self.speedy = random.randint(1,2)
-            self.damage = 20
-        self.speedx = random.randint(-2,2)
-        self.rot = 0
-        self.rot_speed = random.randint(-5,5)
-        self.kind = kind
-
-    def update(self):
-        self.rect.y += int(self.speedy * GLOBAL_SPEED_MULT)
-        self.rect.x += self.speedx
-        self.rot = (self.rot + self.rot_speed) % 360
-        try:
-            self.image = pygame.transform.rotate(self.base, self.rot)
-        except Exception:
-            self.image = self.base
-        center = self.rect.center
-        self.rect = self.image.get_rect()
-        self.rect.center = center
-        if self.rect.top > HEIGHT or self.rect.right < 0 or self.rect.left > WIDTH:
-            self.respawn()
-
-    def respawn(self):
-        self.rect.x = random.randint(0, WIDTH-40)
-        self.rect.y = random.randint(-220, -40)
-        if self.kind == "evil":
-            self.speedy = random.randint(1,3)
-        else:
-            self.speedy = random.randint(1,2)
-        self.speedx = random.randint(-2,2)
-        self.rot_speed = random.randint(-5,5)
-
-class EnemyShip(pygame.sprite.Sprite):
-    def __init__(self, x, y):
-        super().__init__()
-        enx = ASSET_CONFIG.get("enemies", {})
-        img = ASSETS.load_image(enx.get("enemy_small"), scale=tuple(enx.get("size", (64,64)))) if enx.get("enemy_small") else None
-        if img:
-            self.image = img
-        else:
-            size = tuple(enx.get("size", (64,64)))
-            surf = pygame.Surface(size, pygame.SRCALPHA)
-            pygame.draw.polygon(surf, (180,80,40), [(size[0]//2,0),(0,size[1]),(size[0],size[1])])
-            self.image = surf
-        self.rect = self.image.get_rect(center=(x,y))
-        self.health = 3
-        self.last_shot = 0
-        self.shoot_delay = 900 + random.randint(-200,200)
-        self.fire_speed = 6
-        self.move_timer = pygame.time.get_ticks()
-
-    def update(self):
-        t = pygame.time.get_ticks()
-        if t - self.move_timer > 1200:
-            self.move_timer = t
-            self.rect.x += random.choice([-40,-20,0,20,40])
-            self.rect.clamp_ip(screen.get_rect())
-
-    def aim_and_shoot(self, target):
-        if not target:
-            return
-        now = pygame.time.get_ticks()
-        if now - self.last_shot >= self.shoot_delay:
-            self.last_shot = now
-            bx = self.rect.centerx
-            by = self.rect.bottom
-            b = Bullet(bx, by, speed=self.fire_speed, owner="enemy")
-            all_sprites.add(b); bullets.add(b)
-
-    def take_damage(self, amount=1):
-        self.health -= amount
-        return self.health <= 0
-
-class Boss(pygame.sprite.Sprite):
-    def __init__(self, x, y):
-        super().__init__()
-        bcfg = ASSET_CONFIG.get("boss", {})
-        img = ASSETS.load_image(bcfg.get("image"), scale=tuple(bcfg.get("size", (220,220)))) if bcfg.get("image") else None
-        if img:
-            self.image = img
-        else:
-            size = tuple(bcfg.get("size", (220,220)))
-            surf = pygame.Surface(size, pygame.SRCALPHA)
-            pygame.draw.circle(surf, (150,30,200), (size[0]//2, size[1]//2), min(size)//2)
-            pygame.draw.circle(surf, (255,200,255), (size[0]//2, size[1]//2), min(size)//2, 6)
-            self.image = surf
-        self.rect = self.image.get_rect(center=(x,y))
-        self.health = 80
-        self.last_shot = 0
-        self.shoot_delay = 1500
-        self.move_dir = 1
-        self.speed = 2
-        self.attack_mode = "normal"
-        self.attack_timer = pygame.time.get_ticks()
-        self.attack_duration = 5000
-
-    def update(self):
-        self.rect.x += self.speed * self.move_dir
-        if self.rect.right > WIDTH - 100:
-            self.move_dir = -1
-        elif self.rect.left < 100:
-            self.move_dir = 1
-        
-        now = pygame.time.get_ticks()
-        if now - self.attack_timer > self.attack_duration:
-            self.attack_timer = now
-            modes = ["normal", "spread", "rapid"]
-            self.attack_mode = random.choice(modes)
-
-    def shoot(self):
-        now = pygame.time.get_ticks()
-        if now - self.last_shot > self.shoot_delay:
-            self.last_shot = now
-            
-            if self.attack_mode == "normal":
-                for off in (-40, 0, 40):
-                    b = Bullet(self.rect.centerx + off, self.rect.bottom, speed=8, owner="enemy")
-                    all_sprites.add(b); bullets.add(b)
-            
-            elif self.attack_mode == "spread":
-                angles = [-30, -15, 0, 15, 30]
-                for angle in angles:
-                    b = Bullet(self.rect.centerx, self.rect.bottom, speed=8, owner="enemy")
-                    b.speedx = angle * 0.2
-                    all_sprites.add(b); bullets.add(b)
-            
-            elif self.attack_mode == "rapid":
-                self.shoot_delay = 300
-                b = Bullet(self.rect.centerx, self.rect.bottom, speed=10, owner="enemy")
-                all_sprites.add(b); bullets.add(b)
-            else:
-                self.shoot_delay = 1500
-
-# Explosion frames load
-EXPLOSION_FRAMES = []
-EXPLOSION_LOADED = False
-def load_explosion_frames():
-    global EXPLOSION_FRAMES, EXPLOSION_LOADED
-    if EXPLOSION_LOADED:
-        return
-    EXPLOSION_LOADED = True
-    frames = []
-    for name in ASSET_CONFIG.get("explosion_frames", []):
-        img = ASSETS.load_image(name, scale=ASSET_CONFIG.get("explosion_scale"))
-        if img:
-            frames.append(img)
-    EXPLOSION_FRAMES = frames
-
-class Explosion(pygame.sprite.Sprite):
-    def __init__(self, center):
-        super().__init__()
-        load_explosion_frames()
-        if EXPLOSION_FRAMES:
-            self.frames = EXPLOSION_FRAMES.copy()
-            self.index = 0
-            self.image = self.frames[self.index]
-            self.rect = self.image.get_rect(center=center)
-            self.last = pygame.time.get_ticks()
-            self.rate = 60
-        else:
-            self.image = pygame.Surface((2,2), pygame.SRCALPHA)
-            self.rect = self.image.get_rect(center=center)
-            self._auto_kill = True
-
-    def update(self):
-        if getattr(self, "_auto_kill", False):
-            self.kill()
-            return
-        now = pygame.time.get_ticks()
-        if now - self.last > self.rate:
-            self.last = now
-            self.index += 1
-            if self.index >= len(self.frames):
-                self.kill()
-            else:
-                self.image = self.frames[self.index]
-
-class Powerup(pygame.sprite.Sprite):
-    def __init__(self, center, ptype="revive"):
-        super().__init__()
-        self.ptype = ptype
-        self.size = 28
-        
-        self.image = pygame.Surface((self.size, self.size), pygame.SRCALPHA)
-        
-        if ptype == "revive": 
-            color = (200, 30, 30)
-            pygame.draw.circle(self.image, color, (self.size//2, self.size//2), self.size//2)
-        elif ptype == "invul_gift": 
-            color = (30, 100, 200)
-            pygame.draw.rect(self.image, color, (0, 0, self.size, self.size), border_radius=5)
-        elif ptype == "upgrade": 
-            color = (220, 200, 30)
-            points = [(self.size//2, 2), (2, self.size-2), (self.size-2, self.size-2)]
-            pygame.draw.polygon(self.image, color, points)
-        elif ptype == "extra_life": 
-            color = (30, 200, 60)
-            pygame.draw.rect(self.image, color, (2, 2, self.size-4, self.size-4))
-        elif ptype == "teleporter": 
-            color = (180, 80, 180)
-            pygame.draw.circle(self.image, color, (self.size//2, self.size//2), self.size//3)
-        elif ptype == "shield":
-            color = (100, 200, 255)
-            pygame.draw.circle(self.image, color, (self.size//2, self.size//2), self.size//2, 3)
-        else: 
-            color = (255, 255, 255)
-            pygame.draw.rect(self.image, color, (0, 0, self.size, self.size))
-        
-        glow = pygame.Surface((self.size+4, self.size+4), pygame.SRCALPHA)
-        pygame.draw.rect(glow, (*color, 100), (0, 0, self.size+4, self.size+4), border_radius=7)
-        final_image = pygame.Surface((self.size+4, self.size+4), pygame.SRCALPHA)
-        final_image.blit(glow, (0, 0))
-        final_image.blit(self.image, (2, 2))
-        self.image = final_image
-        
-        self.rect = self.image.get_rect(center=center)
-        self.float_offset = random.random() * 3.14
-        self.float_speed = 0.05
-
-    def update(self):
-        self.rect.y += 2 + math.sin(pygame.time.get_ticks() * self.float_speed + self.float_offset)
-        if self.rect.top > HEIGHT:
-            self.kill()
-
-# ---------------- Sounds ----------------
-# Carregar sons e aplicar volumes iniciais
-shoot_snd = ASSETS.load_sound(ASSET_CONFIG.get("sounds", {}).get("shoot"))
-explosion_snd = ASSETS.load_sound(ASSET_CONFIG.get("sounds", {}).get("explosion"))
-powerup_snd = ASSETS.load_sound(ASSET_CONFIG.get("sounds", {}).get("powerup"))
-respawn_snd = ASSETS.load_sound(ASSET_CONFIG.get("sounds", {}).get("respawn"))
-
-# Aplicar volumes iniciais aos sons
-if shoot_snd: set_sound_volume(shoot_snd, "shoot")
-if explosion_snd: set_sound_volume(explosion_snd, "explosion")
-if powerup_snd: set_sound_volume(powerup_snd, "powerup")  # Volume reduzido por padrão
-if respawn_snd: set_sound_volume(respawn_snd, "respawn")
-
-# ---------------- Variáveis Globais ----------------
-enemies_total = 0
-enemies_killed = 0
-current_enemy_wave = 0
-TOTAL_ENEMIES_PHASE2 = 15
-ENEMIES_PER_WAVE = 5
-
-# ---------------- Funções de Spawn ----------------
-def spawn_enemy_wave(count):
-    global enemies_total
-    
-    margin = 120
-    if count > 1:
-        spacing = max(1, (WIDTH - 2*margin) // max(1, count-1))
-    else:
-        spacing = 0
-    
-    for i in range(count):
-        x = margin + i*spacing if count > 1 else WIDTH//2
-        y = 120 + random.randint(-20,20)
-        es = EnemyShip(x,y)
-        enemies.add(es)
-        all_sprites.add(es)
-        enemies_total += 1
-
-def spawn_special_meteor():
-    kind = random.choices(["default","evil","power","invul","extra_life","teleporter","revive", "shield"], 
-                         [35,15,12,10,15,10,5,3])[0]
-    m = Meteor(kind=kind); all_sprites.add(m); meteors.add(m)
-
-def drop_powerup(center, phase):
-    if phase == "asteroids":
-        pool = ["invul_gift", "upgrade", "extra_life", "teleporter", "shield"]
-        if two_player:
-            pool.append("revive")  # Só dropa powerup revive em 2 jogadores
-    elif phase == "phase2":
-        pool = ["upgrade", "extra_life", "shield", "invul_gift"]
-        weights = [30, 25, 25, 20]
-    elif phase == "phase3":
-        pool = ["shield", "extra_life", "upgrade"]
-        weights = [40, 35, 25]
-    else:
-        pool = ["extra_life", "invul_gift", "upgrade"]
-        weights = [40, 30, 30]
-    
-    ptype = random.choices(pool, weights=weights if 'weights' in locals() else None)[0]
-    pu = Powerup(center, ptype=ptype)
-    all_sprites.add(pu)
-    powerups.add(pu)
-    return pu
-
-# ---------------- Groups & init ----------------
-background = Background()
-all_sprites = pygame.sprite.Group()
-meteors = pygame.sprite.Group()
-bullets = pygame.sprite.Group()
-powerups = pygame.sprite.Group()
-explosions = pygame.sprite.Group()
-enemies = pygame.sprite.Group()
-
-controls_p1 = {'left':pygame.K_a,'right':pygame.K_d,'up':pygame.K_w,'down':pygame.K_s,'shoot':pygame.K_SPACE}
-controls_p2 = {'left':pygame.K_LEFT,'right':pygame.K_RIGHT,'up':pygame.K_UP,'down':pygame.K_DOWN,'shoot':pygame.K_KP0}
-
-player1 = Player(WIDTH//2, HEIGHT-120, controls_p1, color=ASSET_CONFIG.get("player_default_color"), player_num=1)
-player2 = Player(WIDTH//4, HEIGHT-120, controls_p2, color=(255,100,100), player_num=2)
-all_sprites.add(player1)
-
-MAX_METEORS = ASSET_CONFIG.get("max_meteors", 8)
-for _ in range(MAX_METEORS):
-    m = Meteor(kind=random.choice(["default","default","evil"]))
-    all_sprites.add(m); meteors.add(m)
-
-phase = 1
-phase_state = "asteroids"
-two_player = False
-menu_options = ["Jogar 1 Jogador", "Jogar 2 Jogadores", "Controles", "Highscores", "Ajustar Volume", "Carregar Jogo", "Sair"]
-menu_index = 0
-
-# Menu de volume
-volume_options = ["Volume Geral", "Volume Música", "Volume Efeitos", 
-                  "Volume Tiros", "Volume Explosões", "Volume Powerups", 
-                  "Volume Respawn", "Restaurar Padrão", "Voltar ao Menu"]
-volume_index = 0
-volume_adjusting = False
-current_volume_type = "master"
-
-# Menu de pausa
-pause_options = ["Continuar", "Controles", "Ajustar Volume", "Salvar Jogo", "Carregar Jogo", "Voltar ao Menu", "Sair"]
-pause_index = 0
-
-POINTS_TO_NEXT_PHASE = ASSET_CONFIG.get("points_to_next_phase", 1500)
-GLOBAL_SPEED_MULT = 1.0
-
-# highscores load com mais informações
-try:
-    with open(HIGHSCORES_FILE, "r") as f:
-        highscores = json.load(f)
-except Exception:
-    highscores = []
-
-def add_highscore(name, score, phases_completed=1, victory=False):
-    """Adiciona highscore com informações detalhadas"""
-    global highscores
-    
-    # Determinar progresso
-    progress = ""
-    if victory:
-        progress = "VITÓRIA (Fase 3)"
-    elif phases_completed >= 2:
-        progress = f"Fase {phases_completed}"
-    else:
-        progress = "Fase 1"
-    
-    highscores.append({
-        "name": name, 
-        "score": score, 
-        "date": time.strftime("%Y-%m-%d %H:%M"),
-        "phases": phases_completed,
-        "victory": victory,
-        "progress": progress
-    })
-    
-    # Manter apenas os 10 melhores
-    highscores = sorted(highscores, key=lambda x: x["score"], reverse=True)[:10]
-    
-    with open(HIGHSCORES_FILE, "w") as f:
-        json.dump(highscores, f, indent=2)
-
-# ---------------- Game functions ----------------
-def reset_game(two_p=False):
-    global player1, player2, all_sprites, meteors, bullets, powerups, explosions, enemies, phase, phase_state, two_player, GLOBAL_SPEED_MULT, boss, last_minion_spawn, enemies_total, enemies_killed, current_enemy_wave
-    
-    phase = 1
-    phase_state = "asteroids"
-    two_player = two_p
-    GLOBAL_SPEED_MULT = 1.0
-    enemies_total = 0
-    enemies_killed = 0
-    current_enemy_wave = 0
-    
-    all_sprites.empty(); meteors.empty(); bullets.empty(); powerups.empty(); explosions.empty(); enemies.empty()
-    player1 = Player(WIDTH//2, HEIGHT-120, controls_p1, color=ASSET_CONFIG.get("player_default_color"), player_num=1)
-    player2 = Player(WIDTH//4, HEIGHT-120, controls_p2, color=(255,100,100), player_num=2)
-    all_sprites.add(player1)
-    if two_player:
-        all_sprites.add(player2)
-    for _ in range(MAX_METEORS):
-        m = Meteor(kind=random.choice(["default","default","evil"]))
-        all_sprites.add(m); meteors.add(m)
-    boss = None
-    last_minion_spawn = 0
-    
-    change_music("asteroids")
-
-def save_game():
-    """Salva o estado atual do jogo"""
-    try:
-        # Determinar fases completadas
-        phases_completed = 1
-        if phase_state == "phase2" or phase_state == "boss_transition":
-            phases_completed = 2
-        elif phase_state == "phase3" or phase_state == "victory":
-            phases_completed = 3
-        
-        # Coletar dados dos meteors CORRIGIDO
-        meteors_data = []
-        for m in meteors:
-            meteors_data.append({
-                "x": m.rect.centerx,
-                "y": m.rect.centery,
-                "kind": m.kind,
-                "speedy": m.speedy,
-                "speedx": m.speedx,
-                "rot": m.rot,
-                "rot_speed": m.rot_speed
-            })
-        
-        data = {
-            "phase": phase,
-            "phase_state": phase_state,
-            "two_player": two_player,
-            "phases_completed": phases_completed,
-            "player1": {
-                "x": player1.rect.centerx,
-                "y": player1.rect.centery,
-                "health": player1.health,
-                "score": player1.score,
-                "extra_guns": player1.extra_guns,
-                "teleport": player1.teleport_ability,
-                "lives": player1.lives,
-                "is_alive": player1.is_alive
-            },
-            "player2": {
-                "x": player2.rect.centerx,
-                "y": player2.rect.centery,
-                "health": player2.health,
-                "score": player2.score,
-                "extra_guns": player2.extra_guns,
-                "teleport": player2.teleport_ability,
-                "lives": player2.lives,
-                "is_alive": player2.is_alive
-            },
-            "meteors": meteors_data,
-            "global_speed_mult": GLOBAL_SPEED_MULT,
-            "enemies_killed": enemies_killed,
-            "current_enemy_wave": current_enemy_wave
-        }
-        
-        with open(SAVE_FILE, "w") as f:
-            json.dump(data, f, indent=2)
-        
-        print("💾 Jogo salvo com sucesso!")
-        return True
-    except Exception as e:
-        print(f"⚠ Erro ao salvar jogo: {e}")
-        return False
-
-def load_game():
-    """Carrega um jogo salvo - CORREÇÃO CRÍTICA para meteors"""
-    global phase, phase_state, two_player, GLOBAL_SPEED_MULT, enemies_killed, current_enemy_wave
-    
-    try:
-        with open(SAVE_FILE, "r") as f:
-            data = json.load(f)
-    except Exception as e:
-        print("⚠ Falha ao carregar jogo:", e)
-        return False
-    
-    # Carregar dados básicos
-    phase = data.get("phase", 1)
-    phase_state = data.get("phase_state", "asteroids")
-    two_player = data.get("two_player", False)
-    GLOBAL_SPEED_MULT = data.get("global_speed_mult", 1.0)
-    enemies_killed = data.get("enemies_killed", 0)
-    current_enemy_wave = data.get("current_enemy_wave", 0)
-    
-    # Limpar grupos
-    all_sprites.empty()
-    meteors.empty()
-    bullets.empty()
-    powerups.empty()
-    explosions.empty()
-    enemies.empty()
-    
-    # Carregar Player 1
-    p1 = data.get("player1", {})
-    player1.rect.centerx = p1.get("x", WIDTH//2)
-    player1.rect.centery = p1.get("y", HEIGHT-120)
-    player1.health = p1.get("health", 100)
-    player1.score = p1.get("score", 0)
-    player1.extra_guns = p1.get("extra_guns", 0)
-    player1.teleport_ability = p1.get("teleport", False)
-    player1.lives = p1.get("lives", 3)
-    player1.is_alive = p1.get("is_alive", True)
-    
-    # Atualizar imagem do player 1
-    if player1.is_alive:
-        player1.image = player1.normal_image.copy()
-    else:
-        player1.image = player1.dead_image.copy()
-    
-    all_sprites.add(player1)
-    
-    # Carregar Player 2 se existir
-    if two_player:
-        p2 = data.get("player2", {})
-        player2.rect.centerx = p2.get("x", WIDTH//4)
-        player2.rect.centery = p2.get("y", HEIGHT-120)
-        player2.health = p2.get("health", 100)
-        player2.score = p2.get("score", 0)
-        player2.extra_guns = p2.get("extra_guns", 0)
-        player2.teleport_ability = p2.get("teleport", False)
-        player2.lives = p2.get("lives", 3)
-        player2.is_alive = p2.get("is_alive", True)
-        
-        # Atualizar imagem do player 2
-        if player2.is_alive:
-            player2.image = player2.normal_image.copy()
-        else:
-            player2.image = player2.dead_image.copy()
-        
-        all_sprites.add(player2)
-    
-    # CORREÇÃO CRÍTICA: Recriar meteors corretamente
-    meteors_data = data.get("meteors", [])
-    for md in meteors_data:
-        # Usar o construtor corrigido que aceita x e y
-        m = Meteor(
-            kind=md.get("kind", "default"),
-            x=md.get("x", random.randint(40, WIDTH-40)),
-            y=md.get("y", random.randint(-300, -40))
-        )
-        
-        # Restaurar atributos adicionais
-        m.speedy = md.get("speedy", 1)
-        m.speedx = md.get("speedx", 0)
-        m.rot = md.get("rot", 0)
-        m.rot_speed = md.get("rot_speed", random.randint(-5,5))
-        m.damage = 40 if md.get("kind") == "evil" else 20
-        
-        # Adicionar aos grupos
-        meteors.add(m)
-        all_sprites.add(m)
-    
-    # Se não houver meteors no save, criar novos
-    if len(meteors) == 0 and phase_state == "asteroids":
-        for _ in range(MAX_METEORS):
-            m = Meteor(kind=random.choice(["default","default","evil"]))
-            all_sprites.add(m)
-            meteors.add(m)
-    
-    print("✅ Jogo carregado com sucesso!")
-    return True
-
-# Funções para o menu de volume
-def draw_volume_menu(screen):
-    """Desenha o menu de ajuste de volume"""
-    overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-    overlay.fill((0, 0, 0, 220))
-    screen.blit(overlay, (0, 0))
-    
-    draw_text(screen, "🎵 CONFIGURAÇÃO DE VOLUME", 60, WIDTH//2, 60)
-    
-    for i, opt in enumerate(volume_options):
-        color = (255, 255, 0) if i == volume_index else (200, 200, 200)
-        
-        if opt == "Restaurar Padrão":
-            draw_text(screen, opt, 36, WIDTH//2, 180 + i*55, color)
-        elif opt == "Voltar ao Menu":
-            draw_text(screen, opt, 36, WIDTH//2, 180 + i*55, color)
-        else:
-            # Extrair o tipo de volume do texto
-            vol_type = ""
-            if "Geral" in opt:
-                vol_type = "master"
-            elif "Música" in opt:
-                vol_type = "music"
-            elif "Efeitos" in opt:
-                vol_type = "effects"
-            elif "Tiros" in opt:
-                vol_type = "shoot"
-            elif "Explosões" in opt:
-                vol_type = "explosion"
-            elif "Powerups" in opt:
-                vol_type = "powerup"
-            elif "Respawn" in opt:
-                vol_type = "respawn"
-            
-            current_vol = VOLUME_CONFIG.get(vol_type, 0.5) * 100
-            bar_width = 200
-            bar_height = 20
-            bar_x = WIDTH//2 - bar_width//2
-            bar_y = 180 + i*55 + 25
-            
-            # Barra de volume
-            fill_width = int((current_vol / 100) * bar_width)
-            pygame.draw.rect(screen, (50, 50, 50), (bar_x, bar_y, bar_width, bar_height))
-            pygame.draw.rect(screen, color, (bar_x, bar_y, fill_width, bar_height))
-            pygame.draw.rect(screen, (255, 255, 255), (bar_x, bar_y, bar_width, bar_height), 2)
-            
-            # Texto com porcentagem
-            display_text = f"{opt}: {current_vol:.0f}%"
-            if volume_adjusting and vol_type == current_volume_type:
-                display_text = f"> {display_text} <"
-            
-            draw_text(screen, display_text, 30, WIDTH//2, 180 + i*55, color)
-    
-    if volume_adjusting:
-        draw_text(screen, "Use ← → para ajustar, ENTER para confirmar", 22, WIDTH//2, HEIGHT-80)
-    else:
-        draw_text(screen, "Use ↑↓ para navegar, ENTER para selecionar", 22, WIDTH//2, HEIGHT-80)
-    
-    draw_text(screen, "ESC para voltar sem salvar", 20, WIDTH//2, HEIGHT-40)
-
-def update_volume(type_key, delta):
-    """Atualiza um tipo específico de volume"""
-    global VOLUME_CONFIG
-    
-    current = VOLUME_CONFIG.get(type_key, 0.5)
-    new_volume = max(0.0, min(1.0, current + delta))
-    VOLUME_CONFIG[type_key] = new_volume
-    
-    # Aplicar imediatamente
-    if type_key == "master" or type_key == "music":
-        set_music_volume()
-    
-    # Aplicar volumes aos sons existentes
-    if shoot_snd and type_key in ["master", "effects", "shoot"]:
-        set_sound_volume(shoot_snd, "shoot")
-    if explosion_snd and type_key in ["master", "effects", "explosion"]:
-        set_sound_volume(explosion_snd, "explosion")
-    if powerup_snd and type_key in ["master", "effects", "powerup"]:
-        set_sound_volume(powerup_snd, "powerup")
-    if respawn_snd and type_key in ["master", "effects", "respawn"]:
-        set_sound_volume(respawn_snd, "respawn")
-    
-    return new_volume
-
-def restore_default_volumes():
-    """Restaura os volumes padrão"""
-    global VOLUME_CONFIG
-    VOLUME_CONFIG = DEFAULT_VOLUMES.copy()
-    
-    # Aplicar volumes
-    set_music_volume()
-    if shoot_snd: set_sound_volume(shoot_snd, "shoot")
-    if explosion_snd: set_sound_volume(explosion_snd, "explosion")
-    if powerup_snd: set_sound_volume(powerup_snd, "powerup")
-    if respawn_snd: set_sound_volume(respawn_snd, "respawn")
-    
-    save_volume_config(VOLUME_CONFIG)
-
-# ---------------- Main loop variables ----------------
-running = True
-pause_menu = False
-transition_start = None
-boss = None
-last_minion_spawn = 0
-game_state = "intro"
-
-# Tocar música inicial
-try:
-    change_music("asteroids")
-except:
-    pass
-
-# ---------------- Main Loop ----------------
-while running:
-    dt = clock.tick(60) / 1000.0
-
-    # --- events ---
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-        elif event.type == pygame.KEYDOWN:
-            # MENU PRINCIPAL
-            if game_state == "intro":
-                if event.key == pygame.K_UP:
-                    menu_index = (menu_index - 1) % len(menu_options)
-                elif event.key == pygame.K_DOWN:
-                    menu_index = (menu_index + 1) % len(menu_options)
-                elif event.key == pygame.K_RETURN:
-                    escolha = menu_options[menu_index]
-                    if escolha == "Jogar 1 Jogador":
-                        reset_game(two_p=False); game_state = "playing"
-                    elif escolha == "Jogar 2 Jogadores":
-                        reset_game(two_p=True); game_state = "playing"
-                    elif escolha == "Controles":
-                        game_state = "controls"
-                    elif escolha == "Highscores":
-                        game_state = "highscores"
-                    elif escolha == "Ajustar Volume":
-                        game_state = "volume_menu"
-                        volume_index = 0
-                        volume_adjusting = False
-                    elif escolha == "Carregar Jogo":
-                        if load_game():
-                            game_state = "playing"
-                        else:
-                            print("❌ Não foi possível carregar o jogo")
-                    elif escolha == "Sair":
-                        running = False
-            
-            # MENU DE VOLUME
-            elif game_state == "volume_menu":
-                if event.key == pygame.K_ESCAPE:
-                    # Salvar configurações ao sair
-                    save_volume_config(VOLUME_CONFIG)
-                    game_state = "intro"
-                
-                if volume_adjusting:
-                    if event.key == pygame.K_LEFT:
-                        update_volume(current_volume_type, -0.05)
-                    elif event.key == pygame.K_RIGHT:
-                        update_volume(current_volume_type, 0.05)
-                    elif event.key == pygame.K_RETURN or event.key == pygame.K_ESCAPE:
-                        volume_adjusting = False
-                        # Salvar configurações
-                        save_volume_config(VOLUME_CONFIG)
-                else:
-                    if event.key == pygame.K_UP:
-                        volume_index = (volume_index - 1) % len(volume_options)
-                    elif event.key == pygame.K_DOWN:
-                        volume_index = (volume_index + 1) % len(volume_options)
-                    elif event.key == pygame.K_RETURN:
-                        escolha = volume_options[volume_index]
-                        
-                        if escolha == "Restaurar Padrão":
-                            restore_default_volumes()
-                        elif escolha == "Voltar ao Menu":
-                            save_volume_config(VOLUME_CONFIG)
-                            game_state = "intro"
-                        else:
-                            # Determinar tipo de volume
-                            vol_type = ""
-                            if "Geral" in escolha:
-                                vol_type = "master"
-                            elif "Música" in escolha:
-                                vol_type = "music"
-                            elif "Efeitos" in escolha:
-                                vol_type = "effects"
-                            elif "Tiros" in escolha:
-                                vol_type = "shoot"
-                            elif "Explosões" in escolha:
-                                vol_type = "explosion"
-                            elif "Powerups" in escolha:
-                                vol_type = "powerup"
-                            elif "Respawn" in escolha:
-                                vol_type = "respawn"
-                            
-                            if vol_type:
-                                volume_adjusting = True
-                                current_volume_type = vol_type
-            
-            # JOGO EM ANDAMENTO
-            elif game_state in ["playing","phase3"]:
-                if event.key == pygame.K_ESCAPE:
-                    if pause_menu:
-                        pause_menu = False  # ESC fecha o menu de pausa
-                    else:
-                        pause_menu = True  # ESC abre o menu de pausa
-                
-                # Menu de pausa - navegação
-                if pause_menu:
-                    if event.key == pygame.K_UP:
-                        pause_index = (pause_index - 1) % len(pause_options)
-                    elif event.key == pygame.K_DOWN:
-                        pause_index = (pause_index + 1) % len(pause_options)
-                    elif event.key == pygame.K_RETURN:
-                        escolha = pause_options[pause_index]
-                        
-                        if escolha == "Continuar":
-                            pause_menu = False
-                        elif escolha == "Controles":
-                            game_state = "controls"
-                            pause_menu = False
-                        elif escolha == "Ajustar Volume":
-                            game_state = "volume_menu"
-                            volume_index = 0
-                            volume_adjusting = False
-                            pause_menu = False
-                        elif escolha == "Salvar Jogo":
-                            if save_game():
-                                # Mostrar mensagem de sucesso
-                                print("✅ Jogo salvo!")
-                            pause_menu = False
-                        elif escolha == "Carregar Jogo":
-                            if load_game():
-                                game_state = "playing"
-                            pause_menu = False
-                        elif escolha == "Voltar ao Menu":
-                            game_state = "intro"
-                            pause_menu = False
-                        elif escolha == "Sair":
-                            running = False
-                
-                # Tecla P ainda funciona para pausar
-                if event.key == pygame.K_p:
-                    pause_menu = not pause_menu
-                
-                if event.key == pygame.K_r:
-                    if game_state == "game_over":
-                        reset_game(two_p=two_player); game_state = "playing"
-                
-                if event.key == pygame.K_f:
-                    save_game()
-                
-                if event.key == pygame.K_l:
-                    if load_game():
-                        game_state = "playing"
-                
-                if event.key == pygame.K_m:
-                    player1.mouse_control = not player1.mouse_control
-                
-                if event.key == pygame.K_t:
-                    if player1.teleport_ability and player1.is_alive:
-                        player1.teleport()
-            
-            # OUTROS ESTADOS (controles, highscores, etc)
-            elif game_state in ["controls", "highscores", "game_over", "victory"]:
-                if event.key == pygame.K_ESCAPE:
-                    game_state = "intro"
-                elif event.key == pygame.K_RETURN:
-                    game_state = "intro"
-
-    # --- continuous input / shooting for player(s) ---
-    if game_state in ("playing", "phase3") and not pause_menu and phase_state not in ("transition", "boss_transition"):
-        keys = pygame.key.get_pressed()
-        if keys[player1.controls["shoot"]] and player1.is_alive:
-            bls = player1.shoot()
-            if bls:
-                for b in bls:
-                    all_sprites.add(b); bullets.add(b)
-                if shoot_snd: 
-                    # Reaplica volume antes de tocar
-                    set_sound_volume(shoot_snd, "shoot")
-                    shoot_snd.play()
-        if two_player and (keys[player2.controls["shoot"]] or keys[pygame.K_KP0] or keys[pygame.K_RCTRL]) and player2.is_alive:
-            bls = player2.shoot()
-            if bls:
-                for b in bls:
-                    all_sprites.add(b); bullets.add(b)
-                if shoot_snd: 
-                    set_sound_volume(shoot_snd, "shoot")
-                    shoot_snd.play()
-
-    # --- enemy AI & boss actions ---
-    if game_state in ("playing","phase3") and not pause_menu and phase_state not in ("transition", "boss_transition"):
-        if phase_state == "phase2" or phase_state == "phase3":
-            for es in list(enemies):
-                targets = [p for p in (player1, player2) if p in all_sprites and getattr(p, "is_alive", False)]
-                if not targets:
-                    continue
-                target = min(targets, key=lambda t: abs(t.rect.centerx - es.rect.centerx))
-                es.aim_and_shoot(target)
-        if boss and phase_state == "phase3":
-            boss.shoot()
-
-    # --- updates ---
-    if game_state in ("playing", "phase3") and not pause_menu and phase_state not in ("transition", "boss_transition"):
-        all_sprites.update()
-        meteors.update()
-        bullets.update()
-        powerups.update()
-        explosions.update()
-        enemies.update()
-        if boss:
-            boss.update()
-        
-        # enemy bullets -> players (só players vivos)
-        if player1.is_alive:
-            hits_from_enemy = [b for b in bullets if getattr(b, "owner", "") == "enemy" and b.rect.colliderect(player1.rect)]
-            for b in hits_from_enemy:
-                if player1.take_damage(15):
-                    ex = Explosion(player1.rect.center); all_sprites.add(ex); explosions.add(ex)
-                    if explosion_snd: 
-                        set_sound_volume(explosion_snd, "explosion")
-                        explosion_snd.play()
-                b.kill()
-
-        if two_player and player2.is_alive:
-            hits_from_enemy = [b for b in bullets if getattr(b, "owner", "") == "enemy" and b.rect.colliderect(player2.rect)]
-            for b in hits_from_enemy:
-                if player2.take_damage(15):
-                    ex = Explosion(player2.rect.center); all_sprites.add(ex); explosions.add(ex)
-                    if explosion_snd: 
-                        set_sound_volume(explosion_snd, "explosion")
-                        explosion_snd.play()
-                b.kill()
-
-    # --- collisions & phase logic ---
-    if game_state in ("playing","phase3") and not pause_menu and phase_state not in ("transition", "boss_transition"):
-        # ----- PHASE 1: ASTEROIDS -----
-        if phase_state == "asteroids":
-            hits = pygame.sprite.groupcollide(meteors, bullets, False, True)
-            for meteor, bullets_hit in hits.items():
-                ex = Explosion(meteor.rect.center); all_sprites.add(ex); explosions.add(ex)
-                if explosion_snd: 
-                    set_sound_volume(explosion_snd, "explosion")
-                    explosion_snd.play()
-
-                credited = False
-                for b in bullets_hit:
-                    if getattr(b, "owner", "") == "player":
-                        player1.score += 10
-                        credited = True
-                if not credited and two_player:
-                    player2.score += 10
-                if not credited and not two_player:
-                    player1.score += 10
-
-                if random.random() < 0.5:
-                    drop_powerup(meteor.rect.center, "asteroids")
-
-                total_score = player1.score + (player2.score if two_player else 0)
-                if total_score > 0 and total_score % 500 == 0:
-                    GLOBAL_SPEED_MULT += 0.3
-
-                meteor.respawn()
-
-                # check transition to next phase
-                if (not two_player and player1.score >= POINTS_TO_NEXT_PHASE) or (two_player and (player1.score + player2.score) >= POINTS_TO_NEXT_PHASE):
-                    for m in list(meteors):
-                        m.kill()
-                    meteors.empty()
-                    bullets.empty()
-                    powerups.empty()
-                    phase_state = "transition"
-                    game_state = "next_phase"
-                    transition_start = pygame.time.get_ticks()
-                    break
-
-            # meteors -> players collisions (só players vivos)
-            if player1.is_alive:
-                hits_p1 = pygame.sprite.spritecollide(player1, meteors, False)
-                for hit in hits_p1:
-                    if player1.take_damage(hit.damage):
-                        e = Explosion(hit.rect.center); all_sprites.add(e); explosions.add(e)
-                        if explosion_snd: 
-                            set_sound_volume(explosion_snd, "explosion")
-                            explosion_snd.play()
-                    hit.respawn()
-            if two_player and player2.is_alive:
-                hits_p2 = pygame.sprite.spritecollide(player2, meteors, False)
-                for hit in hits_p2:
-                    if player2.take_damage(hit.damage):
-                        e = Explosion(hit.rect.center); all_sprites.add(e); explosions.add(e)
-                        if explosion_snd: 
-                            set_sound_volume(explosion_snd, "explosion")
-                            explosion_snd.play()
-                    hit.respawn()
-
-        # ----- PHASE 2: ENEMIES -----
-        elif phase_state == "phase2":
-            # Detecção de colisão bullets->enemies na fase 2
-            hits_en = pygame.sprite.groupcollide(enemies, bullets, False, True)
-            for en, bls in hits_en.items():
-                dmg = sum(1 for b in bls if getattr(b,"owner","")=="player")
-                if dmg > 0:
-                    dead = en.take_damage(dmg)
-                    if dead:
-                        enemies_killed += 1
-                        ex = Explosion(en.rect.center); all_sprites.add(ex); explosions.add(ex)
-                        
-                        drop_chance = 0.6
-                        if enemies_killed % 3 == 0:
-                            drop_chance = 1.0
-                        
-                        if random.random() < drop_chance:
-                            drop_powerup(en.rect.center, "phase2")
-                        
-                        en.kill(); enemies.remove(en)
-            
-            if len(enemies) == 0 and enemies_killed < TOTAL_ENEMIES_PHASE2:
-                next_spawn = min(ENEMIES_PER_WAVE, TOTAL_ENEMIES_PHASE2 - enemies_killed)
-                if next_spawn > 0:
-                    current_enemy_wave += 1
-                    spawn_enemy_wave(next_spawn)
-            
-            elif enemies_killed >= TOTAL_ENEMIES_PHASE2 and len(enemies) == 0:
-                bullets.empty()
-                powerups.empty()
-                phase_state = "boss_transition"
-                game_state = "next_phase"
-                transition_start = pygame.time.get_ticks()
-
-        # ----- PHASE 3 (boss fight) -----
-        elif phase_state == "phase3":
-            # Detecção de colisão bullets->enemies também deve funcionar na fase 3
-            # Inimigos normais (minions) na fase 3
-            hits_enemies_phase3 = pygame.sprite.groupcollide(enemies, bullets, False, True)
-            for en, bls in hits_enemies_phase3.items():
-                dmg = sum(1 for b in bls if getattr(b,"owner","")=="player")
-                if dmg > 0:
-                    dead = en.take_damage(dmg)
-                    if dead:
-                        ex = Explosion(en.rect.center); all_sprites.add(ex); explosions.add(ex)
-                        
-                        # Chance de drop para minions do boss
-                        if random.random() < 0.4:  # 40% de chance
-                            drop_powerup(en.rect.center, "phase3")
-                        
-                        en.kill(); enemies.remove(en)
-            
-            # Boss específico
-            if boss and boss.alive():
-                hits_boss = pygame.sprite.spritecollide(boss, bullets, True)
-                for b in hits_boss:
-                    if getattr(b,"owner","") == "player":
-                        boss.health -= 1
-                        
-                        if boss.health % 10 == 0 and boss.health > 0:
-                            drop_powerup((boss.rect.centerx + random.randint(-50, 50), 
-                                         boss.rect.centery + random.randint(-50, 50)), "phase3")
-                        
-                        if boss.health <= 0:
-                            ex = Explosion(boss.rect.center); all_sprites.add(ex); explosions.add(ex)
-                            if explosion_snd: 
-                                set_sound_volume(explosion_snd, "explosion")
-                                explosion_snd.play()
-                            
-                            for _ in range(3):
-                                drop_powerup((boss.rect.centerx + random.randint(-100, 100), 
-                                           boss.rect.centery + random.randint(-100, 100)), "phase3")
-                            
-                            boss.kill(); boss = None
-                            player1.score += 500
-                            if two_player: player2.score += 300
-                            phase_state = "victory"
-                            game_state = "victory"
-                            
-                            # Adicionar highscore com vitória
-                            total_score = player1.score + (player2.score if two_player else 0)
-                            name = "DUO" if two_player else "PLAYER1"
-                            add_highscore(name, total_score, phases_completed=3, victory=True)
-                
-                # Spawn de minions mais lento
-                if pygame.time.get_ticks() - last_minion_spawn > random.randint(5000, 6000):
-                    last_minion_spawn = pygame.time.get_ticks()
-                    
-                    mx = random.randint(150, WIDTH-150)
-                    m = EnemyShip(mx, boss.rect.bottom + 60)
-                    enemies.add(m)
-                    all_sprites.add(m)
-
-        # ----- COLISÕES COM POWERUPS (só players vivos) -----
-        if player1.is_alive:
-            coll1 = pygame.sprite.spritecollide(player1, powerups, True)
-            for pu in coll1:
-                if pu.ptype == "revive":
-                    # CORREÇÃO: Só revive o P2 se estiver jogando com 2 jogadores
-                    if two_player and not player2.is_alive and player2.lives > 0:
-                        player2.respawn()
-                    else:
-                        # Se não tem P2 para reviver, cura o P1
-                        player1.health = min(100, player1.health+50)
-                
-                elif pu.ptype == "invul_gift":
-                    player1.activate_invulnerability(5000)
-                
-                elif pu.ptype == "upgrade":
-                    player1.activate_upgrade(15000)
-                
-                elif pu.ptype == "extra_life":
-                    player1.health = min(100, player1.health+30)
-                    player1.lives += 1
-                
-                elif pu.ptype == "teleporter":
-                    player1.teleport_ability = True
-                
-                elif pu.ptype == "shield":
-                    player1.activate_shield(8000)
-                
-                if powerup_snd:
-                    set_sound_volume(powerup_snd, "powerup")
-                    powerup_snd.play()
-
-        if two_player and player2.is_alive:
-            coll2 = pygame.sprite.spritecollide(player2, powerups, True)
-            for pu in coll2:
-                if pu.ptype == "revive":
-                    # CORREÇÃO: Só revive o P1 se estiver jogando com 2 jogadores
-                    if not player1.is_alive and player1.lives > 0:
-                        player1.respawn()
-                    else:
-                        # Se não tem P1 para reviver, cura o P2
-                        player2.health = min(100, player2.health+50)
-                
-                elif pu.ptype == "invul_gift":
-                    player2.activate_invulnerability(5000)
-                
-                elif pu.ptype == "upgrade":
-                    player2.activate_upgrade(15000)
-                
-                elif pu.ptype == "extra_life":
-                    player2.health = min(100, player2.health+30)
-                    player2.lives += 1
-                
-                elif pu.ptype == "teleporter":
-                    player2.teleport_ability = True
-                
-                elif pu.ptype == "shield":
-                    player2.activate_shield(8000)
-                
-                if powerup_snd:
-                    set_sound_volume(powerup_snd, "powerup")
-                    powerup_snd.play()
-
-        # ensure meteor count
-        if phase_state == "asteroids":
-            while len(meteors) < MAX_METEORS:
-                spawn_special_meteor()
-
-        # ----- Game over check -----
-        if not two_player:
-            # Modo 1 jogador: morreu = GAME OVER
-            if not player1.is_alive or player1.lives <= 0:
-                game_state = "game_over"
-                phase_state = "game_over"
-                if player1.score > 0:
-                    # Determinar fases completadas
-                    phases_completed = 1
-                    if phase_state == "phase2" or phase_state == "boss_transition":
-                        phases_completed = 2
-                    elif phase_state == "phase3":
-                        phases_completed = 3
-                    
-                    add_highscore("PLAYER1", player1.score, phases_completed=phases_completed, victory=False)
-        else:
-            # Modo 2 jogadores: ambos mortos = GAME OVER
-            game_over = (player1.lives <= 0 and player2.lives <= 0)
-            if game_over:
-                game_state = "game_over"
-                phase_state = "game_over"
-                if player1.score + player2.score > 0:
-                    # Determinar fases completadas
-                    phases_completed = 1
-                    if phase_state == "phase2" or phase_state == "boss_transition":
-                        phases_completed = 2
-                    elif phase_state == "phase3":
-                        phases_completed = 3
-                    
-                    add_highscore("DUO", player1.score + player2.score, phases_completed=phases_completed, victory=False)
-
-    # --- NEXT_PHASE screen handling ---
-    if game_state == "next_phase":
-        if phase_state == "transition":
-            if transition_start and pygame.time.get_ticks() - transition_start > 3000:
-                phase_state = "phase2"
-                game_state = "playing"
-                bullets.empty()
-                powerups.empty()
-                explosions.empty()
-                current_enemy_wave = 1
-                spawn_enemy_wave(min(ENEMIES_PER_WAVE, TOTAL_ENEMIES_PHASE2))
-                change_music("phase2")
-                transition_start = None
-                
-                # Adicionar highscore parcial ao completar fase 1
-                total_score = player1.score + (player2.score if two_player else 0)
-                name = "DUO" if two_player else "PLAYER1"
-                add_highscore(name, total_score, phases_completed=1, victory=False)
-        elif phase_state == "boss_transition":
-            if transition_start and pygame.time.get_ticks() - transition_start > 3000:
-                bullets.empty()
-                powerups.empty()
-                explosions.empty()
-                boss = Boss(WIDTH//2, 150)
-                all_sprites.add(boss)
-                phase_state = "phase3"
-                game_state = "playing"
-                change_music("phase3")
-                transition_start = None
-                
-                # Adicionar highscore parcial ao completar fase 2
-                total_score = player1.score + (player2.score if two_player else 0)
-                name = "DUO" if two_player else "PLAYER1"
-                add_highscore(name, total_score, phases_completed=2, victory=False)
-
-    # --- DRAW SECTION ---
-    screen.fill((0,0,0))
-    
-    if game_state == "intro":
-        draw_text(screen, "🚀 NOVA DESCENT 🚀", 72, WIDTH//2, 60)
-        draw_text(screen, "MENU PRINCIPAL", 40, WIDTH//2, 140)
-        for i, opt in enumerate(menu_options):
-            cor = (255,255,0) if i == menu_index else (200,200,200)
-            draw_text(screen, opt, 36, WIDTH//2, 220 + i*55, cor)
-        draw_text(screen, "Use ↑↓ para navegar, ENTER para selecionar", 22, WIDTH//2, HEIGHT-60)
-
-    elif game_state == "controls":
-        draw_text(screen, "📋 CONTROLES", 60, WIDTH//2, 60)
-        
-        draw_text(screen, "🎮 JOGADOR 1:", 36, WIDTH//2, 150, (100, 200, 255))
-        draw_text(screen, "WASD - Movimentar", 28, WIDTH//2, 190)
-        draw_text(screen, "ESPAÇO - Atirar", 28, WIDTH//2, 225)
-        draw_text(screen, "T - Teleportar (quando disponível)", 28, WIDTH//2, 260)
-        draw_text(screen, "M - Ativar/Desativar controle do mouse", 28, WIDTH//2, 295)
-        
-        draw_text(screen, "🎮 JOGADOR 2:", 36, WIDTH//2, 350, (255, 100, 100))
-        draw_text(screen, "SETAS - Movimentar", 28, WIDTH//2, 390)
-        draw_text(screen, "KP0 ou RCTRL - Atirar", 28, WIDTH//2, 425)
-        
-        draw_text(screen, "🔄 COMANDOS GERAIS:", 36, WIDTH//2, 490, (200, 255, 100))
-        draw_text(screen, "P - Pausar/Despausar", 28, WIDTH//2, 530)
-        draw_text(screen, "ESC - Menu de Pausa/Sair", 28, WIDTH//2, 565)
-        draw_text(screen, "R - Reiniciar (apenas no GAME OVER)", 28, WIDTH//2, 600)
-        draw_text(screen, "F - Salvar jogo | L - Carregar jogo", 28, WIDTH//2, 635)
-        
-        draw_text(screen, "Pressione ENTER ou ESC para voltar ao menu", 24, WIDTH//2, HEIGHT-50)
-
-    elif game_state == "highscores":
-        draw_text(screen, "🏆 HIGHSCORES", 60, WIDTH//2, 60)
-        
-        if not highscores:
-            draw_text(screen, "Nenhum highscore registrado ainda!", 36, WIDTH//2, HEIGHT//2)
-        else:
-            for i, hs in enumerate(highscores[:10]):
-                name = hs.get("name", "Unknown")
-                score = hs.get("score", 0)
-                progress = hs.get("progress", "Fase 1")
-                date = hs.get("date", "N/A")
-                victory = hs.get("victory", False)
-                
-                # Destaque para os 3 primeiros
-                if i == 0:
-                    color = (255, 215, 0)  # Ouro
-                    medal = "🥇"
-                elif i == 1:
-                    color = (192, 192, 192)  # Prata
-                    medal = "🥈"
-                elif i == 2:
-                    color = (205, 127, 50)  # Bronze
-                    medal = "🥉"
-                else:
-                    color = (200, 200, 200)
-                    medal = f"{i+1}."
-                
-                y_pos = 150 + i * 50
-                
-                # Nome e pontuação
-                draw_text(screen, f"{medal} {name}: {score} pts", 26, WIDTH//2 - 180, y_pos, color)
-                
-                # Progresso (com emoji se venceu)
-                progress_text = f"✓ {progress}" if victory else f"→ {progress}"
-                progress_color = (100, 255, 100) if victory else (200, 200, 100)
-                draw_text(screen, progress_text, 22, WIDTH//2 + 100, y_pos, progress_color)
-                
-                # Data
-                draw_text(screen, f"({date})", 18, WIDTH//2 + 100, y_pos + 25, (150, 150, 150))
-        
-        draw_text(screen, "Pressione ENTER ou ESC para voltar ao menu", 24, WIDTH//2, HEIGHT-50)
-
-    elif game_state == "volume_menu":
-        draw_volume_menu(screen)
-
-    elif game_state in ("playing", "phase3"):
-        # Desenhar o jogo normalmente
-        background.draw(screen, phase_state)
-        
-        if phase_state not in ("transition", "boss_transition"):
-            all_sprites.draw(screen)
-        
-        # Interface do Player 1
-        draw_health_bar(screen, 20, 20, player1.health if player1.is_alive else 0)
-        draw_text(screen, f"P1 PONTOS: {player1.score}", 30, 150, 20)
-        
-        # Vidas do Player 1
-        lives_text = f"P1 VIDAS: {player1.lives}"
-        if not player1.is_alive:
-            if two_player:
-                lives_text += " (Aguardando revive do P2)"  # Mensagem para 2 jogadores
-            else:
-                lives_text += " (GAME OVER)"  # Mensagem para 1 jogador
-        draw_text(screen, lives_text, 22, 150, 55, (255, 200, 100) if player1.is_alive else (200, 100, 100))
-        
-        if two_player:
-            # Interface do Player 2
-            draw_health_bar(screen, WIDTH-270, 20, player2.health if player2.is_alive else 0)
-            draw_text(screen, f"P2 PONTOS: {player2.score}", 30, WIDTH-150, 20)
-            
-            # Vidas do Player 2
-            lives_text = f"P2 VIDAS: {player2.lives}"
-            if not player2.is_alive:
-                lives_text += " (Aguardando revive do P1)"  # Mensagem para 2 jogadores
-            draw_text(screen, lives_text, 22, WIDTH-150, 55, (255, 200, 100) if player2.is_alive else (200, 100, 100))
-        
-        # Phase-specific UI
-        if phase_state == "asteroids":
-            draw_text(screen, f"Pontos para fase 2: {POINTS_TO_NEXT_PHASE}", 22, WIDTH-220, 20)
-        elif phase_state == "phase2":
-            draw_text(screen, f"FASE 2 - INIMIGOS: {enemies_killed}/{TOTAL_ENEMIES_PHASE2}", 26, WIDTH//2, 20)
-            draw_text(screen, f"Wave: {current_enemy_wave}", 22, WIDTH//2, 50)
-        elif phase_state == "phase3":
-            draw_text(screen, "FASE 3 - CHEFÃO FINAL", 36, WIDTH//2, 20)
-            if boss and boss.alive():
-                draw_text(screen, f"CHEFÃO HP: {boss.health}", 22, WIDTH//2, 60)
-        
-        # Mostrar powerups ativos
-        now = pygame.time.get_ticks()
-        y_offset = 100
-        
-        # Player 1 powerups
-        if player1.is_alive:
-            if player1.upgrade_end_time and now < player1.upgrade_end_time:
-                remaining = (player1.upgrade_end_time - now) / 1000
-                draw_text(screen, f"P1 Upgrade: {remaining:.1f}s", 20, 100, y_offset, (255, 255, 100))
-                y_offset += 25
-            if player1.shield_end_time and now < player1.shield_end_time:
-                remaining = (player1.shield_end_time - now) / 1000
-                draw_text(screen, f"P1 Escudo: {remaining:.1f}s", 20, 100, y_offset, (100, 200, 255))
-                y_offset += 25
-            if player1.invulnerable_until and now < player1.invulnerable_until:
-                remaining = (player1.invulnerable_until - now) / 1000
-                draw_text(screen, f"P1 Invulnerável: {remaining:.1f}s", 20, 100, y_offset, (30, 100, 200))
-                y_offset += 25
-        
-        # Player 2 powerups
-        if two_player and player2.is_alive:
-            y_offset = 100
-            if player2.upgrade_end_time and now < player2.upgrade_end_time:
-                remaining = (player2.upgrade_end_time - now) / 1000
-                draw_text(screen, f"P2 Upgrade: {remaining:.1f}s", 20, WIDTH-100, y_offset, (255, 255, 100))
-                y_offset += 25
-            if player2.shield_end_time and now < player2.shield_end_time:
-                remaining = (player2.shield_end_time - now) / 1000
-                draw_text(screen, f"P2 Escudo: {remaining:.1f}s", 20, WIDTH-100, y_offset, (100, 200, 255))
-                y_offset += 25
-            if player2.invulnerable_until and now < player2.invulnerable_until:
-                remaining = (player2.invulnerable_until - now) / 1000
-                draw_text(screen, f"P2 Invulnerável: {remaining:.1f}s", 20, WIDTH-100, y_offset, (30, 100, 200))
-                y_offset += 25
-        
-        # Instruções de revive em 2 jogadores
-        if two_player:
-            if not player1.is_alive and player2.is_alive:
-                draw_text(screen, "🎮 P2: Pegue o powerup VERMELHO para reviver P1!", 24, WIDTH//2, HEIGHT-40, (255, 50, 50))
-            elif not player2.is_alive and player1.is_alive:
-                draw_text(screen, "🎮 P1: Pegue o powerup VERMELHO para reviver P2!", 24, WIDTH//2, HEIGHT-40, (255, 50, 50))
-        
-        # Menu de pausa sobreposto
-        if pause_menu:
-            # Semi-transparência sobre o jogo
-            overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, 180))
-            screen.blit(overlay, (0, 0))
-            
-            draw_text(screen, "⏸️ JOGO PAUSADO", 60, WIDTH//2, 120)
-            
-            for i, opt in enumerate(pause_options):
-                cor = (255, 255, 0) if i == pause_index else (200, 200, 200)
-                draw_text(screen, opt, 36, WIDTH//2, 220 + i*55, cor)
-            
-            draw_text(screen, "Use ↑↓ para navegar, ENTER para selecionar", 22, WIDTH//2, HEIGHT-60)
-
-    elif game_state == "next_phase":
-        background.draw(screen, "asteroids")
-        if phase_state == "transition":
-            draw_text(screen, "🔄 PRÓXIMA FASE!", 60, WIDTH//2, HEIGHT//2 - 80)
-            draw_text(screen, "Os inimigos chegaram...", 40, WIDTH//2, HEIGHT//2)
-            draw_text(screen, "DESTRUAM ELES!" if two_player else "DESTRUA ELES!", 40, WIDTH//2, HEIGHT//2 + 60)
-        elif phase_state == "boss_transition":
-            draw_text(screen, "⚠️ ALERTA MÁXIMO!", 60, WIDTH//2, HEIGHT//2 - 80)
-            draw_text(screen, "CHEFÃO EM BREVE", 40, WIDTH//2, HEIGHT//2)
-            draw_text(screen, "Prepare-se para a batalha final!", 40, WIDTH//2, HEIGHT//2 + 60)
-
-    elif game_state == "victory":
-        background.draw(screen, "phase3")
-        draw_text(screen, "🎉 VITÓRIA!", 72, WIDTH//2, HEIGHT//2 - 100)
-        draw_text(screen, "Você derrotou o chefão e salvou a galáxia!", 36, WIDTH//2, HEIGHT//2)
-        draw_text(screen, f"Pontuação final: {player1.score + (player2.score if two_player else 0)}", 32, WIDTH//2, HEIGHT//2 + 50)
-        draw_text(screen, "Pressione ENTER ou ESC para voltar ao menu", 24, WIDTH//2, HEIGHT-50)
-
-    elif game_state == "game_over":
-        background.draw(screen, "asteroids")
-        draw_text(screen, "💀 GAME OVER", 72, WIDTH//2, HEIGHT//2 - 100)
-        
-        if two_player:
-            draw_text(screen, f"Pontuação final: {player1.score + player2.score}", 36, WIDTH//2, HEIGHT//2 - 20)
-        else:
-            draw_text(screen, f"Pontuação final: {player1.score}", 36, WIDTH//2, HEIGHT//2 - 20)
-        
-        draw_text(screen, "Pressione R para reiniciar ou ESC para sair", 28, WIDTH//2, HEIGHT//2 + 40)
-
-    pygame.display.flip()
-
-pygame.quit()
-sys.exit()
\ No newline at end of file
+# cosmic_descent_3d.py
+# VERSÃO ATUALIZADA COM CONTROLE DE VOLUME
+
+import time
+# Início do processo (antes do import do pygame): base do tempo até o primeiro frame
+STARTUP_T0 = time.perf_counter()
+
+import pygame
+import random
+import sys
+import os
+import json
+import math
+import struct
+import zlib
+import io
+import mmap
+import queue
+import threading
+import heapq
+from collections import OrderedDict, deque
+
+try:
+    import numpy as np
+except ImportError:  # opcional: só o modo "bullet storm" do chefão precisa
+    np = None
+
+WIDTH, HEIGHT = 1280, 720
+SCREEN_RECT = pygame.Rect(0, 0, WIDTH, HEIGHT)
+
+# ---------------- CONFIGURAÇÃO DE VOLUME ----------------
+# Arquivo para salvar configurações de volume
+VOLUME_CONFIG_FILE = os.path.join(os.path.dirname(__file__), "volume_config.json")
+
+# Configurações padrão de volume
+DEFAULT_VOLUMES = {
+    "master": 0.7,      # Volume geral
+    "music": 0.6,       # Músicas de fase
+    "effects": 0.8,     # Efeitos sonoros
+    "shoot": 0.7,       # Tiro
+    "explosion": 0.8,   # Explosão
+    "powerup": 0.4,     # Powerup (reduzido por padrão)
+    "respawn": 0.6      # Respawn
+}
+
+# Carregar ou criar configuração de volume
+def load_volume_config():
+    """Carrega as configurações de volume do arquivo, ou cria padrão"""
+    try:
+        if os.path.exists(VOLUME_CONFIG_FILE):
+            with open(VOLUME_CONFIG_FILE, "r") as f:
+                return json.load(f)
+    except Exception as e:
+        print(f"⚠ Erro ao carregar configuração de volume: {e}")
+    
+    # Se não existir, cria com valores padrão
+    save_volume_config(DEFAULT_VOLUMES)
+    return DEFAULT_VOLUMES.copy()
+
+def save_volume_config(volumes):
+    """Salva as configurações de volume no arquivo"""
+    try:
+        with open(VOLUME_CONFIG_FILE, "w") as f:
+            json.dump(volumes, f, indent=2)
+    except Exception as e:
+        print(f"⚠ Erro ao salvar configuração de volume: {e}")
+
+# Carregar configurações de volume
+VOLUME_CONFIG = load_volume_config()
+
+# Funções para aplicar volume
+def set_sound_volume(sound, sound_type):
+    """Define o volume de um efeito sonoro baseado no tipo"""
+    if sound and hasattr(sound, 'set_volume'):
+        # Aplica volume de efeitos e volume específico do som
+        volume = VOLUME_CONFIG.get("master", 1.0) * VOLUME_CONFIG.get("effects", 1.0)
+        if sound_type in VOLUME_CONFIG:
+            volume *= VOLUME_CONFIG.get(sound_type, 1.0)
+        sound.set_volume(min(volume, 1.0))  # Garante que não passe de 1.0
+
+def set_music_volume():
+    """Define o volume da música de fundo"""
+    volume = VOLUME_CONFIG.get("master", 1.0) * VOLUME_CONFIG.get("music", 1.0)
+    pygame.mixer.music.set_volume(min(volume, 1.0))
+
+# ---------------- ASSET CONFIG ----------------
+ASSET_CONFIG = {
+    "assets_dir": "assets",
+    "background_global": "blue-stars.png",
+
+    "planets_phase1": [
+        {"image": "saturn.png", "x": WIDTH - 550, "y": 40, "size": 420},
+        {"image": "terra.png", "x": 80, "y": HEIGHT - 420, "size": 360},
+    ],
+    "planets_phase2": [
+        {"image": "c3po.png", "x": WIDTH - 400, "y": 100, "size": 300},
+        {"image": "marte.png", "x": 150, "y": HEIGHT - 300, "size": 250},
+    ],
+    "planets_phase3": [
+        {"image": "plutao.png", "x": WIDTH//2 - 100, "y": 50, "size": 200},
+        {"image": "netuno.png", "x": WIDTH - 200, "y": HEIGHT - 200, "size": 150},
+    ],
+    # Camadas opcionais de parallax desenhadas sobre o fundo fixo
+    # ex: {"image": "estrelas_frente.png", "speed": 30}  (pixels por segundo, preto puro = transparente)
+    "parallax_layers": [],
+    "explosion_frames": ["01.png", "02.png", "03.png", "04.png", "05.png", "06.png"],
+    "players": {"player": "player.png", "size": (100, 70)},
+    "players_dead": {"player_dead": "player_dead.png", "size": (100, 70)},
+    "bullets": {"image": "bullert.png", "size": (12, 20)},
+    "meteors": {"default": "asteroid-1.png", "evil": "asteroid-2.png"},
+    "enemies": {"enemy_small": "skill04.png", "size": (64, 64)},
+    "boss": {"image": "skill06.png", "size": (220, 220)},
+    "sounds": {
+        "shoot": "shoot.mp3",
+        "explosion": "explosion.mp3",
+        "powerup": "powerup.mp3",
+        "respawn": "respawn.wav",
+        "music_phase1": "phase1.mp3",
+        "music_phase2": "phase2.mp3",
+        "music_phase3": "phase3.mp3"
+    },
+    "explosion_scale": (90, 90),
+    "player_default_color": (0, 120, 255),
+    "player_dead_color": (100, 100, 100, 150),
+    "max_meteors": 8,
+    "collision_cell_size": 64,      # célula da grade de colisão (tamanho dos meteoros/inimigos)
+    "pool_sizes": {"bullets": 256, "explosions": 32, "powerups": 16},  # instâncias pré-alocadas
+    "dirty_rendering": False,       # True = DirtyRenderer (display.update só nas áreas alteradas)
+    "meteor_rotation_steps": 120,   # quadros pré-rotacionados por tipo de meteoro
+    "player_fx_steps": 16,          # níveis de alpha pré-calculados para escudo e piscar do jogador morto
+    # Canais reservados por categoria de efeito: channels = vozes simultâneas, priority decide
+    # quem rouba canal quando tudo está ocupado, min_interval (ms) descarta o mesmo som repetido
+    "audio_channels": {
+        "shoot": {"channels": 4, "priority": 1, "min_interval": 40},
+        "explosion": {"channels": 6, "priority": 2, "min_interval": 30},
+        "powerup": {"channels": 2, "priority": 3, "min_interval": 0},
+        "respawn": {"channels": 1, "priority": 4, "min_interval": 0},
+    },
+    "audio_shared_channels": 3,     # canais extras disputados por prioridade entre as categorias
+    # Troca de música: a atual some durante a tela de transição e a próxima entra com fade
+    "music_fade_out": 2500,         # ms (a tela de transição dura 3000)
+    "music_fade_in": 1500,
+    "autosave": True,               # salva sozinho no início da fase 2 e da fase 3
+    "save_compress": True,          # save binário comprimido com zlib
+    # Volta no tempo: snapshot a cada interval ticks, últimos `seconds` segundos em memória
+    "rewind": {"enabled": True, "interval": 30, "seconds": 20, "keyframe_every": 10},
+    # Highscores: top_n por quadro; o log é compactado a cada compact_every registros novos
+    "highscores": {"top_n": 10, "compact_every": 50},
+    # Ataque "tempestade" do chefão (requer numpy): volley tiros a cada interval ms,
+    # speed em pixels por segundo, spin = graus de giro da espiral por rajada
+    "bullet_storm": {"enabled": False, "capacity": 10000, "volley": 64, "interval": 80, "speed": 220, "spin": 7},
+    # Simulação em passo fixo: tick_rate ticks por segundo, independente do FPS de desenho
+    "tick_rate": 60,
+    "render_fps": 60,               # 0 = sem limite
+    "max_frame_time": 0.25,         # segundos simulados no máximo por frame (evita espiral após travadas)
+    "points_to_next_phase": 1500,
+    "respawn_time": 5000,
+    "initial_lives": 3,
+    # Pacote gerado por --build-bundle (imagens já escaladas, em pixels crus); usado se existir
+    "asset_bundle": "assets.bundle",
+    # Atlas: imagens dos sprites copiadas para poucas folhas grandes (desenho em lote por folha)
+    "sprite_atlas": True,
+    "atlas_sheet_size": (1024, 1024)
+}
+
+ASSETS_DIR = os.path.join(os.path.dirname(__file__), ASSET_CONFIG["assets_dir"])
+SAVE_FILE = os.path.join(os.path.dirname(__file__), "savegame.sav")
+AUTOSAVE_FILE = os.path.join(os.path.dirname(__file__), "autosave.sav")   # autosave das fases (não sobrescreve o save manual)
+LEGACY_SAVE_FILE = os.path.join(os.path.dirname(__file__), "savegame.json")   # formato antigo (só leitura)
+HIGHSCORES_FILE = os.path.join(os.path.dirname(__file__), "highscores.json")   # formato antigo (importado uma vez)
+HIGHSCORES_LOG = os.path.join(os.path.dirname(__file__), "highscores.log")
+
+# ---------------- Asset Manager ----------------
+class AssetManager:
+    def __init__(self, assets_dir):
+        self.assets_dir = assets_dir
+        self._cache = {}
+        self._results = None
+        self._pending = 0
+        self._warmups = []
+        self._preload_total = 0
+        self._preload_done = 0
+        self._bundle = None
+        self._bundle_index = {}
+
+    def _path(self, name):
+        return os.path.join(self.assets_dir, name) if name else None
+
+    @staticmethod
+    def _key(kind, name, scale=None):
+        if kind == "image":
+            return f"img|{name}|{tuple(scale) if scale else None}"
+        return f"{'snd' if kind == 'sound' else 'mus'}|{name}"
+
+    def load_image(self, name, scale=None):
+        if not name:
+            return None
+        key = self._key("image", name, scale)
+        if key in self._cache:
+            return self._cache[key]
+        img = self._bundle_image(key)
+        if img is not None:
+            if pygame.display.get_surface() is not None:
+                img = img.convert_alpha()
+            self._cache[key] = img
+            return img
+        p = self._path(name)
+        if p and os.path.isfile(p):
+            try:
+                img = pygame.image.load(p)
+                # Sem display (modo headless) não dá para converter o formato
+                if pygame.display.get_surface() is not None:
+                    img = img.convert_alpha()
+                if scale:
+                    img = pygame.transform.scale(img, tuple(scale))
+                self._cache[key] = img
+                return img
+            except Exception:
+                return None
+        return None
+
+    def load_sound(self, name):
+        if not name:
+            return None
+        key = self._key("sound", name)
+        if key in self._cache:
+            return self._cache[key]
+        p = self._path(name)
+        data = self._bundle_bytes(key)
+        if data is not None or (p and os.path.isfile(p)):
+            try:
+                s = pygame.mixer.Sound(file=io.BytesIO(data)) if data is not None else pygame.mixer.Sound(p)
+                self._cache[key] = s
+                return s
+            except Exception:
+                return None
+        return None
+
+    def store_image(self, name, scale, surface):
+        """Substitui a imagem em cache (ex.: pela versão dentro do atlas)"""
+        self._cache[self._key("image", name, scale)] = surface
+
+    def music_bytes(self, name):
+        """Bytes da música já em memória (pré-carregamento ou pacote); None se exigir ler o disco"""
+        data = self._cache.get(self._key("music", name))
+        if data is None:
+            data = self._bundle_bytes(self._key("music", name))
+        return data
+
+    # ----- Pacote de assets -----
+    def open_bundle(self, path):
+        """Mapeia em memória o pacote de build_asset_bundle(); False se não existir ou for inválido"""
+        try:
+            with open(path, "rb") as f:
+                # ACCESS_COPY: páginas privadas, então escrever numa superfície não altera o arquivo
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        except (OSError, ValueError):
+            return False
+        # Pacote truncado ou corrompido: volta para os arquivos soltos em vez de abortar
+        try:
+            magic, version, index_len = BUNDLE_HEADER.unpack_from(mm)
+            if (magic != BUNDLE_MAGIC or version != BUNDLE_VERSION
+                    or BUNDLE_HEADER.size + index_len > len(mm)):
+                raise ValueError("cabeçalho inválido")
+            index = json.loads(mm[BUNDLE_HEADER.size:BUNDLE_HEADER.size + index_len])
+            # Entradas cujo arquivo de origem mudou depois do --build-bundle ficam de fora
+            # (voltam a ser lidas dos arquivos soltos)
+            stale = [key for key, entry in index.items() if self._bundle_stale(entry)]
+        except (struct.error, ValueError, TypeError, AttributeError):
+            mm.close()
+            return False
+        for key in stale:
+            del index[key]
+        if stale:
+            print(f"⚠ {len(stale)} assets do pacote estão desatualizados; usando os arquivos soltos "
+                  f"(gere de novo com --build-bundle)")
+        self._bundle_index = index
+        self._bundle_data = bundle_data_start(index_len)
+        self._bundle = mm
+        return True
+
+    def _bundle_stale(self, entry):
+        """True se o arquivo de origem existe e não bate com o tamanho/mtime gravados no pacote"""
+        name, src_size, src_mtime = entry[4:7]
+        try:
+            st = os.stat(self._path(name))
+        except OSError:
+            return False   # sem o arquivo solto, o pacote é a única cópia
+        return st.st_size != src_size or st.st_mtime_ns != src_mtime
+
+    def _bundle_view(self, key):
+        entry = self._bundle_index.get(key) if self._bundle is not None else None
+        if entry is None:
+            return None, None
+        offset, size, w, h = entry[:4]
+        start = self._bundle_data + offset
+        return memoryview(self._bundle)[start:start + size], (w, h)
+
+    def _bundle_image(self, key):
+        """Superfície apontando direto para os pixels do pacote (sem decodificar nem escalar)"""
+        view, size = self._bundle_view(key)
+        return pygame.image.frombuffer(view, size, "RGBA") if view is not None else None
+
+    def _bundle_bytes(self, key):
+        view, _ = self._bundle_view(key)
+        return view.tobytes() if view is not None else None
+
+    # ----- Pré-carregamento -----
+    def start_preload(self, manifest, warmups=()):
+        """Lê e decodifica o manifesto numa thread; a finalização (convert_alpha,
+        Sound, caches derivados) roda na thread principal em poll_preload()"""
+        entries = [e for e in manifest if self._key(*e) not in self._cache]
+        self._results = queue.Queue()
+        self._pending = len(entries)
+        self._warmups = list(warmups)
+        self._preload_total = len(entries) + len(self._warmups)
+        self._preload_done = 0
+        threading.Thread(target=self._preload_worker, args=(entries, self._results),
+                         name="asset-preload", daemon=True).start()
+
+    def _preload_worker(self, entries, results):
+        for kind, name, scale in entries:
+            data = None
+            key = self._key(kind, name, scale)
+            try:
+                if kind == "image":
+                    data = self._bundle_image(key)
+                    if data is None:
+                        data = pygame.image.load(self._path(name))
+                        if scale:
+                            data = pygame.transform.scale(data, tuple(scale))
+                else:
+                    data = self._bundle_bytes(key)
+                    if data is None:
+                        with open(self._path(name), "rb") as f:
+                            data = f.read()
+            except Exception:
+                data = None
+            results.put((kind, name, scale, data))
+
+    def _finalize(self, kind, name, scale, data):
+        if data is None:
+            return
+        if kind == "image":
+            if pygame.display.get_surface() is not None:
+                data = data.convert_alpha()
+        elif kind == "sound":
+            if not pygame.mixer.get_init():
+                return
+            try:
+                data = pygame.mixer.Sound(file=io.BytesIO(data))
+            except Exception:
+                return
+        self._cache[self._key(kind, name, scale)] = data
+
+    def _preload_step(self, block):
+        """Finaliza um item (ou roda uma tarefa de aquecimento); False se nada estava pronto"""
+        if self._pending:
+            try:
+                item = self._results.get(block=block)
+            except queue.Empty:
+                return False
+            self._pending -= 1
+            self._finalize(*item)
+        elif self._warmups:
+            self._warmups.pop(0)()
+        else:
+            return False
+        self._preload_done += 1
+        return True
+
+    def poll_preload(self, budget_ms=4.0):
+        """Finaliza o que a thread já decodificou, até budget_ms por chamada"""
+        deadline = time.perf_counter() + budget_ms / 1000.0
+        while not self.preload_finished() and time.perf_counter() < deadline:
+            if not self._preload_step(block=False):
+                break
+        return self.preload_finished()
+
+    def finish_preload(self):
+        """Espera e finaliza todo o pré-carregamento pendente (antes de começar a jogar)"""
+        while not self.preload_finished():
+            self._preload_step(block=True)
+
+    def preload_finished(self):
+        return not self._pending and not self._warmups
+
+    def preload_progress(self):
+        if not self._preload_total:
+            return 1.0
+        return self._preload_done / self._preload_total
+
+# Pacote: cabeçalho + índice JSON {chave do cache: [offset, tamanho, largura, altura]}
+# + dados alinhados em 16 bytes (imagens em RGBA cru, sons/músicas com os bytes originais)
+BUNDLE_MAGIC = b"NDAB"
+BUNDLE_VERSION = 2   # v2: cada entrada guarda nome, tamanho e mtime do arquivo de origem
+BUNDLE_HEADER = struct.Struct("<4sII")   # magic, versão, tamanho do índice
+
+def bundle_data_start(index_len):
+    return (BUNDLE_HEADER.size + index_len + 15) & ~15
+
+def bundle_path():
+    name = ASSET_CONFIG.get("asset_bundle")
+    return os.path.join(ASSETS_DIR, name) if name else None
+
+def build_asset_bundle(path=None):
+    """Gera o pacote com tudo do manifesto de pré-carregamento, já na escala final"""
+    path = path or bundle_path()
+    index, blobs, offset = {}, [], 0
+    for kind, name, scale in build_preload_manifest():
+        key = AssetManager._key(kind, name, scale)
+        src = os.path.join(ASSETS_DIR, name)
+        if key in index or not os.path.isfile(src):
+            continue
+        if kind == "image":
+            img = pygame.image.load(src)
+            if scale:
+                img = pygame.transform.scale(img, tuple(scale))
+            data = pygame.image.tobytes(img, "RGBA")
+            w, h = img.get_size()
+        else:
+            with open(src, "rb") as f:
+                data = f.read()
+            w = h = 0
+        st = os.stat(src)
+        index[key] = [offset, len(data), w, h, name, st.st_size, st.st_mtime_ns]
+        blobs.append(data)
+        offset = (offset + len(data) + 15) & ~15
+    index_bytes = json.dumps(index).encode()
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(BUNDLE_HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, len(index_bytes)))
+        f.write(index_bytes)
+        start = bundle_data_start(len(index_bytes))
+        for entry, data in zip(index.values(), blobs):
+            f.seek(start + entry[0])
+            f.write(data)
+    os.replace(tmp, path)
+    return path, len(index)
+
+ASSETS = AssetManager(ASSETS_DIR)
+
+# ---------------- Funções de Música ----------------
+class MusicController:
+    """Troca de música sem travar o loop principal.
+
+    prefetch() deixa os bytes da faixa em memória (lidos numa thread se ainda não
+    estiverem no cache); play() só agenda a troca, e update(), chamado a cada frame,
+    começa a nova faixa com fade-in quando ela está pronta e a anterior já sumiu.
+    """
+
+    PHASE_TRACKS = {"asteroids": "music_phase1", "phase2": "music_phase2", "phase3": "music_phase3"}
+
+    def __init__(self, fade_out_ms=2500, fade_in_ms=1500):
+        self.fade_out_ms = fade_out_ms
+        self.fade_in_ms = fade_in_ms
+        self.current = None
+        self._pending = None
+        self._fading = False
+        self._data = {}
+        self._loading = set()
+        self._stream = None
+
+    def track_for(self, phase_name):
+        key = self.PHASE_TRACKS.get(phase_name)
+        return ASSET_CONFIG.get("sounds", {}).get(key) if key else None
+
+    def prefetch(self, phase_name):
+        """Garante a faixa da fase em memória; devolve o nome do arquivo (ou None)"""
+        name = self.track_for(phase_name)
+        if not name or name in self._data or name in self._loading:
+            return name
+        data = ASSETS.music_bytes(name)
+        if data is not None:
+            self._data[name] = data
+        else:
+            self._loading.add(name)
+            threading.Thread(target=self._read, args=(name,), name="music-prefetch", daemon=True).start()
+        return name
+
+    def _read(self, name):
+        try:
+            with open(ASSETS._path(name), "rb") as f:
+                self._data[name] = f.read()
+        except OSError:
+            self._data[name] = b""
+        self._loading.discard(name)
+
+    def fade_out(self, ms=None):
+        if pygame.mixer.get_init() and pygame.mixer.music.get_busy() and not self._fading:
+            pygame.mixer.music.fadeout(self.fade_out_ms if ms is None else ms)
+            self._fading = True
+
+    def play(self, phase_name):
+        name = self.prefetch(phase_name)
+        if not name:
+            return
+        self._pending = name
+        self.fade_out(min(self.fade_out_ms, 500))   # troca sem tela de transição: fade curto
+        self.update()
+
+    def update(self):
+        if self._pending is None or not pygame.mixer.get_init():
+            return
+        data = self._data.get(self._pending)
+        if data is None or pygame.mixer.music.get_busy():
+            return   # ainda lendo o arquivo ou esperando o fade-out
+        name, self._pending = self._pending, None
+        self._fading = False
+        if not data:
+            return
+        try:
+            # O mixer lê do arquivo em memória enquanto toca: manter a referência viva
+            self._stream = io.BytesIO(data)
+            pygame.mixer.music.load(self._stream, os.path.splitext(name)[1].lstrip("."))
+            pygame.mixer.music.play(-1, fade_ms=self.fade_in_ms)
+            set_music_volume()  # Aplica volume atual
+            self.current = name
+        except Exception as e:
+            print(f"Erro ao trocar música: {e}")
+
+MUSIC = MusicController(ASSET_CONFIG.get("music_fade_out", 2500), ASSET_CONFIG.get("music_fade_in", 1500))
+
+def change_music(phase_name):
+    """Troca a música conforme a fase (sem bloquear: ver MusicController)"""
+    MUSIC.play(phase_name)
+
+# ---------------- Texto ----------------
+class TextRenderer:
+    """Cache de fontes por tamanho e LRU de textos já renderizados.
+
+    Campos numéricos que mudam todo frame (pontos, timers) usam glifos
+    pré-renderizados em vez de renderizar a string inteira de novo.
+    """
+    GLYPHS = "0123456789.-/:%s"
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._fonts = {}
+        self._surfaces = OrderedDict()
+        self._glyphs = {}
+
+    def font(self, size):
+        font = self._fonts.get(size)
+        if font is None:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            font = self._fonts[size] = pygame.font.Font(None, size)
+        return font
+
+    def render(self, text, size, color):
+        key = (text, size, color)
+        s = self._surfaces.get(key)
+        if s is not None:
+            self._surfaces.move_to_end(key)
+            return s
+        s = self.font(size).render(text, True, color)
+        self._surfaces[key] = s
+        if len(self._surfaces) > self.max_entries:
+            self._surfaces.popitem(last=False)
+        return s
+
+    def glyphs(self, size, color):
+        key = (size, color)
+        g = self._glyphs.get(key)
+        if g is None:
+            font = self.font(size)
+            g = self._glyphs[key] = {c: font.render(c, True, color) for c in self.GLYPHS}
+        return g
+
+    def draw_value(self, surf, label, value, size, x, y, color):
+        """Desenha label (cacheado) + valor composto de glifos, centralizado em x"""
+        glyphs = self.glyphs(size, color)
+        parts = [glyphs.get(c) for c in value]
+        if None in parts:
+            return draw_text(surf, label + value, size, x, y, color)
+        head = self.render(label, size, color)
+        width = head.get_width() + sum(p.get_width() for p in parts)
+        left = x - width // 2
+        blits = [(head, (left, y))]
+        left += head.get_width()
+        for p in parts:
+            blits.append((p, (left, y)))
+            left += p.get_width()
+        surf.blits(blits, doreturn=False)
+        return pygame.Rect(x - width // 2, y, width, head.get_height())
+
+TEXT = TextRenderer()
+
+# ---------------- Helpers ----------------
+def draw_text(surf, text, size, x, y, color=(255,255,255)):
+    s = TEXT.render(str(text), size, tuple(color))
+    r = s.get_rect()
+    r.midtop = (x, y)
+    surf.blit(s, r)
+    return r
+
+def draw_value(surf, label, value, size, x, y, color=(255,255,255)):
+    """Versão de draw_text para campos numéricos que mudam a cada frame"""
+    return TEXT.draw_value(surf, label, str(value), size, x, y, tuple(color))
+
+def draw_health_bar(surf, x, y, pct):
+    pct = max(0, pct)
+    BAR_LENGTH, BAR_HEIGHT = 250, 25
+    fill = (pct / 100) * BAR_LENGTH
+    outline_rect = pygame.Rect(x, y, BAR_LENGTH, BAR_HEIGHT)
+    fill_rect = pygame.Rect(x, y, fill, BAR_HEIGHT)
+    color = (0,200,0) if pct > 50 else (200,50,50)
+    pygame.draw.rect(surf, color, fill_rect)
+    return pygame.draw.rect(surf, (255,255,255), outline_rect, 2)
+
+def write_file_atomic(path, payload):
+    """Grava em path.tmp, força para o disco e troca pelo arquivo final"""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+# ---------------- Profiler ----------------
+class _NullSection:
+    """Seção vazia devolvida com o profiler desligado (custo quase zero)"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SECTION = _NullSection()
+
+class _Section:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, self.start, time.perf_counter())
+        return False
+
+class FrameProfiler:
+    """Tempo de cada etapa do loop principal, por frame.
+
+    Uso: begin_frame(); with PROFILER.section("etapa"): ...; end_frame(contagens).
+    Guarda janelas móveis para os percentis (p50/p95/p99) e o gráfico do
+    overlay, e o histórico completo para exportar em CSV ou trace do Chrome
+    (chrome://tracing / Perfetto).
+    """
+    GRAPH_SIZE = (300, 80)
+    FRAME_BUDGET_MS = 1000.0 / 60
+
+    def __init__(self, window=300, history_limit=200000):
+        self.enabled = False
+        self.visible = False
+        self.window = window
+        self.history_limit = history_limit
+        self.frame_times = deque(maxlen=window)
+        self.samples = {}           # etapa -> deque com os ms dos últimos frames
+        self.counts = {}
+        self.frames = 0
+        self.rows = []              # (frame, total_ms, {etapa: ms}) para o CSV
+        self.events = []            # (nome, início, fim) para o trace
+        self._current = {}
+        self._frame_start = None
+        self._origin = time.perf_counter()
+
+    def section(self, name):
+        if not self.enabled:
+            return _NULL_SECTION
+        return _Section(self, name)
+
+    def add(self, name, start, end):
+        self._current[name] = self._current.get(name, 0.0) + (end - start) * 1000.0
+        if len(self.events) < self.history_limit:
+            self.events.append((name, start, end))
+
+    def begin_frame(self):
+        if self.enabled:
+            self._current = {}
+            self._frame_start = time.perf_counter()
+
+    def end_frame(self, counts=None):
+        if not self.enabled or self._frame_start is None:
+            return
+        end = time.perf_counter()
+        total = (end - self._frame_start) * 1000.0
+        self.frames += 1
+        self.frame_times.append(total)
+        for name, ms in self._current.items():
+            q = self.samples.get(name)
+            if q is None:
+                q = self.samples[name] = deque(maxlen=self.window)
+            q.append(ms)
+        if counts is not None:
+            self.counts = counts
+        if len(self.rows) < self.history_limit:
+            self.rows.append((self.frames, total, self._current))
+            self.events.append(("frame", self._frame_start, end))
+        self._frame_start = None
+
+    @staticmethod
+    def percentiles(values, points=(50, 95, 99)):
+        if not values:
+            return tuple(0.0 for _ in points)
+        ordered = sorted(values)
+        last = len(ordered) - 1
+        return tuple(ordered[min(last, int(round(p / 100.0 * last)))] for p in points)
+
+    def stats(self):
+        """{"frame": {...}, "stages": {etapa: {"p50", "p95", "p99", "mean"}}, "counts": {...}}"""
+        def summary(values):
+            p50, p95, p99 = self.percentiles(values)
+            mean = sum(values) / len(values) if values else 0.0
+            return {"p50": p50, "p95": p95, "p99": p99, "mean": mean}
+        return {"frames": self.frames,
+                "frame": summary(self.frame_times),
+                "stages": {name: summary(q) for name, q in self.samples.items()},
+                "counts": dict(self.counts)}
+
+    def draw(self, surf, x=10, y=None):
+        """Overlay: percentis por etapa, contagem dos grupos e gráfico do tempo de frame
+        (y=None = canto inferior, longe do HUD)"""
+        st = self.stats()
+        lines = ["frame  p50 %.2f  p95 %.2f  p99 %.2f ms" % (st["frame"]["p50"], st["frame"]["p95"], st["frame"]["p99"])]
+        for name, s in sorted(st["stages"].items(), key=lambda kv: -kv[1]["p95"]):
+            lines.append("%-10s %.2f / %.2f / %.2f" % (name, s["p50"], s["p95"], s["p99"]))
+        if st["counts"]:
+            lines.append("  ".join(f"{k}:{v}" for k, v in st["counts"].items()))
+        gw, gh = self.GRAPH_SIZE
+        line_h = 16
+        panel = pygame.Surface((max(gw, 420) + 12, len(lines) * line_h + gh + 18), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+        for i, text in enumerate(lines):
+            panel.blit(TEXT.render(text, 18, (200, 255, 200)), (6, 4 + i * line_h))
+        # Gráfico: escala de 0 a 2x o orçamento de 60 FPS (linha amarela = 16.7 ms)
+        top = len(lines) * line_h + 10
+        scale = gh / (2 * self.FRAME_BUDGET_MS)
+        budget_y = top + gh - int(self.FRAME_BUDGET_MS * scale)
+        pygame.draw.line(panel, (255, 220, 0), (6, budget_y), (6 + gw, budget_y))
+        times = list(self.frame_times)[-gw:]
+        if len(times) > 1:
+            pts = [(6 + i, top + gh - int(min(t * scale, gh))) for i, t in enumerate(times)]
+            pygame.draw.lines(panel, (120, 200, 255), False, pts)
+        if y is None:
+            y = surf.get_height() - panel.get_height() - 10
+        surf.blit(panel, (x, y))
+        return pygame.Rect(x, y, panel.get_width(), panel.get_height())
+
+    def export(self, path):
+        """Exporta o histórico: .json = trace do Chrome, qualquer outra extensão = CSV"""
+        if path.lower().endswith(".json"):
+            self.export_chrome_trace(path)
+        else:
+            self.export_csv(path)
+
+    def export_csv(self, path):
+        stages = sorted({name for _, _, st in self.rows for name in st})
+        with open(path, "w") as f:
+            f.write(",".join(["frame", "total_ms"] + stages) + "\n")
+            for frame, total, st in self.rows:
+                f.write(",".join([str(frame), "%.4f" % total] + ["%.4f" % st.get(name, 0.0) for name in stages]) + "\n")
+
+    def export_chrome_trace(self, path):
+        origin = self._origin
+        events = [{"name": name, "ph": "X", "pid": 1, "tid": 1,
+                   "ts": (start - origin) * 1e6, "dur": (end - start) * 1e6}
+                  for name, start, end in self.events]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+PROFILER = FrameProfiler()
+
+# ---------------- Background ----------------
+class Background:
+    """Fundo de cada fase (estrelas + planetas) composto uma única vez.
+
+    Cada fase vira uma superfície opaca no formato do display, então o
+    desenho por frame é um único blit sem alpha (mais as camadas de parallax).
+    """
+    PLANETS_BY_PHASE = {"asteroids": "planets_phase1", "phase2": "planets_phase2", "phase3": "planets_phase3"}
+
+    def __init__(self):
+        self._composed = {}
+        self._parallax = None
+
+    def compose(self, phase_state):
+        key = self.PLANETS_BY_PHASE.get(phase_state, "")
+        cached = self._composed.get(key)
+        if cached is not None:
+            return cached
+
+        composed = pygame.Surface((WIDTH, HEIGHT))
+        img_name = ASSET_CONFIG.get("background_global", None)
+        img = ASSETS.load_image(img_name, scale=(WIDTH, HEIGHT)) if img_name else None
+
+        if img:
+            composed.blit(img, (0,0))
+        else:
+            composed.fill((0,0,0))
+
+        for p in ASSET_CONFIG.get(key, []) if key else []:
+            pi = ASSETS.load_image(p.get("image"), scale=(p.get("size"), p.get("size")))
+            if pi:
+                composed.blit(pi, (p.get("x"), p.get("y")))
+
+        if pygame.display.get_surface() is not None:
+            composed = composed.convert()
+        self._composed[key] = composed
+        return composed
+
+    def parallax_layers(self):
+        if self._parallax is None:
+            layers = []
+            for cfg in ASSET_CONFIG.get("parallax_layers", []):
+                img = ASSETS.load_image(cfg.get("image"), scale=(WIDTH, HEIGHT))
+                if not img:
+                    continue
+                # Camada com colorkey + RLE: os pixels pretos não custam nada no blit
+                layer = img.convert() if pygame.display.get_surface() is not None else img.copy()
+                layer.set_colorkey((0,0,0), pygame.RLEACCEL)
+                layers.append((layer, cfg.get("speed", 30)))
+            self._parallax = layers
+        return self._parallax
+
+    def draw(self, surf, phase_state="asteroids", now=0):
+        surf.blit(self.compose(phase_state), (0,0))
+        for layer, speed in self.parallax_layers():
+            offset = int(now * speed / 1000) % HEIGHT
+            surf.blit(layer, (0, offset))
+            if offset:
+                surf.blit(layer, (0, offset - HEIGHT))
+
+# ---------------- Atlas de texturas ----------------
+class TextureAtlas:
+    """Folhas grandes com várias imagens pequenas, empacotadas em prateleiras.
+
+    add() copia a imagem para a folha atual e devolve uma subsuperfície dela;
+    regions mapeia cada subsuperfície para (folha, área), usado pelo desenho em lote.
+    """
+
+    def __init__(self, sheet_size=(1024, 1024), padding=1):
+        self.sheet_size = tuple(sheet_size)
+        self.padding = padding
+        self.sheets = []
+        self.regions = {}
+        self._x = self._y = self._shelf_h = 0
+
+    def _new_sheet(self):
+        sheet = pygame.Surface(self.sheet_size, pygame.SRCALPHA)
+        if pygame.display.get_surface() is not None:
+            sheet = sheet.convert_alpha()
+        sheet.fill((0,0,0,0))
+        self.sheets.append(sheet)
+        self._x = self._y = self._shelf_h = 0
+        return sheet
+
+    def add(self, surface):
+        if surface in self.regions:
+            return surface
+        w, h = surface.get_size()
+        sw, sh = self.sheet_size
+        if w > sw or h > sh:
+            return surface   # grande demais: fica fora do atlas
+        if not self.sheets:
+            self._new_sheet()
+        if self._x + w > sw:
+            self._x = 0
+            self._y += self._shelf_h + self.padding
+            self._shelf_h = 0
+        if self._y + h > sh:
+            self._new_sheet()
+        sheet = self.sheets[-1]
+        # BLEND_RGBA_ADD sobre pixels zerados = cópia exata (blit normal misturaria o alpha)
+        sheet.blit(surface, (self._x, self._y), special_flags=pygame.BLEND_RGBA_ADD)
+        sub = sheet.subsurface((self._x, self._y, w, h))
+        self._x += w + self.padding
+        self._shelf_h = max(self._shelf_h, h)
+        self.register(sub)
+        return sub
+
+    def pack(self, surfaces):
+        """add() de uma lista (as mais altas primeiro, para aproveitar as prateleiras)"""
+        out = list(surfaces)
+        for i in sorted(range(len(out)), key=lambda i: -out[i].get_height()):
+            out[i] = self.add(out[i])
+        return out
+
+    def register(self, sub):
+        """Registra uma subsuperfície de uma folha já existente (ex.: folha dos powerups)"""
+        parent = sub.get_parent()
+        if parent is not None:
+            self.regions[sub] = (parent, pygame.Rect(sub.get_offset(), sub.get_size()))
+
+ATLAS = TextureAtlas(ASSET_CONFIG.get("atlas_sheet_size", (1024, 1024)))
+
+def build_sprite_atlas():
+    """Move as imagens dos sprites (já carregadas) para o atlas"""
+    if not ASSET_CONFIG.get("sprite_atlas", True):
+        return
+    cfg = ASSET_CONFIG
+    size = cfg.get("players", {}).get("size", (100,70))
+    images = [(cfg.get("players", {}).get("player"), size),
+              (cfg.get("players_dead", {}).get("player_dead"), size),
+              (cfg.get("bullets", {}).get("image"), cfg.get("bullets", {}).get("size", (12,20))),
+              (cfg.get("enemies", {}).get("enemy_small"), cfg.get("enemies", {}).get("size", (64,64))),
+              (cfg.get("boss", {}).get("image"), cfg.get("boss", {}).get("size", (220,220)))]
+    images += [(name, cfg.get("explosion_scale")) for name in cfg.get("explosion_frames", [])]
+    for name, scale in images:
+        img = ASSETS.load_image(name, scale=scale) if name else None
+        if img is not None:
+            ASSETS.store_image(name, scale, ATLAS.add(img))
+
+class BatchedRenderUpdates(pygame.sprite.RenderUpdates):
+    """RenderUpdates que desenha todos os sprites com um único Surface.blits.
+
+    Imagens que estão no atlas são desenhadas a partir da folha com a área de
+    origem; as demais (ex.: imagens do jogador geradas a cada frame) vão direto.
+    Os retângulos devolvidos seguem a mesma regra do RenderUpdates.draw.
+    """
+
+    def draw(self, surface, bgsurf=None, special_flags=0):
+        sprites = self.sprites()
+        regions = ATLAS.regions
+        batch = []
+        for spr in sprites:
+            region = regions.get(spr.image)
+            if region is not None:
+                batch.append((region[0], spr.rect, region[1], special_flags))
+            else:
+                batch.append((spr.image, spr.rect, None, special_flags))
+        new_rects = surface.blits(batch)
+
+        spritedict = self.spritedict
+        dirty = self.lostsprites
+        self.lostsprites = []
+        for spr, new_rect in zip(sprites, new_rects):
+            old_rect = spritedict[spr]
+            if old_rect:
+                if new_rect.colliderect(old_rect):
+                    dirty.append(new_rect.union(old_rect))
+                else:
+                    dirty.append(new_rect)
+                    dirty.append(old_rect)
+            else:
+                dirty.append(new_rect)
+            spritedict[spr] = new_rect
+        return dirty
+
+# ---------------- Sprites ----------------
+class SubpixelMotion:
+    """Movimento com velocidades em pixels por segundo sobre rects inteiros:
+    a fração que sobra em um tick é guardada e somada no próximo"""
+    _fx = 0.0
+    _fy = 0.0
+
+    def move(self, dx, dy):
+        fx = self._fx + dx
+        fy = self._fy + dy
+        ix, iy = int(fx), int(fy)
+        self._fx, self._fy = fx - ix, fy - iy
+        self.rect.move_ip(ix, iy)
+
+def _with_alpha(surface, alpha):
+    """Cópia com o alpha multiplicado nos pixels (pode ir para o atlas, ao contrário de set_alpha)"""
+    out = surface.copy()
+    out.fill((255, 255, 255, alpha), special_flags=pygame.BLEND_RGBA_MULT)
+    return out
+
+# Cache dos quadros do jogador: (imagem ou cor, imagem morta, tamanho, passos) -> quadros.
+# Cada reset() cria Players novos; sem o cache, cada um assaria e empacotaria tudo de novo no ATLAS
+PLAYER_FRAMES = {}
+def bake_player_frames(normal, dead, steps):
+    """Todos os estados visuais do jogador, gerados uma vez por combinação de imagens.
+
+    shield[i] e dead_blink[i] cobrem alpha de 0 a 255 em `steps` níveis;
+    o Player escolhe o quadro pelo índice em vez de compor a imagem a cada frame.
+    """
+    w, h = normal.get_size()
+    frames = {"normal": normal, "dead": _with_alpha(dead, 180),
+              "flicker": _with_alpha(normal, 70)}
+
+    glow = pygame.Surface((w, h), pygame.SRCALPHA)
+    pygame.draw.rect(glow, (255, 255, 100, 30), glow.get_rect(), border_radius=10)
+    upgraded = normal.copy()
+    upgraded.blit(glow, (0,0), special_flags=pygame.BLEND_ALPHA_SDL2)
+    frames["upgraded"] = upgraded
+
+    shield_size = (w + 20, h + 20)
+    shield = []
+    for i in range(steps):
+        ring = pygame.Surface(shield_size, pygame.SRCALPHA)
+        pygame.draw.circle(ring, (100, 200, 255, i * 255 // steps),
+                           (shield_size[0]//2, shield_size[1]//2), min(shield_size)//2, 3)
+        combined = normal.copy()
+        combined.blit(ring, ring.get_rect(center=(w//2, h//2)), special_flags=pygame.BLEND_ALPHA_SDL2)
+        shield.append(combined)
+    frames["shield"] = shield
+    frames["dead_blink"] = [_with_alpha(dead, i * 255 // (steps - 1)) for i in range(steps)]
+
+    if ASSET_CONFIG.get("sprite_atlas", True):
+        names = ["normal", "dead", "flicker", "upgraded"]
+        packed = ATLAS.pack([frames[n] for n in names] + shield + frames["dead_blink"])
+        frames.update(zip(names, packed))
+        frames["shield"] = packed[len(names):len(names) + steps]
+        frames["dead_blink"] = packed[len(names) + steps:]
+    return frames
+
+class Player(SubpixelMotion, pygame.sprite.Sprite):
+    def __init__(self, session, x, y, controls, color=None, name="PLAYER", player_num=1):
+        super().__init__()
+        self.session = session
+        self.player_num = player_num
+        color = color if color is not None else ASSET_CONFIG.get("player_default_color", (0,120,255))
+        p_cfg = ASSET_CONFIG.get("players", {})
+        dead_cfg = ASSET_CONFIG.get("players_dead", {})
+        
+        img_name = p_cfg.get("player")
+        size = tuple(p_cfg.get("size", (100,70)))
+        img = ASSETS.load_image(img_name, scale=size) if img_name else None
+        
+        dead_img_name = dead_cfg.get("player_dead")
+        dead_img = ASSETS.load_image(dead_img_name, scale=size) if dead_img_name else None
+        
+        if img:
+            self.normal_image = img
+        else:
+            surf = pygame.Surface(size, pygame.SRCALPHA)
+            pygame.draw.polygon(surf, color, [(size[0]//2,0),(size[0]//6,size[1]),(5*size[0]//6,size[1])])
+            self.normal_image = surf
+        
+        if dead_img:
+            self.dead_image = dead_img
+        else:
+            dead_surf = pygame.Surface(size, pygame.SRCALPHA)
+            dead_color = ASSET_CONFIG.get("player_dead_color", (100, 100, 100, 150))
+            pygame.draw.polygon(dead_surf, dead_color, [(size[0]//2,0),(size[0]//6,size[1]),(5*size[0]//6,size[1])])
+            pygame.draw.line(dead_surf, (200, 50, 50, 200), (10, 10), (size[0]-10, size[1]-10), 3)
+            pygame.draw.line(dead_surf, (200, 50, 50, 200), (size[0]-10, 10), (10, size[1]-10), 3)
+            self.dead_image = dead_surf
+        
+        self.fx_steps = max(2, ASSET_CONFIG.get("player_fx_steps", 16))
+        key = (img_name if img else tuple(color), dead_img_name if dead_img else None, size, self.fx_steps)
+        self.frames = PLAYER_FRAMES.get(key)
+        if self.frames is None:
+            self.frames = PLAYER_FRAMES[key] = bake_player_frames(self.normal_image, self.dead_image, self.fx_steps)
+        self.image = self.frames["normal"]
+        self.rect = self.image.get_rect(center=(x,y))
+        self.controls = controls
+        self.speed = 360           # pixels por segundo
+        self.mouse_follow = 0.35   # fração da distância ao mouse percorrida por tick de 60 Hz
+        self.health = 100
+        self.max_health = 100
+        self.score = 0
+        self.shoot_delay = 300
+        self.last_shot = -self.shoot_delay
+        self.extra_guns = 0
+        self.teleport_ability = False
+        self.invulnerable_until = 0
+        self.has_shield = False
+        self.shield_time = 0
+        self.mouse_control = False
+        self.name = name
+        
+        # Sistema de vidas e respawn
+        self.lives = ASSET_CONFIG.get("initial_lives", 3)
+        self.is_alive = True
+        self.respawn_timer = 0
+        self.respawn_time = ASSET_CONFIG.get("respawn_time", 5000)
+        self.respawn_blink = 0
+        self.respawn_blink_speed = 6.0   # radianos por segundo
+        
+        # Temporizadores para powerups temporários
+        self.upgrade_end_time = 0
+        self.shield_end_time = 0
+        
+        # Efeitos visuais
+        self.shield_alpha = 0
+        self.is_upgraded = False
+
+    def update(self, session):
+        dt = session.dt
+        if not self.is_alive:
+            now = session.now()
+            
+            self.respawn_blink += self.respawn_blink_speed * dt
+            
+            if self.respawn_timer and now < self.respawn_timer:
+                blink = (math.sin(self.respawn_blink) + 1) * 0.5
+                self.image = self.frames["dead_blink"][int(blink * (self.fx_steps - 1) + 0.5)]
+            else:
+                self.image = self.frames["dead"]
+            return
+        
+        keys = session.inputs.get(self.player_num, NO_INPUT)
+        step = self.speed * dt
+        dx = dy = 0.0
+        if keys['left']:
+            dx -= step
+        if keys['right']:
+            dx += step
+        if keys['up']:
+            dy -= step
+        if keys['down']:
+            dy += step
+        if self.mouse_control and keys.get('mouse'):
+            mx,my = keys['mouse']
+            follow = 1.0 - (1.0 - self.mouse_follow) ** (dt * 60)
+            dx += (mx - self.rect.centerx) * follow
+            dy += (my - self.rect.centery) * follow
+        self.move(dx, dy)
+        self.rect.clamp_ip(SCREEN_RECT)
+        
+        now = session.now()
+        
+        if self.upgrade_end_time and now > self.upgrade_end_time:
+            self.extra_guns = 0
+            self.upgrade_end_time = 0
+            self.is_upgraded = False
+        
+        if self.shield_end_time and now > self.shield_end_time:
+            self.has_shield = False
+            self.shield_end_time = 0
+            self.shield_alpha = 0
+        
+        if self.invulnerable_until and now > self.invulnerable_until:
+            self.invulnerable_until = 0
+        
+        if self.has_shield:
+            self.shield_alpha = (self.shield_alpha + 600 * dt) % 255
+            self.image = self.frames["shield"][int(self.shield_alpha * self.fx_steps / 255) % self.fx_steps]
+        elif self.invulnerable_until and (now // 100) % 2:
+            self.image = self.frames["flicker"]   # pisca a 5 Hz enquanto invulnerável
+        elif self.is_upgraded:
+            self.image = self.frames["upgraded"]
+        else:
+            self.image = self.frames["normal"]
+
+    def shoot(self):
+        if not self.is_alive:
+            return None
+            
+        now = self.session.now()
+        if now - self.last_shot >= self.shoot_delay:
+            self.last_shot = now
+            bullets_out = []
+            bullets_out.append(BULLET_POOL.acquire(self.rect.centerx, self.rect.top, speed=PLAYER_BULLET_SPEED, owner="player"))
+            
+            if self.extra_guns >= 1:
+                bullets_out.append(BULLET_POOL.acquire(self.rect.left+10, self.rect.centery, speed=PLAYER_BULLET_SPEED, owner="player"))
+                bullets_out.append(BULLET_POOL.acquire(self.rect.right-10, self.rect.centery, speed=PLAYER_BULLET_SPEED, owner="player"))
+            return bullets_out
+        return None
+
+    def take_damage(self, amount):
+        if not self.is_alive:
+            return False
+            
+        now = self.session.now()
+        if self.invulnerable_until and now < self.invulnerable_until:
+            return False
+        if self.has_shield:
+            return False
+            
+        self.health -= amount
+        if self.health <= 0:
+            self.die()
+        return True
+
+    def die(self):
+        self.health = 0
+        self.is_alive = False
+        self.lives -= 1
+        
+        self.extra_guns = 0
+        self.upgrade_end_time = 0
+        self.is_upgraded = False
+        self.has_shield = False
+        self.shield_end_time = 0
+        self.invulnerable_until = 0
+        self.teleport_ability = False
+        
+        return True
+
+    def respawn(self):
+        """Player ressuscita"""
+        self.is_alive = True
+        self.health = self.max_health // 2
+        self.respawn_timer = 0
+        
+        safe_x = WIDTH // 2 if self.player_num == 1 else WIDTH // 4
+        self.rect.center = (safe_x, HEIGHT - 120)
+        
+        self.invulnerable_until = self.session.now() + 3000
+        
+        # Aplica volume no som de respawn
+        self.session.play_sound(respawn_snd, "respawn")
+        return True
+
+    def teleport(self):
+        if not self.is_alive or not self.teleport_ability:
+            return False
+        self.rect.centerx = self.session.rng.randint(80, WIDTH-80)
+        self.rect.centery = self.session.rng.randint(80, HEIGHT-160)
+        self.invulnerable_until = self.session.now() + 3000
+        self.teleport_ability = False
+        return True
+    
+    def activate_upgrade(self, duration=15000):
+        if not self.is_alive:
+            return
+        self.extra_guns = 1
+        self.upgrade_end_time = self.session.now() + duration
+        self.is_upgraded = True
+    
+    def activate_shield(self, duration=8000):
+        if not self.is_alive:
+            return
+        self.has_shield = True
+        self.shield_end_time = self.session.now() + duration
+    
+    def activate_invulnerability(self, duration=5000):
+        if not self.is_alive:
+            return
+        self.invulnerable_until = self.session.now() + duration
+
+# ---------------- Pools de sprites ----------------
+class SpritePool:
+    """Reaproveita instâncias de sprites de vida curta (tiros, explosões, powerups).
+
+    acquire() devolve uma instância livre reinicializada com reset(); kill()
+    do sprite devolve a instância ao pool. hits/misses/high_water servem
+    para ajustar a capacidade pré-alocada (ver pool_stats).
+    """
+
+    def __init__(self, cls, capacity=0):
+        self.cls = cls
+        self.capacity = capacity
+        self._free = []
+        self.hits = 0
+        self.misses = 0
+        self.live = 0
+        self.high_water = 0
+
+    def _new(self, *args, **kwargs):
+        obj = self.cls(*args, **kwargs)
+        obj.pool = self
+        return obj
+
+    def prefill(self, *args, **kwargs):
+        """Pré-aloca instâncias até a capacidade configurada"""
+        while len(self._free) + self.live < self.capacity:
+            obj = self._new(*args, **kwargs)
+            obj.in_pool = True
+            self._free.append(obj)
+
+    def acquire(self, *args, **kwargs):
+        if self._free:
+            obj = self._free.pop()
+            obj.reset(*args, **kwargs)
+            self.hits += 1
+        else:
+            obj = self._new(*args, **kwargs)
+            self.misses += 1
+        obj.in_pool = False
+        self.live += 1
+        if self.live > self.high_water:
+            self.high_water = self.live
+        return obj
+
+    def release(self, obj):
+        if obj.in_pool:
+            return
+        obj.in_pool = True
+        self.live -= 1
+        self._free.append(obj)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "live": self.live,
+                "free": len(self._free), "high_water": self.high_water, "capacity": self.capacity}
+
+class PooledSprite(pygame.sprite.Sprite):
+    pool = None
+    in_pool = False
+
+    def kill(self):
+        super().kill()
+        if self.pool is not None:
+            self.pool.release(self)
+
+# Velocidades em pixels por segundo (negativo = para cima)
+PLAYER_BULLET_SPEED = -1440
+
+class Bullet(SubpixelMotion, PooledSprite):
+    _fallback_images = {}
+
+    def __init__(self, x, y, speed=PLAYER_BULLET_SPEED, owner="player"):
+        super().__init__()
+        self.reset(x, y, speed, owner)
+
+    @classmethod
+    def image_for(cls, owner):
+        bcfg = ASSET_CONFIG.get("bullets", {})
+        img_name = bcfg.get("image")
+        size = tuple(bcfg.get("size", (12,20)))
+        img = ASSETS.load_image(img_name, scale=size) if img_name else None
+        if img:
+            return img
+        surf = cls._fallback_images.get(owner)
+        if surf is None:
+            surf = pygame.Surface(size, pygame.SRCALPHA)
+            c = (255,0,0) if owner=="enemy" else (255,255,0)
+            pygame.draw.rect(surf, c, (0,0,size[0],size[1]))
+            cls._fallback_images[owner] = surf
+        return surf
+
+    def reset(self, x, y, speed=PLAYER_BULLET_SPEED, owner="player"):
+        self.image = self.image_for(owner)
+        self.rect = self.image.get_rect(center=(x,y))
+        self.speed = speed
+        self.speedx = 0
+        self.owner = owner
+        self._fx = self._fy = 0.0
+
+    def update(self, session):
+        dt = session.dt
+        self.move(self.speedx * dt, self.speed * dt)
+        if self.rect.bottom < 0 or self.rect.top > HEIGHT or self.rect.right < 0 or self.rect.left > WIDTH:
+            self.kill()
+
+# Cache de rotações dos meteoros: (imagem, passos) -> (quadros, tamanhos)
+METEOR_ROTATIONS = {}
+def load_meteor_rotations(img_name):
+    """Pré-calcula os quadros rotacionados de uma imagem de meteoro (uma vez por imagem)"""
+    steps = max(1, ASSET_CONFIG.get("meteor_rotation_steps", 120))
+    key = (img_name, steps)
+    if key in METEOR_ROTATIONS:
+        return METEOR_ROTATIONS[key]
+    size = (64,64)
+    img = ASSETS.load_image(img_name, scale=size) if img_name else None
+    if img:
+        base = img
+    else:
+        base = pygame.Surface(size, pygame.SRCALPHA)
+        pygame.draw.circle(base, (120,120,120), (size[0]//2, size[1]//2), 30)
+    frames = [base] + [pygame.transform.rotate(base, i * 360.0 / steps) for i in range(1, steps)]
+    if ASSET_CONFIG.get("sprite_atlas", True):
+        frames = ATLAS.pack(frames)
+    sizes = [f.get_size() for f in frames]
+    METEOR_ROTATIONS[key] = (frames, sizes)
+    return frames, sizes
+
+class Meteor(SubpixelMotion, pygame.sprite.Sprite):
+    # speedx/speedy em pixels por segundo, rot_speed em graus por segundo
+    SPEED_UNIT = 120
+    def __init__(self, kind="default", x=None, y=None, rng=random):
+        super().__init__()
+        self.rng = rng
+        mcfg = ASSET_CONFIG.get("meteors", {})
+        img_name = mcfg.get(kind, mcfg.get("default"))
+        self.frames, self.frame_sizes = load_meteor_rotations(img_name)
+        self.frame_index = 0
+        self.base = self.frames[0]
+        self.image = self.base
+        
+        # CORREÇÃO: Melhor inicialização de posição
+        if x is not None and y is not None:
+            self.rect = self.image.get_rect(center=(x, y))
+        else:
+            self.rect = self.image.get_rect(center=(self.rng.randint(40, WIDTH-40), self.rng.randint(-300, -40)))
+        
+        unit = self.SPEED_UNIT
+        if kind == "evil":
+            self.speedy = self.rng.randint(1,3) * unit
+            self.damage = 40
+        else:
+            self.speedy = self.rng.randint(1,2) * unit
+            self.damage = 20
+        self.speedx = self.rng.randint(-2,2) * unit
+        self.rot = 0
+        self.rot_speed = self.rng.randint(-5,5) * unit
+        self.kind = kind
+
+    def update(self, session):
+        dt = session.dt
+        self.move(self.speedx * dt, self.speedy * session.speed_mult * dt)
+        self.rot = (self.rot + self.rot_speed * dt) % 360
+        # Rotação vira consulta ao cache: só troca o quadro quando o ângulo quantizado muda
+        idx = int(self.rot) * len(self.frames) // 360
+        if idx != self.frame_index:
+            self.frame_index = idx
+            self.image = self.frames[idx]
+            center = self.rect.center
+            self.rect.size = self.frame_sizes[idx]
+            self.rect.center = center
+        if self.rect.top > HEIGHT or self.rect.right < 0 or self.rect.left > WIDTH:
+            self.respawn()
+
+    def respawn(self):
+        self.rect.x = self.rng.randint(0, WIDTH-40)
+        self.rect.y = self.rng.randint(-220, -40)
+        unit = self.SPEED_UNIT
+        if self.kind == "evil":
+            self.speedy = self.rng.randint(1,3) * unit
+        else:
+            self.speedy = self.rng.randint(1,2) * unit
+        self.speedx = self.rng.randint(-2,2) * unit
+        self.rot_speed = self.rng.randint(-5,5) * unit
+
+class EnemyShip(pygame.sprite.Sprite):
+    def __init__(self, session, x, y):
+        super().__init__()
+        self.session = session
+        enx = ASSET_CONFIG.get("enemies", {})
+        img = ASSETS.load_image(enx.get("enemy_small"), scale=tuple(enx.get("size", (64,64)))) if enx.get("enemy_small") else None
+        if img:
+            self.image = img
+        else:
+            size = tuple(enx.get("size", (64,64)))
+            surf = pygame.Surface(size, pygame.SRCALPHA)
+            pygame.draw.polygon(surf, (180,80,40), [(size[0]//2,0),(0,size[1]),(size[0],size[1])])
+            self.image = surf
+        self.rect = self.image.get_rect(center=(x,y))
+        self.health = 3
+        self.shoot_delay = 900 + self.session.rng.randint(-200,200)
+        self.last_shot = -self.shoot_delay
+        self.fire_speed = 720
+        self.move_timer = session.now()
+
+    def update(self, session):
+        t = session.now()
+        if t - self.move_timer > 1200:
+            self.move_timer = t
+            self.rect.x += self.session.rng.choice([-40,-20,0,20,40])
+            self.rect.clamp_ip(SCREEN_RECT)
+
+    def aim_and_shoot(self, target):
+        if not target:
+            return
+        now = self.session.now()
+        if now - self.last_shot >= self.shoot_delay:
+            self.last_shot = now
+            bx = self.rect.centerx
+            by = self.rect.bottom
+            b = BULLET_POOL.acquire(bx, by, speed=self.fire_speed, owner="enemy")
+            self.session.add_bullet(b)
+
+    def take_damage(self, amount=1):
+        self.health -= amount
+        return self.health <= 0
+
+class Boss(SubpixelMotion, pygame.sprite.Sprite):
+    def __init__(self, session, x, y):
+        super().__init__()
+        self.session = session
+        bcfg = ASSET_CONFIG.get("boss", {})
+        img = ASSETS.load_image(bcfg.get("image"), scale=tuple(bcfg.get("size", (220,220)))) if bcfg.get("image") else None
+        if img:
+            self.image = img
+        else:
+            size = tuple(bcfg.get("size", (220,220)))
+            surf = pygame.Surface(size, pygame.SRCALPHA)
+            pygame.draw.circle(surf, (150,30,200), (size[0]//2, size[1]//2), min(size)//2)
+            pygame.draw.circle(surf, (255,200,255), (size[0]//2, size[1]//2), min(size)//2, 6)
+            self.image = surf
+        self.rect = self.image.get_rect(center=(x,y))
+        self.health = 80
+        self.shoot_delay = 1500
+        self.last_shot = -self.shoot_delay
+        self.move_dir = 1
+        self.speed = 240
+        self.attack_mode = "normal"
+        self.attack_timer = session.now()
+        self.attack_duration = 5000
+        self.storm_angle = 0.0
+
+    def update(self, session):
+        self.move(self.speed * self.move_dir * session.dt, 0)
+        if self.rect.right > WIDTH - 100:
+            self.move_dir = -1
+        elif self.rect.left < 100:
+            self.move_dir = 1
+        
+        now = session.now()
+        if now - self.attack_timer > self.attack_duration:
+            self.attack_timer = now
+            modes = ["normal", "spread", "rapid"]
+            if session.projectiles is not None:
+                modes.append("storm")
+            if self.attack_mode == "storm":
+                self.shoot_delay = 1500
+            self.attack_mode = session.rng.choice(modes)
+
+    def shoot(self):
+        now = self.session.now()
+        if now - self.last_shot > self.shoot_delay:
+            self.last_shot = now
+            
+            if self.attack_mode == "normal":
+                for off in (-40, 0, 40):
+                    b = BULLET_POOL.acquire(self.rect.centerx + off, self.rect.bottom, speed=960, owner="enemy")
+                    self.session.add_bullet(b)
+            
+            elif self.attack_mode == "spread":
+                angles = [-30, -15, 0, 15, 30]
+                for angle in angles:
+                    b = BULLET_POOL.acquire(self.rect.centerx, self.rect.bottom, speed=960, owner="enemy")
+                    b.speedx = angle * 24
+                    self.session.add_bullet(b)
+            
+            elif self.attack_mode == "rapid":
+                self.shoot_delay = 300
+                b = BULLET_POOL.acquire(self.rect.centerx, self.rect.bottom, speed=1200, owner="enemy")
+                self.session.add_bullet(b)
+
+            elif self.attack_mode == "storm":
+                # Espiral em anel: uma rajada inteira vai para o ProjectileField de uma vez
+                storm = ASSET_CONFIG["bullet_storm"]
+                self.shoot_delay = storm.get("interval", 80)
+                self.storm_angle = (self.storm_angle + storm.get("spin", 7)) % 360
+                n = storm.get("volley", 64)
+                ang = np.radians(self.storm_angle + np.arange(n) * (360.0 / n))
+                speed = storm.get("speed", 220)
+                self.session.projectiles.spawn(self.rect.centerx, self.rect.centery,
+                                               np.cos(ang) * speed, np.sin(ang) * speed)
+            else:
+                self.shoot_delay = 1500
+
+# Explosion frames load
+EXPLOSION_FRAMES = []
+EXPLOSION_LOADED = False
+def load_explosion_frames():
+    global EXPLOSION_FRAMES, EXPLOSION_LOADED
+    if EXPLOSION_LOADED:
+        return
+    EXPLOSION_LOADED = True
+    frames = []
+    for name in ASSET_CONFIG.get("explosion_frames", []):
+        img = ASSETS.load_image(name, scale=ASSET_CONFIG.get("explosion_scale"))
+        if img:
+            frames.append(img)
+    EXPLOSION_FRAMES = frames
+
+class Explosion(PooledSprite):
+    _empty_image = None
+
+    def __init__(self, center, now=0):
+        super().__init__()
+        self.reset(center, now)
+
+    def reset(self, center, now=0):
+        load_explosion_frames()
+        if EXPLOSION_FRAMES:
+            self.frames = EXPLOSION_FRAMES
+            self.index = 0
+            self.image = self.frames[self.index]
+            self.rect = self.image.get_rect(center=center)
+            self.last = now
+            self.rate = 60
+            self._auto_kill = False
+        else:
+            if Explosion._empty_image is None:
+                Explosion._empty_image = pygame.Surface((2,2), pygame.SRCALPHA)
+            self.image = Explosion._empty_image
+            self.rect = self.image.get_rect(center=center)
+            self._auto_kill = True
+
+    def update(self, session):
+        if getattr(self, "_auto_kill", False):
+            self.kill()
+            return
+        now = session.now()
+        if now - self.last > self.rate:
+            self.last = now
+            self.index += 1
+            if self.index >= len(self.frames):
+                self.kill()
+            else:
+                self.image = self.frames[self.index]
+
+# Arte dos powerups: todos os tipos desenhados uma vez numa folha (sprite sheet)
+POWERUP_TYPES = ["revive", "invul_gift", "upgrade", "extra_life", "teleporter", "shield"]
+POWERUP_SIZE = 28
+POWERUP_FRAMES = []
+def draw_powerup_art(ptype, size=POWERUP_SIZE):
+    """Desenha o ícone de um tipo de powerup com o brilho ao redor"""
+    image = pygame.Surface((size, size), pygame.SRCALPHA)
+    
+    if ptype == "revive": 
+        color = (200, 30, 30)
+        pygame.draw.circle(image, color, (size//2, size//2), size//2)
+    elif ptype == "invul_gift": 
+        color = (30, 100, 200)
+        pygame.draw.rect(image, color, (0, 0, size, size), border_radius=5)
+    elif ptype == "upgrade": 
+        color = (220, 200, 30)
+        points = [(size//2, 2), (2, size-2), (size-2, size-2)]
+        pygame.draw.polygon(image, color, points)
+    elif ptype == "extra_life": 
+        color = (30, 200, 60)
+        pygame.draw.rect(image, color, (2, 2, size-4, size-4))
+    elif ptype == "teleporter": 
+        color = (180, 80, 180)
+        pygame.draw.circle(image, color, (size//2, size//2), size//3)
+    elif ptype == "shield":
+        color = (100, 200, 255)
+        pygame.draw.circle(image, color, (size//2, size//2), size//2, 3)
+    else: 
+        color = (255, 255, 255)
+        pygame.draw.rect(image, color, (0, 0, size, size))
+    
+    glow = pygame.Surface((size+4, size+4), pygame.SRCALPHA)
+    pygame.draw.rect(glow, (*color, 100), (0, 0, size+4, size+4), border_radius=7)
+    final_image = pygame.Surface((size+4, size+4), pygame.SRCALPHA)
+    final_image.blit(glow, (0, 0))
+    final_image.blit(image, (2, 2))
+    return final_image
+
+def load_powerup_frames():
+    """Monta a folha com os 6 tipos (+ genérico no fim) e devolve um quadro por índice"""
+    if POWERUP_FRAMES:
+        return POWERUP_FRAMES
+    cell = POWERUP_SIZE + 4
+    kinds = POWERUP_TYPES + [None]
+    sheet = pygame.Surface((cell * len(kinds), cell), pygame.SRCALPHA)
+    for i, ptype in enumerate(kinds):
+        sheet.blit(draw_powerup_art(ptype), (i * cell, 0))
+    if pygame.display.get_surface() is not None:
+        sheet = sheet.convert_alpha()
+    POWERUP_FRAMES.extend(sheet.subsurface((i * cell, 0, cell, cell)) for i in range(len(kinds)))
+    for frame in POWERUP_FRAMES:
+        ATLAS.register(frame)
+    return POWERUP_FRAMES
+
+# Tabela de seno para a flutuação dos powerups (evita math.sin por sprite por frame)
+SINE_LUT_SIZE = 256
+SINE_LUT = [math.sin(i * 2 * math.pi / SINE_LUT_SIZE) for i in range(SINE_LUT_SIZE)]
+SINE_LUT_MASK = SINE_LUT_SIZE - 1
+
+class Powerup(SubpixelMotion, PooledSprite):
+    def __init__(self, center, ptype="revive", rng=random):
+        super().__init__()
+        self.size = POWERUP_SIZE
+        self.float_speed = 0.05
+        self.fall_speed = 240      # pixels por segundo (a flutuação soma ±120)
+        # radianos/ms -> índices da tabela/ms
+        self.lut_speed = self.float_speed * SINE_LUT_SIZE / (2 * math.pi)
+        self.reset(center, ptype, rng)
+
+    def reset(self, center, ptype="revive", rng=random):
+        self.ptype = ptype
+        frames = load_powerup_frames()
+        self.frame_index = POWERUP_TYPES.index(ptype) if ptype in POWERUP_TYPES else len(frames) - 1
+        self.image = frames[self.frame_index]
+        self.rect = self.image.get_rect(center=center)
+        self._fx = self._fy = 0.0
+        self.float_offset = rng.random() * 3.14
+        self.lut_offset = int(self.float_offset * SINE_LUT_SIZE / (2 * math.pi))
+
+    def update(self, session):
+        wobble = SINE_LUT[(int(session.now() * self.lut_speed) + self.lut_offset) & SINE_LUT_MASK]
+        self.move(0, (self.fall_speed + wobble * self.fall_speed / 2) * session.dt)
+        if self.rect.top > HEIGHT:
+            self.kill()
+
+BULLET_POOL = SpritePool(Bullet, ASSET_CONFIG.get("pool_sizes", {}).get("bullets", 0))
+EXPLOSION_POOL = SpritePool(Explosion, ASSET_CONFIG.get("pool_sizes", {}).get("explosions", 0))
+POWERUP_POOL = SpritePool(Powerup, ASSET_CONFIG.get("pool_sizes", {}).get("powerups", 0))
+
+def prefill_pools():
+    """Pré-aloca os pools (precisa das imagens, chamar depois de init_display)"""
+    BULLET_POOL.prefill(0, 0)
+    EXPLOSION_POOL.prefill((0, 0))
+    POWERUP_POOL.prefill((0, 0))
+
+def pool_stats():
+    """Estatísticas dos pools para ajuste de capacidade"""
+    return {"bullets": BULLET_POOL.stats(), "explosions": EXPLOSION_POOL.stats(), "powerups": POWERUP_POOL.stats()}
+
+# ---------------- Sounds ----------------
+class AudioManager:
+    """Efeitos sonoros em grupos de canais reservados por categoria.
+
+    Cada categoria toca só nos seus canais (mais os compartilhados); com tudo
+    ocupado, a voz mais antiga de prioridade menor ou igual é interrompida, senão
+    o som é descartado. O mesmo som repetido em menos de min_interval ms também é
+    descartado. Os volumes só são recalculados quando a configuração muda.
+    """
+
+    def __init__(self, categories, shared=0):
+        self.categories = categories
+        self.shared_count = shared
+        self.sounds = {}     # categoria -> sons registrados
+        self._groups = {}    # categoria -> [[canal, prioridade, início], ...]
+        self._shared = []
+        self._last_play = {}
+        self.stats = {"played": 0, "rate_limited": 0, "stolen": 0, "dropped": 0}
+
+    def init_channels(self):
+        """Reserva os canais (precisa do mixer iniciado); Sound.play() avulso não os usa"""
+        if self._groups or not pygame.mixer.get_init():
+            return
+        total = sum(c.get("channels", 1) for c in self.categories.values()) + self.shared_count
+        pygame.mixer.set_num_channels(max(pygame.mixer.get_num_channels(), total))
+        pygame.mixer.set_reserved(total)
+        index = 0
+        for name, cfg in self.categories.items():
+            n = cfg.get("channels", 1)
+            self._groups[name] = [[pygame.mixer.Channel(i), 0, 0] for i in range(index, index + n)]
+            index += n
+        self._shared = [[pygame.mixer.Channel(i), 0, 0] for i in range(index, total)]
+
+    def register(self, category, sound):
+        sounds = self.sounds.setdefault(category, [])
+        if sound is None or sound in sounds:
+            return
+        sounds.append(sound)
+        set_sound_volume(sound, category)
+
+    def refresh_volumes(self, type_key=None):
+        """Reaplica o volume dos sons afetados por type_key (None = todos)"""
+        for category, sounds in self.sounds.items():
+            if type_key in (None, "master", "effects", category):
+                for sound in sounds:
+                    set_sound_volume(sound, category)
+
+    def play(self, category, sound):
+        if sound is None or not self._groups:
+            return None
+        cfg = self.categories.get(category, {})
+        now = pygame.time.get_ticks()
+        last = self._last_play.get(sound)
+        if last is not None and now - last < cfg.get("min_interval", 0):
+            self.stats["rate_limited"] += 1
+            return None
+
+        priority = cfg.get("priority", 0)
+        slots = self._groups.get(category, []) + self._shared
+        slot = next((s for s in slots if not s[0].get_busy()), None)
+        if slot is None:
+            victim = min(slots, key=lambda s: (s[1], s[2]), default=None)
+            if victim is None or victim[1] > priority:
+                self.stats["dropped"] += 1
+                return None
+            victim[0].stop()
+            self.stats["stolen"] += 1
+            slot = victim
+        slot[0].play(sound)
+        slot[1], slot[2] = priority, now
+        self._last_play[sound] = now
+        self.stats["played"] += 1
+        return slot[0]
+
+AUDIO = AudioManager(ASSET_CONFIG.get("audio_channels", {}), ASSET_CONFIG.get("audio_shared_channels", 0))
+
+# Os sons só podem ser carregados depois do pygame.init() (ver load_sounds)
+shoot_snd = None
+explosion_snd = None
+powerup_snd = None
+respawn_snd = None
+
+def load_sounds():
+    """Carrega os efeitos sonoros, reserva os canais e aplica os volumes iniciais"""
+    global shoot_snd, explosion_snd, powerup_snd, respawn_snd
+    if not pygame.mixer.get_init():
+        return
+    shoot_snd = ASSETS.load_sound(ASSET_CONFIG.get("sounds", {}).get("shoot"))
+    explosion_snd = ASSETS.load_sound(ASSET_CONFIG.get("sounds", {}).get("explosion"))
+    powerup_snd = ASSETS.load_sound(ASSET_CONFIG.get("sounds", {}).get("powerup"))
+    respawn_snd = ASSETS.load_sound(ASSET_CONFIG.get("sounds", {}).get("respawn"))
+
+    AUDIO.init_channels()
+    AUDIO.register("shoot", shoot_snd)
+    AUDIO.register("explosion", explosion_snd)
+    AUDIO.register("powerup", powerup_snd)  # Volume reduzido por padrão
+    AUDIO.register("respawn", respawn_snd)
+
+# ---------------- Pré-carregamento ----------------
+def build_preload_manifest():
+    """Tudo que o jogo carrega, derivado do ASSET_CONFIG: [(tipo, nome, escala)]"""
+    cfg = ASSET_CONFIG
+    manifest = []
+
+    def image(name, scale):
+        if name:
+            manifest.append(("image", name, tuple(scale) if scale else None))
+
+    image(cfg.get("background_global"), (WIDTH, HEIGHT))
+    for key in Background.PLANETS_BY_PHASE.values():
+        for p in cfg.get(key, []):
+            image(p.get("image"), (p.get("size"), p.get("size")))
+    for layer in cfg.get("parallax_layers", []):
+        image(layer.get("image"), (WIDTH, HEIGHT))
+    for name in cfg.get("explosion_frames", []):
+        image(name, cfg.get("explosion_scale"))
+    size = cfg.get("players", {}).get("size", (100,70))
+    image(cfg.get("players", {}).get("player"), size)
+    image(cfg.get("players_dead", {}).get("player_dead"), size)
+    image(cfg.get("bullets", {}).get("image"), cfg.get("bullets", {}).get("size", (12,20)))
+    for name in dict.fromkeys(cfg.get("meteors", {}).values()):
+        image(name, (64,64))
+    image(cfg.get("enemies", {}).get("enemy_small"), cfg.get("enemies", {}).get("size", (64,64)))
+    image(cfg.get("boss", {}).get("image"), cfg.get("boss", {}).get("size", (220,220)))
+    for key, name in cfg.get("sounds", {}).items():
+        if name:
+            manifest.append(("music" if key.startswith("music_") else "sound", name, None))
+    return manifest
+
+def preload_warmups(background):
+    """Tarefas da thread principal que montam os caches derivados das imagens"""
+    tasks = [build_sprite_atlas, load_explosion_frames, load_powerup_frames]
+    for name in dict.fromkeys(ASSET_CONFIG.get("meteors", {}).values()):
+        tasks.append(lambda name=name: load_meteor_rotations(name))
+    for phase in Background.PLANETS_BY_PHASE:
+        tasks.append(lambda phase=phase: background.compose(phase))
+    tasks.append(background.parallax_layers)
+    tasks.append(load_sounds)
+    tasks.append(HIGHSCORES.load)   # lido na thread do log enquanto o menu está aberto
+    return tasks
+
+# ---------------- Constantes de jogo ----------------
+TICK_RATE = ASSET_CONFIG.get("tick_rate", 60)
+# Deslocamento máximo (px) entre dois ticks que ainda é interpolado; saltos maiores
+# (teleporte, respawn, reaproveitamento do pool) são desenhados direto na posição nova
+INTERP_MAX_JUMP = 200
+TOTAL_ENEMIES_PHASE2 = 15
+ENEMIES_PER_WAVE = 5
+
+controls_p1 = {'left':pygame.K_a,'right':pygame.K_d,'up':pygame.K_w,'down':pygame.K_s,'shoot':pygame.K_SPACE}
+controls_p2 = {'left':pygame.K_LEFT,'right':pygame.K_RIGHT,'up':pygame.K_UP,'down':pygame.K_DOWN,'shoot':pygame.K_KP0}
+
+MAX_METEORS = ASSET_CONFIG.get("max_meteors", 8)
+POINTS_TO_NEXT_PHASE = ASSET_CONFIG.get("points_to_next_phase", 1500)
+
+# ---------------- Entrada ----------------
+# Estado das teclas de um jogador em um frame. A sessão não lê o teclado
+# diretamente: quem chama step() monta esses dicionários (teclado, bot, replay...)
+NO_INPUT = {'left': False, 'right': False, 'up': False, 'down': False,
+            'shoot': False, 'teleport': False, 'mouse_toggle': False, 'mouse': None}
+
+def empty_inputs():
+    """Entradas vazias para os dois jogadores"""
+    return {1: dict(NO_INPUT), 2: dict(NO_INPUT)}
+
+def read_inputs(keys, mouse_pos=None):
+    """Converte o estado do teclado (pygame.key.get_pressed) em entradas da sessão"""
+    inputs = empty_inputs()
+    for num, controls in ((1, controls_p1), (2, controls_p2)):
+        for action in ('left', 'right', 'up', 'down', 'shoot'):
+            inputs[num][action] = bool(keys[controls[action]])
+    # P2 também atira com KP0 ou RCTRL
+    inputs[2]['shoot'] = inputs[2]['shoot'] or bool(keys[pygame.K_KP0]) or bool(keys[pygame.K_RCTRL])
+    inputs[1]['mouse'] = mouse_pos
+    return inputs
+
+# ---------------- Highscores ----------------
+class HighscoreStore:
+    """Highscores em log só de acréscimo (uma linha JSON por registro) + top-N em heaps.
+
+    add() monta o registro e atualiza os quadros na hora (heappushpop, O(log N)); a
+    leitura do log e toda escrita no disco vão para uma thread, então registrar uma
+    pontuação nunca faz E/S nem parse de JSON no loop do jogo. Cada registro entra em quatro quadros:
+    (todos|solo|duo) x (todos|vitória|parcial). De compact_every em compact_every
+    registros o log é reescrito só com o que ainda aparece em algum quadro.
+    """
+
+    MODES = ("all", "solo", "duo")
+    OUTCOMES = ("all", "victory", "partial")
+
+    def __init__(self, log_path, legacy_path=None, top_n=10, compact_every=50):
+        self.log_path = log_path
+        self.legacy_path = legacy_path
+        self.top_n = top_n
+        self.compact_every = compact_every
+        self._boards = {(m, o): [] for m in self.MODES for o in self.OUTCOMES}
+        self._sorted = {}
+        self._seq = 0
+        self._since_compact = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        # Os quadros são lidos pela thread do log e alterados pelo jogo
+        self._lock = threading.Lock()
+        self._loaded = threading.Event()
+        self._early = []   # registros feitos antes de o log terminar de carregar
+
+    @staticmethod
+    def board_keys(record):
+        mode = "duo" if record.get("name") == "DUO" else "solo"
+        outcome = "victory" if record.get("victory") else "partial"
+        return [(m, o) for m in ("all", mode) for o in ("all", outcome)]
+
+    def _insert(self, record):
+        self._seq += 1
+        # Empate: fica o registro mais antigo (mesma ordem do sort estável de antes)
+        entry = (record.get("score", 0), -self._seq, record)
+        for key in self.board_keys(record):
+            heap = self._boards[key]
+            if len(heap) < self.top_n:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+            else:
+                continue
+            self._sorted.pop(key, None)
+
+    def load(self):
+        """Começa a ler o log na thread de gravação (não bloqueia; só a primeira chamada faz algo).
+        Chamado pelo pré-carregamento do menu ou no primeiro registro, não na importação do módulo"""
+        if self._thread is None:
+            self._queue.put(("load", None))
+            self._thread = threading.Thread(target=self._run, name="highscores", daemon=True)
+            self._thread.start()
+
+    def _read_log(self):
+        """(registros, linhas do log) - linha final incompleta de uma queda é ignorada;
+        sem log, importa o JSON antigo (linhas = None: ainda não existe log)"""
+        records = []
+        if os.path.exists(self.log_path):
+            with open(self.log_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        continue
+            lines = len(records)
+        elif self.legacy_path and os.path.exists(self.legacy_path):
+            try:
+                with open(self.legacy_path, "r") as f:
+                    records = json.load(f)
+            except Exception as e:
+                print(f"⚠ Erro ao importar highscores antigos: {e}")
+            lines = None   # ainda não existe log: gravar o compactado
+        else:
+            lines = 0
+        return records, lines
+
+    def _load_log(self):
+        """Roda na thread do log: lê, monta os quadros e, se preciso, compacta"""
+        text = None
+        try:
+            records, lines = self._read_log()
+            with self._lock:
+                for record in records:
+                    self._insert(record)
+                # Compactado antes dos registros adiantados: os appends deles ainda estão na fila
+                if lines is None or lines > self.compact_every:
+                    text = self._log_text(self._kept())
+                for record in self._early:
+                    self._insert(record)
+                self._early = []
+        finally:
+            self._loaded.set()
+        if text is not None:
+            write_file_atomic(self.log_path, text.encode("utf-8"))
+
+    def add(self, name, score, phases_completed=1, victory=False):
+        if victory:
+            progress = "VITÓRIA (Fase 3)"
+        elif phases_completed >= 2:
+            progress = f"Fase {phases_completed}"
+        else:
+            progress = "Fase 1"
+        record = {"name": name, "score": score, "date": time.strftime("%Y-%m-%d %H:%M"),
+                  "phases": phases_completed, "victory": victory, "progress": progress}
+        self.load()
+        with self._lock:
+            if self._loaded.is_set():
+                self._insert(record)
+            else:
+                self._early.append(record)
+        self._submit(("append", record))
+        self._since_compact += 1
+        # Compactar antes do log carregar perderia os registros antigos: fica para o próximo
+        if self._since_compact >= self.compact_every and self._loaded.is_set():
+            self.compact()
+        return record
+
+    def top(self, mode="all", outcome="all"):
+        """Melhores do quadro, do maior para o menor (espera o log carregar: tela de highscores)"""
+        self.load()
+        self._loaded.wait()
+        key = (mode, outcome)
+        with self._lock:
+            board = self._sorted.get(key)
+            if board is None:
+                board = self._sorted[key] = [e[2] for e in sorted(self._boards[key], reverse=True)]
+        return board
+
+    def _kept(self):
+        """Registros que ainda aparecem em algum quadro, na ordem em que foram feitos"""
+        kept = {}
+        for heap in self._boards.values():
+            for _, neg_seq, record in heap:
+                kept[-neg_seq] = record
+        return [kept[seq] for seq in sorted(kept)]
+
+    @staticmethod
+    def _log_text(records):
+        return "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+
+    def compact(self):
+        """Reescreve o log só com os registros que ainda estão em algum quadro"""
+        with self._lock:
+            kept = self._kept()
+        self._since_compact = 0
+        self._submit(("compact", kept))
+
+    def _submit(self, job):
+        self.load()
+        self._queue.put(job)
+
+    def _run(self):
+        # Fila única: appends e compactações são aplicados na ordem em que foram pedidos
+        while True:
+            kind, payload = self._queue.get()
+            try:
+                if kind == "load":
+                    self._load_log()
+                elif kind == "append":
+                    with open(self.log_path, "a", encoding="utf-8") as f:
+                        f.write(self._log_text([payload]))
+                else:
+                    write_file_atomic(self.log_path, self._log_text(payload).encode("utf-8"))
+            except Exception as e:
+                print(f"⚠ Erro ao gravar highscores: {e}")
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Espera as gravações pendentes (ao sair do jogo)"""
+        if self._thread is not None:
+            self._queue.join()
+
+_hs_cfg = ASSET_CONFIG.get("highscores", {})
+HIGHSCORES = HighscoreStore(HIGHSCORES_LOG, HIGHSCORES_FILE, _hs_cfg.get("top_n", 10), _hs_cfg.get("compact_every", 50))
+
+def add_highscore(name, score, phases_completed=1, victory=False):
+    """Adiciona highscore com informações detalhadas (gravação fora da thread principal)"""
+    return HIGHSCORES.add(name, score, phases_completed=phases_completed, victory=victory)
+
+# ---------------- Colisões (fase ampla) ----------------
+class SpatialHash:
+    """Grade uniforme para a fase ampla das colisões.
+
+    Os sprites são registrados nas células que o rect ocupa; update() só mexe
+    na grade quando o sprite troca de célula. collide(rect) testa apenas os
+    sprites das células vizinhas em vez do grupo inteiro.
+    """
+
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self._cells = {}
+        self._where = {}
+
+    def _keys(self, rect):
+        cs = self.cell_size
+        x0, x1 = rect.left // cs, (rect.right - 1) // cs
+        y0, y1 = rect.top // cs, (rect.bottom - 1) // cs
+        if x0 == x1 and y0 == y1:
+            return ((x0, y0),)
+        return tuple((cx, cy) for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1))
+
+    def update(self, sprite):
+        keys = self._keys(sprite.rect)
+        old = self._where.get(sprite)
+        if old == keys:
+            return
+        if old:
+            for k in old:
+                cell = self._cells.get(k)
+                if cell is not None:
+                    cell.pop(sprite, None)
+                    if not cell:
+                        del self._cells[k]
+        # dicts (e não sets) para manter a ordem de inserção determinística
+        for k in keys:
+            self._cells.setdefault(k, {})[sprite] = None
+        self._where[sprite] = keys
+
+    def remove(self, sprite):
+        old = self._where.pop(sprite, None)
+        for k in old or ():
+            cell = self._cells.get(k)
+            if cell is not None:
+                cell.pop(sprite, None)
+                if not cell:
+                    del self._cells[k]
+
+    def sync(self, group):
+        """Atualiza a grade com as posições atuais e descarta quem saiu do grupo"""
+        for sprite in [s for s in self._where if s not in group]:
+            self.remove(sprite)
+        for sprite in group:
+            self.update(sprite)
+
+    def clear(self):
+        self._cells.clear()
+        self._where.clear()
+
+    def collide(self, rect):
+        """Sprites vivos cujo rect colide com rect"""
+        cells = self._cells
+        keys = self._keys(rect)
+        if len(keys) == 1:
+            candidates = cells.get(keys[0], ())
+        else:
+            candidates = {}
+            for k in keys:
+                cell = cells.get(k)
+                if cell:
+                    candidates.update(cell)
+        return [s for s in candidates if rect.colliderect(s.rect) and s.alive()]
+
+# ---------------- Projéteis em massa (NumPy) ----------------
+class ProjectileField:
+    """Projéteis em estrutura de arrays para o ataque "tempestade" do chefão.
+
+    Posições, velocidades e donos ficam em arrays NumPy contíguos: movimento,
+    descarte fora da tela e colisão com retângulos são feitos em lote, e o
+    desenho é um único Surface.blits. Velocidades em pixels por segundo.
+    """
+
+    def __init__(self, capacity, image):
+        self.capacity = capacity
+        self.image = image
+        self.w, self.h = image.get_size()
+        self.pos = np.zeros((capacity, 2), dtype=np.float32)  # canto superior esquerdo
+        self.vel = np.zeros((capacity, 2), dtype=np.float32)
+        self.owner = np.zeros(capacity, dtype=np.int8)         # 0 = inimigo, 1/2 = jogador
+        self.count = 0
+        self.high_water = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def spawn(self, x, y, vx, vy, owner=0):
+        """Adiciona projéteis em lote (x, y = centro; escalares ou arrays)"""
+        x, y, vx, vy = np.broadcast_arrays(*(np.asarray(v, dtype=np.float32).ravel() for v in (x, y, vx, vy)))
+        n = min(x.size, self.capacity - self.count)
+        self.dropped += x.size - n
+        if n <= 0:
+            return 0
+        s = slice(self.count, self.count + n)
+        self.pos[s, 0] = x[:n] - self.w / 2
+        self.pos[s, 1] = y[:n] - self.h / 2
+        self.vel[s, 0] = vx[:n]
+        self.vel[s, 1] = vy[:n]
+        self.owner[s] = owner
+        self.count += n
+        self.high_water = max(self.high_water, self.count)
+        return n
+
+    def _compact(self, keep):
+        c = self.count
+        n = int(np.count_nonzero(keep))
+        if n != c:
+            self.pos[:n] = self.pos[:c][keep]
+            self.vel[:n] = self.vel[:c][keep]
+            self.owner[:n] = self.owner[:c][keep]
+            self.count = n
+
+    def update(self, dt):
+        """Move todos os projéteis e descarta os que saíram da tela"""
+        c = self.count
+        if not c:
+            return
+        pos = self.pos[:c]
+        pos += self.vel[:c] * dt
+        x, y = pos[:, 0], pos[:, 1]
+        self._compact((x > -self.w) & (x < WIDTH) & (y > -self.h) & (y < HEIGHT))
+
+    def collide_rect(self, rect, owner=0):
+        """Remove os projéteis de owner que tocam rect e devolve quantos foram"""
+        c = self.count
+        if not c:
+            return 0
+        x, y = self.pos[:c, 0], self.pos[:c, 1]
+        hit = ((x < rect.right) & (x + self.w > rect.left) &
+               (y < rect.bottom) & (y + self.h > rect.top) & (self.owner[:c] == owner))
+        n = int(np.count_nonzero(hit))
+        if n:
+            self._compact(~hit)
+        return n
+
+    def draw(self, surf, back=0.0):
+        """Desenha todos os projéteis; back = segundos a recuar (interpolação entre ticks)"""
+        c = self.count
+        if c:
+            img = self.image
+            pos = self.pos[:c] - self.vel[:c] * back if back else self.pos[:c]
+            surf.blits([(img, p) for p in pos.astype(np.int32).tolist()], doreturn=False)
+
+# ---------------- Sessão de jogo ----------------
+class GameSession:
+    """Núcleo da simulação: grupos de sprites, jogadores e estado das fases.
+
+    Não abre janela nem lê o teclado. Cada chamada de step(inputs, dt) avança
+    um tick de dt segundos (velocidades em pixels por segundo, temporizadores
+    no relógio da simulação); draw(surf, alpha) é um passo separado e opcional,
+    o que permite simular milhares de ticks por segundo com o driver dummy do SDL.
+    """
+
+    def __init__(self, two_player=False, audio=True, record_highscores=True, bullet_storm=None, seed=None,
+                 autosave=False, rewind=None, background=None, tick_rate=None):
+        self.audio = audio
+        # Ticks por segundo da simulação (--tick-rate); define dt e a janela do rewind
+        self.tick_rate = tick_rate or TICK_RATE
+        self.autosave = autosave
+        # Snapshots recentes em memória (voltar no tempo / tentar a fase de novo)
+        rw = ASSET_CONFIG.get("rewind", {})
+        if rewind is None:
+            rewind = rw.get("enabled", True)
+        self.rewind = None
+        if rewind:
+            interval = max(1, rw.get("interval", 30))
+            self.rewind = RewindBuffer(interval, int(rw.get("seconds", 20) * self.tick_rate) // interval,
+                                       rw.get("keyframe_every", 10))
+        # Todo sorteio da simulação sai daqui (reset() ressemeia), para replays exatos
+        self.rng = random.Random()
+        self.record_highscores = record_highscores
+        self.background = background or Background()
+        # RenderUpdates: draw() devolve as áreas alteradas (usado pelo DirtyRenderer)
+        self.all_sprites = BatchedRenderUpdates()
+        self.meteors = pygame.sprite.Group()
+        # Tiros separados por dono: cada colisão só consulta os projéteis relevantes
+        # (bullets continua sendo a união, usada para atualizar e limpar)
+        self.bullets = pygame.sprite.Group()
+        self.player_bullets = {1: pygame.sprite.Group(), 2: pygame.sprite.Group()}
+        self.enemy_bullets = pygame.sprite.Group()
+        self.powerups = pygame.sprite.Group()
+        self.explosions = pygame.sprite.Group()
+        self.enemies = pygame.sprite.Group()
+        # Grades espaciais usadas por todas as colisões (células do tamanho de um meteoro)
+        cell = ASSET_CONFIG.get("collision_cell_size", 64)
+        self.player_bullet_grids = {1: SpatialHash(cell), 2: SpatialHash(cell)}
+        self.enemy_bullet_grid = SpatialHash(cell)
+        self.meteor_grid = SpatialHash(cell)
+        self.enemy_grid = SpatialHash(cell)
+        self.powerup_grid = SpatialHash(cell)
+        # Tiros do ataque "tempestade" (milhares de projéteis, fora dos grupos de sprites)
+        storm = ASSET_CONFIG.get("bullet_storm", {})
+        if bullet_storm is None:
+            bullet_storm = storm.get("enabled", False)
+        self.projectiles = None
+        if bullet_storm and np is not None:
+            self.projectiles = ProjectileField(storm.get("capacity", 10000), Bullet.image_for("enemy"))
+        self.time_ms = 0.0
+        self.frame = 0
+        self.dt = 1.0 / self.tick_rate
+        self._prev_centers = {}
+        self.inputs = empty_inputs()
+        prefill_pools()
+        self.reset(two_p=two_player, music=False, seed=seed)
+
+    def now(self):
+        """Tempo da simulação em ms (substitui pygame.time.get_ticks)"""
+        return int(self.time_ms)
+
+    def play_sound(self, sound, sound_type):
+        if self.audio and sound:
+            AUDIO.play(sound_type, sound)
+
+    def add_highscore(self, name, score, phases_completed=1, victory=False):
+        if self.record_highscores:
+            add_highscore(name, score, phases_completed=phases_completed, victory=victory)
+
+    def clear_groups(self, *groups):
+        """Esvazia os grupos via kill(), devolvendo tiros/explosões/powerups aos pools"""
+        for group in groups:
+            for sprite in group.sprites():
+                sprite.kill()
+
+    def add_bullet(self, b, shooter=None):
+        """Registra um tiro; shooter = Player que atirou (None = inimigo/chefão)"""
+        if shooter is None:
+            owner_group, grid = self.enemy_bullets, self.enemy_bullet_grid
+        else:
+            owner_group, grid = self.player_bullets[shooter.player_num], self.player_bullet_grids[shooter.player_num]
+        self.all_sprites.add(b); self.bullets.add(b); owner_group.add(b)
+        # Tiro reaproveitado do pool ainda pode estar na grade com a posição antiga
+        grid.remove(b)
+
+    def add_explosion(self, center):
+        ex = EXPLOSION_POOL.acquire(center, now=self.now())
+        self.all_sprites.add(ex); self.explosions.add(ex)
+        return ex
+
+    def state_digest(self):
+        """CRC32 do estado essencial, usado para conferir se um replay reproduziu a partida"""
+        parts = [self.frame, self.phase_state, self.game_state]
+        for p in (self.player1, self.player2):
+            parts += [p.rect.center, p.score, p.health, p.lives]
+        parts += [s.rect.center for s in self.all_sprites]
+        return zlib.crc32(repr(parts).encode())
+
+    def group_counts(self):
+        """Quantidade de sprites por grupo (overlay do profiler / benchmarks)"""
+        counts = {"sprites": len(self.all_sprites), "meteoros": len(self.meteors),
+                  "tiros": len(self.bullets), "inimigos": len(self.enemies),
+                  "powerups": len(self.powerups), "explosões": len(self.explosions)}
+        if self.projectiles is not None:
+            counts["tempestade"] = self.projectiles.count
+        return counts
+
+    def total_score(self):
+        return self.player1.score + (self.player2.score if self.two_player else 0)
+
+    def reset(self, two_p=False, music=True, seed=None):
+        """Começa uma partida nova; seed=None sorteia uma semente (guardada em self.seed)"""
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.rng.seed(self.seed)
+        self.time_ms = 0.0
+        self.frame = 0
+        self.phase = 1
+        self.phase_state = "asteroids"
+        self.game_state = "playing"
+        self.two_player = two_p
+        self.speed_mult = 1.0
+        self.enemies_total = 0
+        self.enemies_killed = 0
+        self.current_enemy_wave = 0
+        self.transition_start = None
+        self._prev_centers = {}
+
+        self.clear_groups(self.all_sprites, self.meteors, self.bullets, self.powerups, self.explosions, self.enemies)
+        if self.projectiles is not None:
+            self.projectiles.clear()
+        for grid in (*self.player_bullet_grids.values(), self.enemy_bullet_grid, self.meteor_grid,
+                     self.enemy_grid, self.powerup_grid):
+            grid.clear()
+        self.player1 = Player(self, WIDTH//2, HEIGHT-120, controls_p1, color=ASSET_CONFIG.get("player_default_color"), player_num=1)
+        self.player2 = Player(self, WIDTH//4, HEIGHT-120, controls_p2, color=(255,100,100), player_num=2)
+        self.all_sprites.add(self.player1)
+        if self.two_player:
+            self.all_sprites.add(self.player2)
+        for _ in range(MAX_METEORS):
+            m = Meteor(kind=self.rng.choice(["default","default","evil"]), rng=self.rng)
+            self.all_sprites.add(m); self.meteors.add(m)
+        self.boss = None
+        self.last_minion_spawn = None
+        if self.rewind is not None:
+            self.rewind.clear()
+            self.rewind.mark("asteroids", self)
+
+        if music and self.audio:
+            change_music("asteroids")
+
+    # ---------------- Funções de Spawn ----------------
+    def spawn_enemy_wave(self, count):
+        margin = 120
+        if count > 1:
+            spacing = max(1, (WIDTH - 2*margin) // max(1, count-1))
+        else:
+            spacing = 0
+
+        for i in range(count):
+            x = margin + i*spacing if count > 1 else WIDTH//2
+            y = 120 + self.rng.randint(-20,20)
+            es = EnemyShip(self, x, y)
+            self.enemies.add(es)
+            self.all_sprites.add(es)
+            self.enemies_total += 1
+
+    def spawn_special_meteor(self):
+        kind = self.rng.choices(["default","evil","power","invul","extra_life","teleporter","revive", "shield"],
+                             [35,15,12,10,15,10,5,3])[0]
+        m = Meteor(kind=kind, rng=self.rng); self.all_sprites.add(m); self.meteors.add(m)
+
+    def drop_powerup(self, center, phase):
+        if phase == "asteroids":
+            pool = ["invul_gift", "upgrade", "extra_life", "teleporter", "shield"]
+            if self.two_player:
+                pool.append("revive")  # Só dropa powerup revive em 2 jogadores
+        elif phase == "phase2":
+            pool = ["upgrade", "extra_life", "shield", "invul_gift"]
+            weights = [30, 25, 25, 20]
+        elif phase == "phase3":
+            pool = ["shield", "extra_life", "upgrade"]
+            weights = [40, 35, 25]
+        else:
+            pool = ["extra_life", "invul_gift", "upgrade"]
+            weights = [40, 30, 30]
+
+        ptype = self.rng.choices(pool, weights=weights if 'weights' in locals() else None)[0]
+        pu = POWERUP_POOL.acquire(center, ptype=ptype, rng=self.rng)
+        self.all_sprites.add(pu)
+        self.powerups.add(pu)
+        # Instância reaproveitada pode ter ficado na grade: reinsere no fim (ordem determinística)
+        self.powerup_grid.remove(pu)
+        self.powerup_grid.update(pu)
+        return pu
+
+    # ---------------- Simulação ----------------
+    def is_active(self):
+        return self.game_state == "playing" and self.phase_state not in ("transition", "boss_transition")
+
+    def step(self, inputs=None, dt=None):
+        """Avança um tick de dt segundos (padrão 1/tick_rate). inputs: {1: {...}, 2: {...}} (ver NO_INPUT)"""
+        if dt is None:
+            dt = 1.0 / self.tick_rate
+        self.dt = dt
+        self.time_ms += dt * 1000.0
+        self.frame += 1
+        self.inputs = inputs if inputs is not None else empty_inputs()
+
+        if self.is_active():
+            # Posições do tick anterior, usadas para interpolar o desenho
+            self._prev_centers = {s: s.rect.center for s in self.all_sprites}
+            with PROFILER.section("tiros"):
+                self._handle_shooting()
+            with PROFILER.section("ia"):
+                self._update_ai()
+            with PROFILER.section("update"):
+                self._update_sprites()
+            with PROFILER.section("projéteis"):
+                self._update_projectiles(dt)
+            self._check_collisions()
+        if self.game_state == "next_phase":
+            self._update_transition()
+        if self.rewind is not None and self.game_state in ("playing", "next_phase"):
+            with PROFILER.section("rewind"):
+                self.rewind.capture(self)
+
+    def rewind_seconds(self, seconds):
+        """Volta a partida `seconds` segundos (até o snapshot mais antigo no anel)"""
+        if self.rewind is None:
+            return False
+        frame = self.rewind.restore(self, self.frame - int(seconds / self.dt))
+        if frame is None:
+            return False
+        self.seed = None   # a partida divergiu da semente: não dá mais para gravar replay
+        return True
+
+    def retry_phase(self):
+        """Recomeça do início da última fase alcançada, sem ler o disco"""
+        if self.rewind is None or not self.rewind.retry(self):
+            return False
+        self.seed = None
+        if self.audio:
+            change_music(self.phase_state)
+        return True
+
+    def _handle_shooting(self):
+        p1, p2 = self.player1, self.player2
+        for p in ((p1, p2) if self.two_player else (p1,)):
+            inp = self.inputs.get(p.player_num, NO_INPUT)
+            if inp.get('mouse_toggle'):
+                p.mouse_control = not p.mouse_control
+            if inp.get('teleport') and p.teleport_ability and p.is_alive:
+                p.teleport()
+            if inp['shoot'] and p.is_alive:
+                bls = p.shoot()
+                if bls:
+                    for b in bls:
+                        self.add_bullet(b, shooter=p)
+                    # Reaplica volume antes de tocar
+                    self.play_sound(shoot_snd, "shoot")
+
+    def _update_ai(self):
+        if self.phase_state == "phase2" or self.phase_state == "phase3":
+            for es in list(self.enemies):
+                targets = [p for p in (self.player1, self.player2) if p in self.all_sprites and getattr(p, "is_alive", False)]
+                if not targets:
+                    continue
+                target = min(targets, key=lambda t: abs(t.rect.centerx - es.rect.centerx))
+                es.aim_and_shoot(target)
+        if self.boss and self.phase_state == "phase3":
+            self.boss.shoot()
+
+    def _update_sprites(self):
+        # all_sprites contém todos os sprites ativos (inclusive o chefão): um update por tick
+        self.all_sprites.update(self)
+        self._sync_grids()
+
+        # enemy bullets -> players (só players vivos)
+        for p in ((self.player1, self.player2) if self.two_player else (self.player1,)):
+            if not p.is_alive:
+                continue
+            hits_from_enemy = self.enemy_bullet_grid.collide(p.rect)
+            for b in hits_from_enemy:
+                if p.take_damage(15):
+                    self.add_explosion(p.rect.center)
+                    self.play_sound(explosion_snd, "explosion")
+                b.kill()
+
+    def _update_projectiles(self, dt):
+        """Move os projéteis da tempestade e aplica os acertos nos jogadores"""
+        field = self.projectiles
+        if field is None or not field.count:
+            return
+        field.update(dt)
+        for p in ((self.player1, self.player2) if self.two_player else (self.player1,)):
+            if p.is_alive and field.collide_rect(p.rect):
+                # Um dano por frame, mesmo que vários projéteis acertem juntos
+                if p.take_damage(15):
+                    self.add_explosion(p.rect.center)
+                    self.play_sound(explosion_snd, "explosion")
+
+    def _sync_grids(self):
+        for num, grid in self.player_bullet_grids.items():
+            grid.sync(self.player_bullets[num])
+        self.enemy_bullet_grid.sync(self.enemy_bullets)
+        self.meteor_grid.sync(self.meteors)
+        self.enemy_grid.sync(self.enemies)
+        self.powerup_grid.sync(self.powerups)
+
+    def _grid_groupcollide(self, group, grid):
+        """Equivalente a groupcollide(group, <grupo da grade>, False, True)"""
+        hits = {}
+        for sprite in group:
+            found = grid.collide(sprite.rect)
+            if found:
+                for other in found:
+                    other.kill()
+                hits[sprite] = found
+        return hits
+
+    def _player_bullet_hits(self, group):
+        """Alvos de group atingidos por tiros de jogadores: {alvo: [(jogador, tiros), ...]}"""
+        hits = {}
+        for num, grid in self.player_bullet_grids.items():
+            shooter = self.player1 if num == 1 else self.player2
+            for target, bls in self._grid_groupcollide(group, grid).items():
+                hits.setdefault(target, []).append((shooter, bls))
+        return hits
+
+    def _check_collisions(self):
+        if self.phase_state == "asteroids":
+            with PROFILER.section("col_fase1"):
+                self._collide_asteroids()
+        elif self.phase_state == "phase2":
+            with PROFILER.section("col_fase2"):
+                self._collide_phase2()
+        elif self.phase_state == "phase3":
+            with PROFILER.section("col_fase3"):
+                self._collide_phase3()
+
+        with PROFILER.section("powerups"):
+            self._collect_powerups()
+
+        # ensure meteor count
+        if self.phase_state == "asteroids":
+            while len(self.meteors) < MAX_METEORS:
+                self.spawn_special_meteor()
+
+        self._check_game_over()
+
+    # ----- PHASE 1: ASTEROIDS -----
+    def _collide_asteroids(self):
+        hits = self._player_bullet_hits(self.meteors)
+        for meteor, shots in hits.items():
+            self.add_explosion(meteor.rect.center)
+            self.play_sound(explosion_snd, "explosion")
+
+            # 10 pontos por tiro que acertou (como antes), creditados a quem atirou
+            for shooter, bls in shots:
+                shooter.score += 10 * len(bls)
+
+            if self.rng.random() < 0.5:
+                self.drop_powerup(meteor.rect.center, "asteroids")
+
+            total_score = self.total_score()
+            if total_score > 0 and total_score % 500 == 0:
+                self.speed_mult += 0.3
+
+            meteor.respawn()
+
+            # check transition to next phase
+            if total_score >= POINTS_TO_NEXT_PHASE:
+                self.clear_groups(self.meteors, self.bullets, self.powerups)
+                self.phase_state = "transition"
+                self.game_state = "next_phase"
+                self.transition_start = self.now()
+                self._prepare_music("phase2")
+                break
+
+        # meteors -> players collisions (só players vivos)
+        for p in ((self.player1, self.player2) if self.two_player else (self.player1,)):
+            if not p.is_alive:
+                continue
+            for hit in self.meteor_grid.collide(p.rect):
+                if p.take_damage(hit.damage):
+                    self.add_explosion(hit.rect.center)
+                    self.play_sound(explosion_snd, "explosion")
+                hit.respawn()
+
+    # ----- PHASE 2: ENEMIES -----
+    def _collide_phase2(self):
+        # Detecção de colisão bullets->enemies na fase 2
+        hits_en = self._player_bullet_hits(self.enemies)
+        for en, shots in hits_en.items():
+            dmg = sum(len(bls) for _, bls in shots)
+            if dmg > 0:
+                dead = en.take_damage(dmg)
+                if dead:
+                    self.enemies_killed += 1
+                    self.add_explosion(en.rect.center)
+
+                    drop_chance = 0.6
+                    if self.enemies_killed % 3 == 0:
+                        drop_chance = 1.0
+
+                    if self.rng.random() < drop_chance:
+                        self.drop_powerup(en.rect.center, "phase2")
+
+                    en.kill()
+
+        if len(self.enemies) == 0 and self.enemies_killed < TOTAL_ENEMIES_PHASE2:
+            next_spawn = min(ENEMIES_PER_WAVE, TOTAL_ENEMIES_PHASE2 - self.enemies_killed)
+            if next_spawn > 0:
+                self.current_enemy_wave += 1
+                self.spawn_enemy_wave(next_spawn)
+
+        elif self.enemies_killed >= TOTAL_ENEMIES_PHASE2 and len(self.enemies) == 0:
+            self.clear_groups(self.bullets, self.powerups)
+            self.phase_state = "boss_transition"
+            self.game_state = "next_phase"
+            self.transition_start = self.now()
+            self._prepare_music("phase3")
+
+    # ----- PHASE 3 (boss fight) -----
+    def _collide_phase3(self):
+        # Inimigos normais (minions) na fase 3
+        hits_enemies_phase3 = self._player_bullet_hits(self.enemies)
+        for en, shots in hits_enemies_phase3.items():
+            dmg = sum(len(bls) for _, bls in shots)
+            if dmg > 0:
+                dead = en.take_damage(dmg)
+                if dead:
+                    self.add_explosion(en.rect.center)
+
+                    # Chance de drop para minions do boss
+                    if self.rng.random() < 0.4:  # 40% de chance
+                        self.drop_powerup(en.rect.center, "phase3")
+
+                    en.kill()
+
+        # Boss específico
+        boss = self.boss
+        if boss and boss.alive():
+            hits_boss = [b for grid in self.player_bullet_grids.values() for b in grid.collide(boss.rect)]
+            for b in hits_boss:
+                b.kill()
+            for b in hits_boss:
+                boss.health -= 1
+
+                if boss.health % 10 == 0 and boss.health > 0:
+                    self.drop_powerup((boss.rect.centerx + self.rng.randint(-50, 50),
+                                       boss.rect.centery + self.rng.randint(-50, 50)), "phase3")
+
+                if boss.health <= 0:
+                    self.add_explosion(boss.rect.center)
+                    self.play_sound(explosion_snd, "explosion")
+
+                    for _ in range(3):
+                        self.drop_powerup((boss.rect.centerx + self.rng.randint(-100, 100),
+                                           boss.rect.centery + self.rng.randint(-100, 100)), "phase3")
+
+                    boss.kill(); self.boss = None
+                    self.player1.score += 500
+                    if self.two_player: self.player2.score += 300
+                    self.phase_state = "victory"
+                    self.game_state = "victory"
+
+                    # Adicionar highscore com vitória
+                    name = "DUO" if self.two_player else "PLAYER1"
+                    self.add_highscore(name, self.total_score(), phases_completed=3, victory=True)
+                    return
+
+            # Spawn de minions mais lento
+            if self.last_minion_spawn is None or self.now() - self.last_minion_spawn > self.rng.randint(5000, 6000):
+                self.last_minion_spawn = self.now()
+
+                mx = self.rng.randint(150, WIDTH-150)
+                m = EnemyShip(self, mx, boss.rect.bottom + 60)
+                self.enemies.add(m)
+                self.all_sprites.add(m)
+
+    # ----- COLISÕES COM POWERUPS (só players vivos) -----
+    def _collect_powerups(self):
+        pairs = [(self.player1, self.player2)]
+        if self.two_player:
+            pairs.append((self.player2, self.player1))
+        for p, other in pairs:
+            if not p.is_alive:
+                continue
+            for pu in self.powerup_grid.collide(p.rect):
+                pu.kill()
+                if pu.ptype == "revive":
+                    # CORREÇÃO: Só revive o parceiro se estiver jogando com 2 jogadores
+                    if self.two_player and not other.is_alive and other.lives > 0:
+                        other.respawn()
+                    else:
+                        # Se não tem parceiro para reviver, cura o próprio jogador
+                        p.health = min(100, p.health+50)
+
+                elif pu.ptype == "invul_gift":
+                    p.activate_invulnerability(5000)
+
+                elif pu.ptype == "upgrade":
+                    p.activate_upgrade(15000)
+
+                elif pu.ptype == "extra_life":
+                    p.health = min(100, p.health+30)
+                    p.lives += 1
+
+                elif pu.ptype == "teleporter":
+                    p.teleport_ability = True
+
+                elif pu.ptype == "shield":
+                    p.activate_shield(8000)
+
+                self.play_sound(powerup_snd, "powerup")
+
+    # ----- Game over check -----
+    def _check_game_over(self):
+        if self.game_state != "playing":
+            return
+        if not self.two_player:
+            # Modo 1 jogador: morreu = GAME OVER
+            if not self.player1.is_alive or self.player1.lives <= 0:
+                self.game_state = "game_over"
+                self.phase_state = "game_over"
+                if self.player1.score > 0:
+                    # Determinar fases completadas
+                    phases_completed = 1
+                    if self.phase_state == "phase2" or self.phase_state == "boss_transition":
+                        phases_completed = 2
+                    elif self.phase_state == "phase3":
+                        phases_completed = 3
+
+                    self.add_highscore("PLAYER1", self.player1.score, phases_completed=phases_completed, victory=False)
+        else:
+            # Modo 2 jogadores: ambos mortos = GAME OVER
+            game_over = (self.player1.lives <= 0 and self.player2.lives <= 0)
+            if game_over:
+                self.game_state = "game_over"
+                self.phase_state = "game_over"
+                if self.player1.score + self.player2.score > 0:
+                    # Determinar fases completadas
+                    phases_completed = 1
+                    if self.phase_state == "phase2" or self.phase_state == "boss_transition":
+                        phases_completed = 2
+                    elif self.phase_state == "phase3":
+                        phases_completed = 3
+
+                    self.add_highscore("DUO", self.player1.score + self.player2.score, phases_completed=phases_completed, victory=False)
+
+    # --- NEXT_PHASE screen handling ---
+    def _prepare_music(self, phase_name):
+        """Durante a tela de transição: carrega a próxima faixa e some com a atual"""
+        if self.audio:
+            MUSIC.prefetch(phase_name)
+            MUSIC.fade_out()
+
+    def _update_transition(self):
+        if self.transition_start is None or self.now() - self.transition_start <= 3000:
+            return
+        self.clear_groups(self.bullets, self.powerups, self.explosions)
+        if self.projectiles is not None:
+            self.projectiles.clear()
+        name = "DUO" if self.two_player else "PLAYER1"
+        if self.phase_state == "transition":
+            self.phase_state = "phase2"
+            self.game_state = "playing"
+            self.current_enemy_wave = 1
+            self.spawn_enemy_wave(min(ENEMIES_PER_WAVE, TOTAL_ENEMIES_PHASE2))
+            if self.audio:
+                change_music("phase2")
+            self.transition_start = None
+            if self.rewind is not None:
+                self.rewind.mark("phase2", self)
+            if self.autosave:
+                save_game(self, autosave=True)
+
+            # Adicionar highscore parcial ao completar fase 1
+            self.add_highscore(name, self.total_score(), phases_completed=1, victory=False)
+        elif self.phase_state == "boss_transition":
+            self.boss = Boss(self, WIDTH//2, 150)
+            self.all_sprites.add(self.boss)
+            self.phase_state = "phase3"
+            self.game_state = "playing"
+            if self.audio:
+                change_music("phase3")
+            self.transition_start = None
+            if self.rewind is not None:
+                self.rewind.mark("phase3", self)
+            if self.autosave:
+                save_game(self, autosave=True)
+
+            # Adicionar highscore parcial ao completar fase 2
+            self.add_highscore(name, self.total_score(), phases_completed=2, victory=False)
+
+    # ---------------- Renderização ----------------
+    def interpolate(self, alpha):
+        """Posiciona os sprites entre o tick anterior (alpha=0) e o atual (alpha=1).
+
+        Devolve a lista para restore(); os rects só ficam deslocados durante o desenho.
+        """
+        if alpha >= 1.0 or not self._prev_centers:
+            return []
+        prev = self._prev_centers
+        moved = []
+        for s in self.all_sprites:
+            p = prev.get(s)
+            if p is None:
+                continue
+            cx, cy = s.rect.center
+            dx, dy = cx - p[0], cy - p[1]
+            if (dx or dy) and abs(dx) + abs(dy) < INTERP_MAX_JUMP:
+                moved.append((s, (cx, cy)))
+                s.rect.center = (round(p[0] + dx * alpha), round(p[1] + dy * alpha))
+        return moved
+
+    @staticmethod
+    def restore(moved):
+        for s, center in moved:
+            s.rect.center = center
+
+    def draw_sprites(self, surf, alpha=1.0):
+        """Desenha sprites e projéteis interpolados; devolve as áreas alteradas"""
+        moved = self.interpolate(alpha)
+        dirty = self.all_sprites.draw(surf)
+        self.restore(moved)
+        if self.projectiles is not None:
+            self.projectiles.draw(surf, (1.0 - alpha) * self.dt if self.is_active() else 0.0)
+        return dirty
+
+    def draw(self, surf, alpha=1.0):
+        """Desenha o estado atual da sessão (passo opcional, separado de step).
+        alpha = fração do tick atual já decorrida, para interpolar o movimento"""
+        player1, player2, two_player = self.player1, self.player2, self.two_player
+        phase_state = self.phase_state
+
+        if self.game_state == "playing":
+            # Desenhar o jogo normalmente
+            with PROFILER.section("fundo"):
+                self.background.draw(surf, phase_state, self.now())
+
+            if phase_state not in ("transition", "boss_transition"):
+                with PROFILER.section("sprites"):
+                    self.draw_sprites(surf, alpha)
+            with PROFILER.section("hud"):
+                self.draw_hud(surf)
+
+        elif self.game_state == "next_phase":
+            self.background.draw(surf, "asteroids", self.now())
+            if phase_state == "transition":
+                draw_text(surf, "🔄 PRÓXIMA FASE!", 60, WIDTH//2, HEIGHT//2 - 80)
+                draw_text(surf, "Os inimigos chegaram...", 40, WIDTH//2, HEIGHT//2)
+                draw_text(surf, "DESTRUAM ELES!" if two_player else "DESTRUA ELES!", 40, WIDTH//2, HEIGHT//2 + 60)
+            elif phase_state == "boss_transition":
+                draw_text(surf, "⚠️ ALERTA MÁXIMO!", 60, WIDTH//2, HEIGHT//2 - 80)
+                draw_text(surf, "CHEFÃO EM BREVE", 40, WIDTH//2, HEIGHT//2)
+                draw_text(surf, "Prepare-se para a batalha final!", 40, WIDTH//2, HEIGHT//2 + 60)
+
+        elif self.game_state == "victory":
+            self.background.draw(surf, "phase3", self.now())
+            draw_text(surf, "🎉 VITÓRIA!", 72, WIDTH//2, HEIGHT//2 - 100)
+            draw_text(surf, "Você derrotou o chefão e salvou a galáxia!", 36, WIDTH//2, HEIGHT//2)
+            draw_text(surf, f"Pontuação final: {self.total_score()}", 32, WIDTH//2, HEIGHT//2 + 50)
+            draw_text(surf, "Pressione ENTER ou ESC para voltar ao menu", 24, WIDTH//2, HEIGHT-50)
+
+        elif self.game_state == "game_over":
+            self.background.draw(surf, "asteroids", self.now())
+            draw_text(surf, "💀 GAME OVER", 72, WIDTH//2, HEIGHT//2 - 100)
+
+            if two_player:
+                draw_text(surf, f"Pontuação final: {player1.score + player2.score}", 36, WIDTH//2, HEIGHT//2 - 20)
+            else:
+                draw_text(surf, f"Pontuação final: {player1.score}", 36, WIDTH//2, HEIGHT//2 - 20)
+
+            draw_text(surf, "Pressione R para reiniciar ou ESC para sair", 28, WIDTH//2, HEIGHT//2 + 40)
+            if self.rewind is not None and self.rewind.last_checkpoint in ("phase2", "phase3"):
+                fase = "2" if self.rewind.last_checkpoint == "phase2" else "3"
+                draw_text(surf, f"C para tentar de novo a fase {fase}", 28, WIDTH//2, HEIGHT//2 + 80, (255, 255, 100))
+
+    def draw_hud(self, surf):
+        """Desenha a interface e devolve os retângulos ocupados (para o DirtyRenderer)"""
+        player1, player2, two_player = self.player1, self.player2, self.two_player
+        phase_state = self.phase_state
+        hud = []
+
+        # Interface do Player 1
+        hud.append(draw_health_bar(surf, 20, 20, player1.health if player1.is_alive else 0))
+        hud.append(draw_value(surf, "P1 PONTOS: ", player1.score, 30, 150, 20))
+
+        # Vidas do Player 1
+        lives_text = f"P1 VIDAS: {player1.lives}"
+        if not player1.is_alive:
+            if two_player:
+                lives_text += " (Aguardando revive do P2)"  # Mensagem para 2 jogadores
+            else:
+                lives_text += " (GAME OVER)"  # Mensagem para 1 jogador
+        hud.append(draw_text(surf, lives_text, 22, 150, 55, (255, 200, 100) if player1.is_alive else (200, 100, 100)))
+
+        if two_player:
+            # Interface do Player 2
+            hud.append(draw_health_bar(surf, WIDTH-270, 20, player2.health if player2.is_alive else 0))
+            hud.append(draw_value(surf, "P2 PONTOS: ", player2.score, 30, WIDTH-150, 20))
+
+            # Vidas do Player 2
+            lives_text = f"P2 VIDAS: {player2.lives}"
+            if not player2.is_alive:
+                lives_text += " (Aguardando revive do P1)"  # Mensagem para 2 jogadores
+            hud.append(draw_text(surf, lives_text, 22, WIDTH-150, 55, (255, 200, 100) if player2.is_alive else (200, 100, 100)))
+
+        # Phase-specific UI
+        if phase_state == "asteroids":
+            hud.append(draw_text(surf, f"Pontos para fase 2: {POINTS_TO_NEXT_PHASE}", 22, WIDTH-220, 20))
+        elif phase_state == "phase2":
+            hud.append(draw_value(surf, "FASE 2 - INIMIGOS: ", f"{self.enemies_killed}/{TOTAL_ENEMIES_PHASE2}", 26, WIDTH//2, 20))
+            hud.append(draw_value(surf, "Wave: ", self.current_enemy_wave, 22, WIDTH//2, 50))
+        elif phase_state == "phase3":
+            hud.append(draw_text(surf, "FASE 3 - CHEFÃO FINAL", 36, WIDTH//2, 20))
+            if self.boss and self.boss.alive():
+                hud.append(draw_value(surf, "CHEFÃO HP: ", self.boss.health, 22, WIDTH//2, 60))
+
+        # Mostrar powerups ativos
+        now = self.now()
+        for p, x in ((player1, 100), (player2, WIDTH-100)):
+            if p is player2 and not two_player:
+                continue
+            if not p.is_alive:
+                continue
+            y_offset = 100
+            tag = f"P{p.player_num}"
+            if p.upgrade_end_time and now < p.upgrade_end_time:
+                remaining = (p.upgrade_end_time - now) / 1000
+                hud.append(draw_value(surf, f"{tag} Upgrade: ", f"{remaining:.1f}s", 20, x, y_offset, (255, 255, 100)))
+                y_offset += 25
+            if p.shield_end_time and now < p.shield_end_time:
+                remaining = (p.shield_end_time - now) / 1000
+                hud.append(draw_value(surf, f"{tag} Escudo: ", f"{remaining:.1f}s", 20, x, y_offset, (100, 200, 255)))
+                y_offset += 25
+            if p.invulnerable_until and now < p.invulnerable_until:
+                remaining = (p.invulnerable_until - now) / 1000
+                hud.append(draw_value(surf, f"{tag} Invulnerável: ", f"{remaining:.1f}s", 20, x, y_offset, (30, 100, 200)))
+                y_offset += 25
+
+        # Instruções de revive em 2 jogadores
+        if two_player:
+            if not player1.is_alive and player2.is_alive:
+                hud.append(draw_text(surf, "🎮 P2: Pegue o powerup VERMELHO para reviver P1!", 24, WIDTH//2, HEIGHT-40, (255, 50, 50)))
+            elif not player2.is_alive and player1.is_alive:
+                hud.append(draw_text(surf, "🎮 P1: Pegue o powerup VERMELHO para reviver P2!", 24, WIDTH//2, HEIGHT-40, (255, 50, 50)))
+        return hud
+
+class DirtyRenderer:
+    """Renderização por retângulos sujos para o estado "playing".
+
+    O fundo da fase é estático, então basta restaurá-lo sob a posição anterior
+    dos sprites e do HUD e atualizar só essas áreas com display.update(rects).
+    Transições de fase, telas de fim, menus e a pausa usam o caminho completo.
+    """
+
+    def __init__(self):
+        self._hud_rects = []
+        self._full_key = None
+
+    def invalidate(self):
+        self._full_key = None
+
+    def render(self, session, screen, overlay=False, alpha=1.0):
+        """Desenha a sessão; devolve a lista de retângulos ou None (flip completo)"""
+        key = (session.game_state, session.phase_state)
+        if (overlay or session.game_state != "playing"
+                or session.phase_state in ("transition", "boss_transition")
+                or session.background.parallax_layers()
+                or (session.projectiles is not None and session.projectiles.count)):
+            screen.fill((0,0,0))
+            session.draw(screen, alpha)
+            self._full_key = None
+            return None
+
+        bg = session.background.compose(session.phase_state)
+        if key != self._full_key:
+            # Primeiro frame da fase: quadro completo (preenche spritedict/hud)
+            screen.blit(bg, (0,0))
+            session.draw_sprites(screen, alpha)
+            self._hud_rects = session.draw_hud(screen)
+            self._full_key = key
+            return None
+
+        with PROFILER.section("fundo"):
+            session.all_sprites.clear(screen, bg)
+            for r in self._hud_rects:
+                screen.blit(bg, r, r)
+        with PROFILER.section("sprites"):
+            dirty = session.draw_sprites(screen, alpha)
+        with PROFILER.section("hud"):
+            hud = session.draw_hud(screen)
+        dirty.extend(self._hud_rects)
+        dirty.extend(hud)
+        self._hud_rects = hud
+        return dirty
+
+# ---------------- Replays ----------------
+# Arquivo: cabeçalho fixo + entradas de cada tick comprimidas com zlib.
+# Com a mesma semente e as mesmas entradas a sessão se repete exatamente.
+REPLAY_MAGIC = b"NDRP"
+REPLAY_VERSION = 1
+REPLAY_HEADER = struct.Struct("<4sBBHQII")   # magic, versão, flags, tick_rate, semente, ticks, digest final
+REPLAY_TICK = struct.Struct("<Hhh")           # botões (P1 no byte baixo, P2 no alto), mouse do P1
+REPLAY_BUTTONS = ("left", "right", "up", "down", "shoot", "teleport", "mouse_toggle")
+REPLAY_FLAG_TWO_PLAYER = 1
+REPLAY_FLAG_STORM = 2
+
+def pack_inputs(inputs):
+    bits = 0
+    for num, shift in ((1, 0), (2, 8)):
+        inp = inputs.get(num, NO_INPUT)
+        for i, name in enumerate(REPLAY_BUTTONS):
+            if inp.get(name):
+                bits |= 1 << (shift + i)
+    mx, my = inputs.get(1, NO_INPUT).get('mouse') or (-1, -1)
+    return REPLAY_TICK.pack(bits, mx, my)
+
+def unpack_inputs(bits, mx, my):
+    inputs = empty_inputs()
+    for num, shift in ((1, 0), (2, 8)):
+        for i, name in enumerate(REPLAY_BUTTONS):
+            inputs[num][name] = bool(bits >> (shift + i) & 1)
+    if mx >= 0:
+        inputs[1]['mouse'] = (mx, my)
+    return inputs
+
+class ReplayRecorder:
+    """Grava as entradas de cada tick de uma partida, desde o reset da sessão"""
+
+    def __init__(self, session):
+        self.seed = session.seed
+        self.tick_rate = session.tick_rate
+        self.flags = ((REPLAY_FLAG_TWO_PLAYER if session.two_player else 0) |
+                      (REPLAY_FLAG_STORM if session.projectiles is not None else 0))
+        self.ticks = bytearray()
+        self.count = 0
+
+    def record(self, inputs):
+        self.ticks += pack_inputs(inputs)
+        self.count += 1
+
+    def save(self, path, session):
+        header = REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, self.flags, self.tick_rate,
+                                    self.seed, self.count, session.state_digest())
+        with open(path, "wb") as f:
+            f.write(header)
+            f.write(zlib.compress(bytes(self.ticks), 9))
+        print(f"🎬 Replay salvo: {path} ({self.count} ticks)")
+
+def load_replay(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, flags, tick_rate, seed, count, digest = REPLAY_HEADER.unpack_from(data)
+    if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+        raise ValueError(f"arquivo de replay inválido: {path}")
+    ticks = zlib.decompress(data[REPLAY_HEADER.size:])
+    if len(ticks) != count * REPLAY_TICK.size:
+        raise ValueError(f"replay truncado: {path}")
+    return {"flags": flags, "tick_rate": tick_rate, "seed": seed, "count": count,
+            "digest": digest, "ticks": ticks}
+
+def play_replay(path):
+    """Reproduz um replay sem janela e o mais rápido possível.
+    Devolve (sessão, confere_com_a_gravação, segundos gastos)"""
+    rep = load_replay(path)
+    session = GameSession(two_player=bool(rep["flags"] & REPLAY_FLAG_TWO_PLAYER), audio=False,
+                          record_highscores=False, bullet_storm=bool(rep["flags"] & REPLAY_FLAG_STORM),
+                          seed=rep["seed"], rewind=False, tick_rate=rep["tick_rate"])
+    dt = session.dt
+    start = time.perf_counter()
+    for rec in REPLAY_TICK.iter_unpack(rep["ticks"]):
+        session.step(unpack_inputs(*rec), dt)
+    elapsed = time.perf_counter() - start
+    return session, session.state_digest() == rep["digest"], elapsed
+
+# ---------------- Save / Load ----------------
+class SaveWriter:
+    """Grava saves numa thread: o estado é copiado na thread principal (tuplas
+    simples) e a serialização + escrita acontecem fora do loop do jogo.
+
+    A escrita vai para um arquivo temporário trocado com os.replace, então uma
+    queda no meio da gravação nunca deixa o save pela metade. Pedidos acumulados
+    para o mesmo arquivo são juntados: só o mais recente é gravado.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._pending = {}   # caminho -> (dados, codificador, mensagem)
+        self._busy = False
+        self._thread = None
+        self.writes = 0
+
+    def submit(self, path, data, encode=None, message=None):
+        """Agenda a gravação; encode(data) -> bytes roda na thread (None = data já em bytes)"""
+        with self._cond:
+            self._pending[path] = (data, encode, message)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="save-writer", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                path, (data, encode, message) = self._pending.popitem()
+                self._busy = True
+            try:
+                write_file_atomic(path, encode(data) if encode else data)
+                self.writes += 1
+                if message:
+                    print(message)
+            except Exception as e:
+                print(f"⚠ Erro ao salvar jogo: {e}")
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+    def flush(self, timeout=5.0):
+        """Espera as gravações pendentes (antes de carregar o save ou ao sair)"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._busy:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+SAVE_WRITER = SaveWriter()
+
+# Formato binário do save (little-endian). Cabeçalho: magic, versão, flags,
+# tamanho e CRC32 do corpo descomprimido. Corpo: sessão, estado do RNG, os dois
+# jogadores, a ordem do all_sprites e um bloco "quantidade + registros" por tipo
+# de sprite. Mudou algum registro ou enum abaixo: incrementar SAVE_VERSION.
+SAVE_MAGIC = b"NDSV"
+SAVE_VERSION = 1
+SAVE_FLAG_ZLIB = 1
+SAVE_HEADER = struct.Struct("<4sBBII")
+SAVE_SESSION = struct.Struct("<dIqBBB?dIIIqq?")
+SAVE_RNG = struct.Struct("<625I?d")
+SAVE_PLAYER = struct.Struct("<iiddhhibB?????qqqqqdd")
+SAVE_METEOR = struct.Struct("<Biiddddddh")
+SAVE_ENEMY = struct.Struct("<iihqqq")
+SAVE_BOSS = struct.Struct("<iiddqqqbqqdB")
+SAVE_BULLET = struct.Struct("<iiddddB")
+SAVE_POWERUP = struct.Struct("<Biiddd")
+SAVE_EXPLOSION = struct.Struct("<iiHq")
+SAVE_COUNT = struct.Struct("<I")
+
+SAVE_PHASE_STATES = ("asteroids", "transition", "phase2", "boss_transition", "phase3", "victory", "game_over")
+SAVE_GAME_STATES = ("playing", "next_phase", "game_over", "victory")
+SAVE_METEOR_KINDS = ("default", "evil", "power", "invul", "extra_life", "teleporter", "revive", "shield")
+SAVE_BOSS_MODES = ("normal", "spread", "rapid", "storm")
+# Tipos na ordem do all_sprites (um byte por sprite)
+SAVE_SPRITE_CODES = {Player: b"P", Meteor: b"M", EnemyShip: b"E", Boss: b"C",
+                     Bullet: b"T", Powerup: b"U", Explosion: b"X"}
+
+def _opt(value):
+    return -1 if value is None else int(value)
+
+def snapshot_world(session):
+    """Estado completo da partida em tuplas simples (thread principal; encode_save faz o resto)"""
+    s = session
+    rng_version, rng_state, gauss = s.rng.getstate()
+    snap = {
+        "session": (s.time_ms, s.frame, _opt(s.seed), s.phase, SAVE_PHASE_STATES.index(s.phase_state),
+                    SAVE_GAME_STATES.index(s.game_state), s.two_player, s.speed_mult, s.enemies_total,
+                    s.enemies_killed, s.current_enemy_wave, _opt(s.transition_start),
+                    _opt(s.last_minion_spawn), s.projectiles is not None),
+        "rng": rng_state + (gauss is not None, gauss or 0.0),
+        "players": [(p.rect.x, p.rect.y, p._fx, p._fy, int(p.health), p.max_health, p.score, p.lives,
+                     p.extra_guns, p.teleport_ability, p.is_alive, p.mouse_control, p.has_shield,
+                     p.is_upgraded, int(p.last_shot), int(p.invulnerable_until), int(p.upgrade_end_time),
+                     int(p.shield_end_time), int(p.respawn_timer), p.respawn_blink, p.shield_alpha)
+                    for p in (s.player1, s.player2)],
+        "order": b"".join(SAVE_SPRITE_CODES.get(type(spr), b"?") for spr in s.all_sprites),
+        "meteors": [], "enemies": [], "boss": [], "bullets": [], "powerups": [], "explosions": [],
+        "projectiles": None,
+    }
+    for spr in s.all_sprites:
+        kind = type(spr)
+        if kind is Meteor:
+            snap["meteors"].append((SAVE_METEOR_KINDS.index(spr.kind), spr.rect.x, spr.rect.y, spr._fx, spr._fy,
+                                    spr.speedx, spr.speedy, spr.rot, spr.rot_speed, spr.frame_index))
+        elif kind is EnemyShip:
+            snap["enemies"].append((spr.rect.x, spr.rect.y, spr.health, spr.shoot_delay,
+                                    spr.last_shot, spr.move_timer))
+        elif kind is Boss:
+            snap["boss"].append((spr.rect.x, spr.rect.y, spr._fx, spr._fy, int(spr.health), spr.shoot_delay,
+                                 int(spr.last_shot), spr.move_dir, int(spr.attack_timer),
+                                 int(spr.attack_duration), spr.storm_angle,
+                                 SAVE_BOSS_MODES.index(spr.attack_mode)))
+        elif kind is Bullet:
+            shooter = 1 if spr in s.player_bullets[1] else 2 if spr in s.player_bullets[2] else 0
+            snap["bullets"].append((spr.rect.centerx, spr.rect.centery, spr._fx, spr._fy,
+                                    spr.speed, spr.speedx, shooter))
+        elif kind is Powerup:
+            ptype = POWERUP_TYPES.index(spr.ptype) + 1 if spr.ptype in POWERUP_TYPES else 0
+            snap["powerups"].append((ptype, spr.rect.centerx, spr.rect.centery, spr._fx, spr._fy,
+                                     spr.float_offset))
+        elif kind is Explosion:
+            snap["explosions"].append((spr.rect.centerx, spr.rect.centery, getattr(spr, "index", 0),
+                                       int(getattr(spr, "last", 0))))
+    pf = s.projectiles
+    if pf is not None and pf.count:
+        c = pf.count
+        snap["projectiles"] = (c, pf.pos[:c].tobytes(), pf.vel[:c].tobytes(), pf.owner[:c].tobytes())
+    return snap
+
+SAVE_RECORDS = (("meteors", SAVE_METEOR), ("enemies", SAVE_ENEMY), ("boss", SAVE_BOSS),
+                ("bullets", SAVE_BULLET), ("powerups", SAVE_POWERUP), ("explosions", SAVE_EXPLOSION))
+
+def encode_save(snap, compress=True):
+    """snapshot_world() -> bytes do arquivo"""
+    parts = [SAVE_SESSION.pack(*snap["session"]), SAVE_RNG.pack(*snap["rng"])]
+    parts += [SAVE_PLAYER.pack(*p) for p in snap["players"]]
+    parts += [SAVE_COUNT.pack(len(snap["order"])), snap["order"]]
+    for key, rec in SAVE_RECORDS:
+        rows = snap[key]
+        parts.append(SAVE_COUNT.pack(len(rows)))
+        parts += [rec.pack(*row) for row in rows]
+    proj = snap["projectiles"]
+    parts.append(SAVE_COUNT.pack(proj[0] if proj else 0))
+    if proj:
+        parts += proj[1:]
+    body = b"".join(parts)
+    flags = 0
+    payload = body
+    if compress:
+        flags |= SAVE_FLAG_ZLIB
+        payload = zlib.compress(body, 6)
+    return SAVE_HEADER.pack(SAVE_MAGIC, SAVE_VERSION, flags, len(body), zlib.crc32(body)) + payload
+
+def decode_save(data):
+    """bytes do arquivo -> snapshot (mesmo formato de snapshot_world); ValueError se inválido"""
+    if len(data) < SAVE_HEADER.size:
+        raise ValueError("save truncado")
+    magic, version, flags, size, crc = SAVE_HEADER.unpack_from(data)
+    if magic != SAVE_MAGIC:
+        raise ValueError("não é um save do NOVA DESCENT")
+    if version != SAVE_VERSION:
+        raise ValueError(f"versão de save {version} não suportada (esperada {SAVE_VERSION})")
+    body = data[SAVE_HEADER.size:]
+    if flags & SAVE_FLAG_ZLIB:
+        body = zlib.decompress(body)
+    if len(body) != size or zlib.crc32(body) != crc:
+        raise ValueError("save corrompido (CRC)")
+
+    off = 0
+    def take(rec):
+        nonlocal off
+        values = rec.unpack_from(body, off)
+        off += rec.size
+        return values
+    def take_bytes(n):
+        nonlocal off
+        chunk = body[off:off + n]
+        off += n
+        return chunk
+
+    snap = {"session": take(SAVE_SESSION), "rng": take(SAVE_RNG),
+            "players": [take(SAVE_PLAYER), take(SAVE_PLAYER)]}
+    snap["order"] = take_bytes(take(SAVE_COUNT)[0])
+    for key, rec in SAVE_RECORDS:
+        snap[key] = [take(rec) for _ in range(take(SAVE_COUNT)[0])]
+    count = take(SAVE_COUNT)[0]
+    snap["projectiles"] = (count, take_bytes(count * 8), take_bytes(count * 8), take_bytes(count)) if count else None
+    return snap
+
+def restore_world(session, snap):
+    """Aplica um snapshot na sessão (inverso de snapshot_world)"""
+    s = session
+    (s.time_ms, s.frame, seed, s.phase, phase_state, game_state, s.two_player, s.speed_mult,
+     s.enemies_total, s.enemies_killed, s.current_enemy_wave, transition_start,
+     last_minion_spawn, storm) = snap["session"]
+    s.seed = None if seed < 0 else seed
+    s.phase_state = SAVE_PHASE_STATES[phase_state]
+    s.game_state = SAVE_GAME_STATES[game_state]
+    s.transition_start = None if transition_start < 0 else transition_start
+    s.last_minion_spawn = None if last_minion_spawn < 0 else last_minion_spawn
+    s._prev_centers = {}
+
+    s.clear_groups(s.all_sprites, s.meteors, s.bullets, s.powerups, s.explosions, s.enemies)
+    for grid in (*s.player_bullet_grids.values(), s.enemy_bullet_grid, s.meteor_grid,
+                 s.enemy_grid, s.powerup_grid):
+        grid.clear()
+    if storm and s.projectiles is None and np is not None:
+        s.projectiles = ProjectileField(ASSET_CONFIG["bullet_storm"].get("capacity", 10000), Bullet.image_for("enemy"))
+    if s.projectiles is not None:
+        s.projectiles.clear()
+        if snap["projectiles"]:
+            count, pos, vel, owner = snap["projectiles"]
+            pf = s.projectiles
+            count = min(count, pf.capacity)
+            pf.pos[:count] = np.frombuffer(pos, dtype=np.float32).reshape(-1, 2)[:count]
+            pf.vel[:count] = np.frombuffer(vel, dtype=np.float32).reshape(-1, 2)[:count]
+            pf.owner[:count] = np.frombuffer(owner, dtype=np.int8)[:count]
+            pf.count = count
+            pf.high_water = max(pf.high_water, count)
+
+    for p, pd in zip((s.player1, s.player2), snap["players"]):
+        (p.rect.x, p.rect.y, p._fx, p._fy, p.health, p.max_health, p.score, p.lives, p.extra_guns,
+         p.teleport_ability, p.is_alive, p.mouse_control, p.has_shield, p.is_upgraded, p.last_shot,
+         p.invulnerable_until, p.upgrade_end_time, p.shield_end_time, p.respawn_timer,
+         p.respawn_blink, p.shield_alpha) = pd
+        p.image = p.frames["normal"] if p.is_alive else p.frames["dead"]
+
+    # Recria os sprites na mesma ordem do all_sprites salvo (ordem de update e de colisão)
+    rows = {key: iter(snap[key]) for key, _ in SAVE_RECORDS}
+    players = iter((s.player1, s.player2) if s.two_player else (s.player1,))
+    s.boss = None
+    for code in snap["order"]:
+        code = bytes((code,))
+        if code == b"P":
+            s.all_sprites.add(next(players))
+        elif code == b"M":
+            kind, x, y, fx, fy, speedx, speedy, rot, rot_speed, idx = next(rows["meteors"])
+            m = Meteor(kind=SAVE_METEOR_KINDS[kind], x=0, y=0, rng=s.rng)
+            m.frame_index = idx
+            m.image = m.frames[idx]
+            m.rect = pygame.Rect((x, y), m.frame_sizes[idx])
+            m._fx, m._fy, m.speedx, m.speedy, m.rot, m.rot_speed = fx, fy, speedx, speedy, rot, rot_speed
+            s.all_sprites.add(m); s.meteors.add(m)
+        elif code == b"E":
+            x, y, health, shoot_delay, last_shot, move_timer = next(rows["enemies"])
+            es = EnemyShip(s, 0, 0)
+            es.rect.topleft = (x, y)
+            es.health, es.shoot_delay, es.last_shot, es.move_timer = health, shoot_delay, last_shot, move_timer
+            s.all_sprites.add(es); s.enemies.add(es)
+        elif code == b"C":
+            (x, y, fx, fy, health, shoot_delay, last_shot, move_dir, attack_timer, attack_duration,
+             storm_angle, mode) = next(rows["boss"])
+            boss = Boss(s, 0, 0)
+            boss.rect.topleft = (x, y)
+            boss._fx, boss._fy, boss.health, boss.shoot_delay, boss.last_shot = fx, fy, health, shoot_delay, last_shot
+            boss.move_dir, boss.attack_timer, boss.attack_duration = move_dir, attack_timer, attack_duration
+            boss.storm_angle, boss.attack_mode = storm_angle, SAVE_BOSS_MODES[mode]
+            s.boss = boss
+            s.all_sprites.add(boss)
+        elif code == b"T":
+            x, y, fx, fy, speed, speedx, shooter = next(rows["bullets"])
+            b = BULLET_POOL.acquire(x, y, speed=speed, owner="enemy" if shooter == 0 else "player")
+            b._fx, b._fy, b.speedx = fx, fy, speedx
+            s.add_bullet(b, shooter=None if shooter == 0 else s.player1 if shooter == 1 else s.player2)
+        elif code == b"U":
+            ptype, x, y, fx, fy, float_offset = next(rows["powerups"])
+            pu = POWERUP_POOL.acquire((x, y), ptype=POWERUP_TYPES[ptype - 1] if ptype else None, rng=s.rng)
+            pu._fx, pu._fy, pu.float_offset = fx, fy, float_offset
+            pu.lut_offset = int(float_offset * SINE_LUT_SIZE / (2 * math.pi))
+            s.all_sprites.add(pu); s.powerups.add(pu)
+        elif code == b"X":
+            x, y, index, last = next(rows["explosions"])
+            ex = EXPLOSION_POOL.acquire((x, y), now=last)
+            if not ex._auto_kill:
+                ex.index = min(index, len(ex.frames) - 1)
+                ex.image = ex.frames[ex.index]
+            s.all_sprites.add(ex); s.explosions.add(ex)
+
+    # Por último: construir os sprites acima consome números do RNG
+    rng = snap["rng"]
+    s.rng.setstate((3, tuple(rng[:625]), rng[626] if rng[625] else None))
+
+class RewindBuffer:
+    """Anel de snapshots do mundo em memória, para voltar no tempo sem tocar no disco.
+
+    Um snapshot (o mesmo formato do save binário) a cada `interval` ticks. Eles são
+    agrupados de keyframe_every em keyframe_every: o primeiro do grupo é comprimido
+    sozinho e os demais com zlib usando o primeiro como dicionário (zdict), o que
+    guarda só o que mudou. Quando o anel enche, o grupo mais antigo sai inteiro, então
+    a memória fica limitada. Checkpoints nomeados (início de cada fase) ficam fora
+    do anel e servem para tentar a fase de novo.
+    """
+
+    def __init__(self, interval=30, capacity=40, keyframe_every=10):
+        self.interval = max(1, interval)
+        self.keyframe_every = max(1, keyframe_every)
+        # Cada grupo: [quadro, quadro-chave comprimido, [(quadro, delta), ...]]
+        self._groups = deque(maxlen=max(1, -(-capacity // self.keyframe_every)))
+        self._key_raw = None
+        self.checkpoints = {}
+        self.last_checkpoint = None
+
+    def clear(self):
+        self._groups.clear()
+        self._key_raw = None
+        self.checkpoints.clear()
+        self.last_checkpoint = None
+
+    def capture(self, session, force=False):
+        if not force and session.frame % self.interval:
+            return False
+        raw = encode_save(snapshot_world(session), compress=False)
+        group = self._groups[-1] if self._groups else None
+        if group is None or self._key_raw is None or len(group[2]) + 1 >= self.keyframe_every:
+            self._groups.append([session.frame, zlib.compress(raw, 6), []])
+            self._key_raw = raw
+        else:
+            c = zlib.compressobj(6, zdict=self._key_raw)
+            group[2].append((session.frame, c.compress(raw) + c.flush()))
+        return True
+
+    def frames(self):
+        """Quadros (session.frame) disponíveis, do mais antigo ao mais novo"""
+        out = []
+        for frame, _, deltas in self._groups:
+            out.append(frame)
+            out += [f for f, _ in deltas]
+        return out
+
+    def _locate(self, frame):
+        """(grupo, índice do delta ou -1) do snapshot mais novo com quadro <= frame"""
+        for gi in range(len(self._groups) - 1, -1, -1):
+            group = self._groups[gi]
+            for di in range(len(group[2]) - 1, -1, -1):
+                if group[2][di][0] <= frame:
+                    return gi, di
+            if group[0] <= frame:
+                return gi, -1
+        return None
+
+    def _raw(self, gi, di):
+        """(snapshot, quadro-chave do grupo), ambos descomprimidos"""
+        group = self._groups[gi]
+        key = zlib.decompress(group[1])
+        if di < 0:
+            return key, key
+        d = zlib.decompressobj(zdict=key)
+        return d.decompress(group[2][di][1]) + d.flush(), key
+
+    def restore(self, session, frame=None):
+        """Restaura o snapshot mais novo com quadro <= frame (None = o último) e descarta
+        os posteriores, já que a partida segue por outro caminho. Devolve o quadro ou None"""
+        found = self._locate(session.frame if frame is None else frame)
+        if found is None:
+            found = (0, -1) if self._groups else None   # pediu antes do início do anel: o mais antigo
+        if found is None:
+            return None
+        gi, di = found
+        raw, key = self._raw(gi, di)
+        while len(self._groups) > gi + 1:
+            self._groups.pop()
+        group = self._groups[gi]
+        del group[2][di + 1:]
+        self._key_raw = key
+        restore_world(session, decode_save(raw))
+        return session.frame
+
+    def mark(self, name, session):
+        """Guarda um checkpoint nomeado (ex.: início da fase)"""
+        self.checkpoints[name] = encode_save(snapshot_world(session), compress=True)
+        self.last_checkpoint = name
+
+    def retry(self, session, name=None):
+        data = self.checkpoints.get(name or self.last_checkpoint)
+        if data is None:
+            return False
+        restore_world(session, decode_save(data))
+        self._groups.clear()
+        self._key_raw = None
+        return True
+
+    def export(self, path, frame=None):
+        """Grava um snapshot do anel como arquivo de save (análise de colisões depois do jogo)"""
+        found = self._locate(frame if frame is not None else float("inf"))
+        if found is None:
+            return False
+        write_file_atomic(path, self._raw(*found)[0])
+        return True
+
+    def stats(self):
+        return {"snapshots": len(self.frames()), "checkpoints": len(self.checkpoints),
+                "bytes": sum(len(g[1]) + sum(len(d) for _, d in g[2]) for g in self._groups),
+                "checkpoint_bytes": sum(len(d) for d in self.checkpoints.values())}
+
+def save_game(session, autosave=False):
+    """Salva o estado atual do jogo (a serialização e a escrita no disco são feitas pelo SAVE_WRITER).
+    True só quer dizer que a gravação foi enfileirada; o resultado é informado pela thread"""
+    try:
+        snap = snapshot_world(session)
+    except Exception as e:
+        print(f"⚠ Erro ao salvar jogo: {e}")
+        return False
+    compress = ASSET_CONFIG.get("save_compress", True)
+    SAVE_WRITER.submit(AUTOSAVE_FILE if autosave else SAVE_FILE, snap, lambda data: encode_save(data, compress),
+                       "💾 Autosave feito!" if autosave else "💾 Jogo salvo com sucesso!")
+    return True
+
+def newest_save():
+    """O mais recente entre o save manual e o autosave (None se nenhum existe)"""
+    saves = [p for p in (SAVE_FILE, AUTOSAVE_FILE) if os.path.exists(p)]
+    return max(saves, key=os.path.getmtime) if saves else None
+
+def load_game(session, path=None):
+    """Carrega um save binário: `path` ou, sem ele, o mais recente entre o manual e o autosave;
+    sem nenhum, migra o savegame.json antigo"""
+    SAVE_WRITER.flush()   # um save recém-pedido pode ainda estar sendo gravado
+    if path is None:
+        path = newest_save()
+    try:
+        if path is not None:
+            with open(path, "rb") as f:
+                snap = decode_save(f.read())
+            legacy = None
+        else:
+            with open(LEGACY_SAVE_FILE, "r") as f:
+                legacy = json.load(f)
+    except Exception as e:
+        print("⚠ Falha ao carregar jogo:", e)
+        return False
+
+    if legacy is None:
+        restore_world(session, snap)
+        # Como no save antigo: a partida carregada não pode ser reproduzida desde o início,
+        # então a gravação de replay em andamento é descartada (ver main)
+        session.seed = None
+    else:
+        load_legacy_save(session, legacy)
+        save_game(session)   # próximas leituras já usam o formato novo
+        print("🔄 Save antigo (JSON) convertido para o formato binário")
+    print("✅ Autosave carregado com sucesso!" if path == AUTOSAVE_FILE else "✅ Jogo carregado com sucesso!")
+    return True
+
+def load_legacy_save(session, data):
+    """Aplica um savegame.json antigo (só jogadores e meteoros eram salvos)"""
+    # Partida carregada de save não pode ser reproduzida desde o início (sem semente)
+    session.seed = None
+
+    # Carregar dados básicos
+    session.phase = data.get("phase", 1)
+    session.phase_state = data.get("phase_state", "asteroids")
+    session.game_state = "playing"
+    session.two_player = data.get("two_player", False)
+    session.speed_mult = data.get("global_speed_mult", 1.0)
+    session.enemies_killed = data.get("enemies_killed", 0)
+    session.current_enemy_wave = data.get("current_enemy_wave", 0)
+
+    # Limpar grupos
+    session.clear_groups(session.all_sprites, session.meteors, session.bullets,
+                         session.powerups, session.explosions, session.enemies)
+
+    # Carregar jogadores (P2 só se existir)
+    for key, p, default_x in (("player1", session.player1, WIDTH//2), ("player2", session.player2, WIDTH//4)):
+        if p is session.player2 and not session.two_player:
+            continue
+        pd = data.get(key, {})
+        p.rect.centerx = pd.get("x", default_x)
+        p.rect.centery = pd.get("y", HEIGHT-120)
+        p.health = pd.get("health", 100)
+        p.score = pd.get("score", 0)
+        p.extra_guns = pd.get("extra_guns", 0)
+        p.teleport_ability = pd.get("teleport", False)
+        p.lives = pd.get("lives", 3)
+        p.is_alive = pd.get("is_alive", True)
+
+        # Atualizar imagem do player
+        p.image = p.frames["normal"] if p.is_alive else p.frames["dead"]
+
+        session.all_sprites.add(p)
+
+    # CORREÇÃO CRÍTICA: Recriar meteors corretamente
+    meteors_data = data.get("meteors", [])
+    # Saves antigos guardavam as velocidades em pixels por frame
+    unit = 1 if data.get("speed_units") == "px/s" else Meteor.SPEED_UNIT
+    for md in meteors_data:
+        # Usar o construtor corrigido que aceita x e y
+        m = Meteor(
+            kind=md.get("kind", "default"),
+            x=md.get("x", session.rng.randint(40, WIDTH-40)),
+            y=md.get("y", session.rng.randint(-300, -40)),
+            rng=session.rng
+        )
+
+        # Restaurar atributos adicionais
+        m.speedy = md.get("speedy", 1) * unit
+        m.speedx = md.get("speedx", 0) * unit
+        m.rot = md.get("rot", 0)
+        m.rot_speed = md.get("rot_speed", session.rng.randint(-5,5)) * unit
+        m.damage = 40 if md.get("kind") == "evil" else 20
+
+        # Adicionar aos grupos
+        session.meteors.add(m)
+        session.all_sprites.add(m)
+
+    # Se não houver meteors no save, criar novos
+    if len(session.meteors) == 0 and session.phase_state == "asteroids":
+        for _ in range(MAX_METEORS):
+            m = Meteor(kind=session.rng.choice(["default","default","evil"]), rng=session.rng)
+            session.all_sprites.add(m)
+            session.meteors.add(m)
+
+# ---------------- Menus ----------------
+menu_options = ["Jogar 1 Jogador", "Jogar 2 Jogadores", "Controles", "Highscores", "Ajustar Volume", "Carregar Jogo", "Sair"]
+menu_index = 0
+
+# Menu de volume
+volume_options = ["Volume Geral", "Volume Música", "Volume Efeitos",
+                  "Volume Tiros", "Volume Explosões", "Volume Powerups",
+                  "Volume Respawn", "Restaurar Padrão", "Voltar ao Menu"]
+volume_index = 0
+volume_adjusting = False
+current_volume_type = "master"
+
+# Quadros da tela de highscores: (modo, resultado, título)
+highscore_boards = [("all", "all", "Geral"), ("solo", "all", "Solo"), ("duo", "all", "Dupla"),
+                    ("all", "victory", "Vitórias"), ("all", "partial", "Progresso parcial")]
+highscore_board_index = 0
+
+# Menu de pausa
+pause_options = ["Continuar", "Controles", "Ajustar Volume", "Salvar Jogo", "Carregar Jogo", "Voltar ao Menu", "Sair"]
+pause_index = 0
+
+# Funções para o menu de volume
+def draw_volume_menu(screen):
+    """Desenha o menu de ajuste de volume"""
+    overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+    overlay.fill((0, 0, 0, 220))
+    screen.blit(overlay, (0, 0))
+    
+    draw_text(screen, "🎵 CONFIGURAÇÃO DE VOLUME", 60, WIDTH//2, 60)
+    
+    for i, opt in enumerate(volume_options):
+        color = (255, 255, 0) if i == volume_index else (200, 200, 200)
+        
+        if opt == "Restaurar Padrão":
+            draw_text(screen, opt, 36, WIDTH//2, 180 + i*55, color)
+        elif opt == "Voltar ao Menu":
+            draw_text(screen, opt, 36, WIDTH//2, 180 + i*55, color)
+        else:
+            # Extrair o tipo de volume do texto
+            vol_type = ""
+            if "Geral" in opt:
+                vol_type = "master"
+            elif "Música" in opt:
+                vol_type = "music"
+            elif "Efeitos" in opt:
+                vol_type = "effects"
+            elif "Tiros" in opt:
+                vol_type = "shoot"
+            elif "Explosões" in opt:
+                vol_type = "explosion"
+            elif "Powerups" in opt:
+                vol_type = "powerup"
+            elif "Respawn" in opt:
+                vol_type = "respawn"
+            
+            current_vol = VOLUME_CONFIG.get(vol_type, 0.5) * 100
+            bar_width = 200
+            bar_height = 20
+            bar_x = WIDTH//2 - bar_width//2
+            bar_y = 180 + i*55 + 25
+            
+            # Barra de volume
+            fill_width = int((current_vol / 100) * bar_width)
+            pygame.draw.rect(screen, (50, 50, 50), (bar_x, bar_y, bar_width, bar_height))
+            pygame.draw.rect(screen, color, (bar_x, bar_y, fill_width, bar_height))
+            pygame.draw.rect(screen, (255, 255, 255), (bar_x, bar_y, bar_width, bar_height), 2)
+            
+            # Texto com porcentagem
+            display_text = f"{opt}: {current_vol:.0f}%"
+            if volume_adjusting and vol_type == current_volume_type:
+                display_text = f"> {display_text} <"
+            
+            draw_text(screen, display_text, 30, WIDTH//2, 180 + i*55, color)
+    
+    if volume_adjusting:
+        draw_text(screen, "Use ← → para ajustar, ENTER para confirmar", 22, WIDTH//2, HEIGHT-80)
+    else:
+        draw_text(screen, "Use ↑↓ para navegar, ENTER para selecionar", 22, WIDTH//2, HEIGHT-80)
+    
+    draw_text(screen, "ESC para voltar sem salvar", 20, WIDTH//2, HEIGHT-40)
+
+def update_volume(type_key, delta):
+    """Atualiza um tipo específico de volume"""
+    global VOLUME_CONFIG
+    
+    current = VOLUME_CONFIG.get(type_key, 0.5)
+    new_volume = max(0.0, min(1.0, current + delta))
+    VOLUME_CONFIG[type_key] = new_volume
+    
+    # Aplicar imediatamente
+    if type_key == "master" or type_key == "music":
+        set_music_volume()
+    
+    # Aplicar volumes aos sons existentes
+    AUDIO.refresh_volumes(type_key)
+    
+    return new_volume
+
+def restore_default_volumes():
+    """Restaura os volumes padrão"""
+    global VOLUME_CONFIG
+    VOLUME_CONFIG = DEFAULT_VOLUMES.copy()
+    
+    # Aplicar volumes
+    set_music_volume()
+    AUDIO.refresh_volumes()
+    
+    save_volume_config(VOLUME_CONFIG)
+
+# ---------------- Inicialização ----------------
+def init_display(headless=False):
+    """Inicializa o pygame e abre a janela (ou o driver dummy no modo headless)"""
+    if headless:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pygame.init()
+    surf = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("🚀 NOVA DESCENT - Controle de Volume")
+    return surf
+
+# ---------------- Main Loop ----------------
+def parse_args(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="NOVA DESCENT")
+    parser.add_argument("--dirty", action="store_true", default=ASSET_CONFIG.get("dirty_rendering", False),
+                        help="renderiza só os retângulos alterados durante o jogo")
+    parser.add_argument("--storm", action="store_true", default=ASSET_CONFIG["bullet_storm"].get("enabled", False),
+                        help="habilita o ataque \"tempestade\" do chefão (requer numpy)")
+    parser.add_argument("--tick-rate", type=int, default=TICK_RATE,
+                        help="ticks de simulação por segundo (padrão %(default)s)")
+    parser.add_argument("--fps", type=int, default=ASSET_CONFIG.get("render_fps", 60),
+                        help="limite de quadros desenhados por segundo, 0 = sem limite (padrão %(default)s)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="semente fixa para todas as partidas (padrão: sorteada a cada partida)")
+    parser.add_argument("--record", metavar="ARQUIVO",
+                        help="grava as entradas de cada partida em um replay binário")
+    parser.add_argument("--replay", metavar="ARQUIVO",
+                        help="reproduz um replay sem janela, o mais rápido possível, e sai")
+    parser.add_argument("--build-bundle", action="store_true",
+                        help="gera o pacote de assets (ASSET_CONFIG['asset_bundle']) e sai")
+    parser.add_argument("--no-bundle", action="store_true",
+                        help="ignora o pacote de assets e lê os arquivos soltos")
+    parser.add_argument("--profile", action="store_true",
+                        help="liga o profiler de frames e o overlay (F3 alterna durante o jogo)")
+    parser.add_argument("--profile-out", metavar="ARQUIVO",
+                        help="ao sair, exporta o profiler em CSV ou, se terminar em .json, trace do Chrome")
+    parser.add_argument("--startup-time", action="store_true",
+                        help="mede o tempo até o primeiro frame do menu, mostra e sai")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    global menu_index, volume_index, volume_adjusting, current_volume_type, pause_index, highscore_board_index
+
+    main_start = time.perf_counter()
+    args = parse_args(argv)
+    if args.build_bundle:
+        path, count = build_asset_bundle()
+        print(f"📦 Pacote gerado: {path} ({count} assets, {os.path.getsize(path) // 1024} KB)")
+        sys.exit(0)
+    if args.replay:
+        init_display(headless=True)
+        session, ok, elapsed = play_replay(args.replay)
+        print(f"🎬 {session.frame} ticks em {elapsed:.2f}s ({session.frame / max(elapsed, 1e-9):.0f} ticks/s) - "
+              f"{session.game_state}/{session.phase_state}, pontos {session.total_score()}")
+        print("✅ Replay reproduzido exatamente" if ok else "❌ Replay divergiu da gravação")
+        pygame.quit()
+        sys.exit(0 if ok else 1)
+
+    screen = init_display()
+    clock = pygame.time.Clock()
+    # A sessão (jogadores, meteoros, pools) só é montada ao escolher "Jogar" ou
+    # "Carregar Jogo": o menu aparece sem esperar por nada disso
+    background = Background()
+    session = None
+    def open_session(two_p=False):
+        """(sessão, recém-montada): o construtor já faz o reset() no modo e na semente pedidos"""
+        nonlocal session
+        ASSETS.finish_preload()   # nada pode ser decodificado durante o jogo
+        if session is not None:
+            return session, False
+        session = GameSession(two_player=two_p, bullet_storm=args.storm, seed=args.seed,
+                              autosave=ASSET_CONFIG.get("autosave", True), background=background,
+                              tick_rate=max(1, args.tick_rate))
+        return session, True
+    def new_game(two_p):
+        s, fresh = open_session(two_p)
+        if fresh:
+            change_music("asteroids")   # a única parte do reset(music=True) que o construtor pula
+        else:
+            s.reset(two_p=two_p, seed=args.seed)
+    first_frame_ms = None
+    recorder = None
+    PROFILER.enabled = bool(args.profile or args.profile_out)
+    PROFILER.visible = bool(args.profile)
+    # Imagens/sons são decodificados numa thread enquanto o menu está aberto
+    # (com o pacote, as imagens só são mapeadas: nada para decodificar nem escalar)
+    if not args.no_bundle and bundle_path():
+        ASSETS.open_bundle(bundle_path())
+    ASSETS.start_preload(build_preload_manifest(), preload_warmups(background))
+    renderer = DirtyRenderer() if args.dirty else None
+
+    running = True
+    pause_menu = False
+    game_state = "intro"
+    teleport_requested = False
+    mouse_toggle_requested = False
+    # Passo fixo: o acumulador guarda o tempo real ainda não simulado
+    tick_dt = 1.0 / max(1, args.tick_rate)   # o mesmo dt da sessão (GameSession(tick_rate=...))
+    max_frame_time = ASSET_CONFIG.get("max_frame_time", 0.25)
+    accumulator = 0.0
+
+    # Tocar música inicial
+    try:
+        change_music("asteroids")
+    except:
+        pass
+
+    while running:
+        frame_dt = min(clock.tick(args.fps) / 1000.0, max_frame_time)
+        PROFILER.begin_frame()
+
+        # --- events ---
+        events_start = time.perf_counter()
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_F3:
+                    PROFILER.visible = not PROFILER.visible
+                    PROFILER.enabled = PROFILER.visible or bool(args.profile_out)
+
+                # MENU PRINCIPAL
+                if game_state == "intro":
+                    if event.key == pygame.K_UP:
+                        menu_index = (menu_index - 1) % len(menu_options)
+                    elif event.key == pygame.K_DOWN:
+                        menu_index = (menu_index + 1) % len(menu_options)
+                    elif event.key == pygame.K_RETURN:
+                        escolha = menu_options[menu_index]
+                        if escolha == "Jogar 1 Jogador":
+                            new_game(two_p=False); game_state = "playing"
+                        elif escolha == "Jogar 2 Jogadores":
+                            new_game(two_p=True); game_state = "playing"
+                        elif escolha == "Controles":
+                            game_state = "controls"
+                        elif escolha == "Highscores":
+                            game_state = "highscores"
+                        elif escolha == "Ajustar Volume":
+                            game_state = "volume_menu"
+                            volume_index = 0
+                            volume_adjusting = False
+                        elif escolha == "Carregar Jogo":
+                            if load_game(open_session()[0]):
+                                game_state = "playing"
+                            else:
+                                print("❌ Não foi possível carregar o jogo")
+                        elif escolha == "Sair":
+                            running = False
+
+                # MENU DE VOLUME
+                elif game_state == "volume_menu":
+                    if event.key == pygame.K_ESCAPE:
+                        # Salvar configurações ao sair
+                        save_volume_config(VOLUME_CONFIG)
+                        game_state = "intro"
+
+                    if volume_adjusting:
+                        if event.key == pygame.K_LEFT:
+                            update_volume(current_volume_type, -0.05)
+                        elif event.key == pygame.K_RIGHT:
+                            update_volume(current_volume_type, 0.05)
+                        elif event.key == pygame.K_RETURN or event.key == pygame.K_ESCAPE:
+                            volume_adjusting = False
+                            # Salvar configurações
+                            save_volume_config(VOLUME_CONFIG)
+                    else:
+                        if event.key == pygame.K_UP:
+                            volume_index = (volume_index - 1) % len(volume_options)
+                        elif event.key == pygame.K_DOWN:
+                            volume_index = (volume_index + 1) % len(volume_options)
+                        elif event.key == pygame.K_RETURN:
+                            escolha = volume_options[volume_index]
+
+                            if escolha == "Restaurar Padrão":
+                                restore_default_volumes()
+                            elif escolha == "Voltar ao Menu":
+                                save_volume_config(VOLUME_CONFIG)
+                                game_state = "intro"
+                            else:
+                                # Determinar tipo de volume
+                                vol_type = ""
+                                if "Geral" in escolha:
+                                    vol_type = "master"
+                                elif "Música" in escolha:
+                                    vol_type = "music"
+                                elif "Efeitos" in escolha:
+                                    vol_type = "effects"
+                                elif "Tiros" in escolha:
+                                    vol_type = "shoot"
+                                elif "Explosões" in escolha:
+                                    vol_type = "explosion"
+                                elif "Powerups" in escolha:
+                                    vol_type = "powerup"
+                                elif "Respawn" in escolha:
+                                    vol_type = "respawn"
+
+                                if vol_type:
+                                    volume_adjusting = True
+                                    current_volume_type = vol_type
+
+                # JOGO EM ANDAMENTO
+                elif game_state == "playing":
+                    if event.key == pygame.K_ESCAPE:
+                        if pause_menu:
+                            pause_menu = False  # ESC fecha o menu de pausa
+                        else:
+                            pause_menu = True  # ESC abre o menu de pausa
+
+                    # Menu de pausa - navegação
+                    if pause_menu:
+                        if event.key == pygame.K_UP:
+                            pause_index = (pause_index - 1) % len(pause_options)
+                        elif event.key == pygame.K_DOWN:
+                            pause_index = (pause_index + 1) % len(pause_options)
+                        elif event.key == pygame.K_RETURN:
+                            escolha = pause_options[pause_index]
+
+                            if escolha == "Continuar":
+                                pause_menu = False
+                            elif escolha == "Controles":
+                                game_state = "controls"
+                                pause_menu = False
+                            elif escolha == "Ajustar Volume":
+                                game_state = "volume_menu"
+                                volume_index = 0
+                                volume_adjusting = False
+                                pause_menu = False
+                            elif escolha == "Salvar Jogo":
+                                # O sucesso (ou a falha) é anunciado pelo SAVE_WRITER quando a gravação termina
+                                save_game(session)
+                                pause_menu = False
+                            elif escolha == "Carregar Jogo":
+                                if load_game(session):
+                                    game_state = "playing"
+                                pause_menu = False
+                            elif escolha == "Voltar ao Menu":
+                                game_state = "intro"
+                                pause_menu = False
+                            elif escolha == "Sair":
+                                running = False
+
+                    # Tecla P ainda funciona para pausar
+                    if event.key == pygame.K_p:
+                        pause_menu = not pause_menu
+
+                    if event.key == pygame.K_f:
+                        save_game(session)
+
+                    if event.key == pygame.K_l:
+                        if load_game(session):
+                            game_state = "playing"
+
+                    if event.key == pygame.K_m:
+                        mouse_toggle_requested = True
+
+                    if event.key == pygame.K_t:
+                        teleport_requested = True
+
+                    if event.key == pygame.K_F9 and not pause_menu:
+                        if session.rewind_seconds(5) and renderer:
+                            renderer.invalidate()
+
+                # OUTROS ESTADOS (controles, highscores, etc)
+                elif game_state in ["controls", "highscores", "game_over", "victory"]:
+                    if event.key == pygame.K_ESCAPE:
+                        game_state = "intro"
+                    elif event.key == pygame.K_RETURN:
+                        game_state = "intro"
+                    elif event.key in (pygame.K_LEFT, pygame.K_RIGHT) and game_state == "highscores":
+                        step = 1 if event.key == pygame.K_RIGHT else -1
+                        highscore_board_index = (highscore_board_index + step) % len(highscore_boards)
+                    elif event.key == pygame.K_r and game_state == "game_over":
+                        session.reset(two_p=session.two_player, seed=args.seed); game_state = "playing"
+                    elif event.key == pygame.K_c and game_state == "game_over":
+                        if session.retry_phase():
+                            game_state = session.game_state
+                            if renderer:
+                                renderer.invalidate()
+
+        if PROFILER.enabled:
+            PROFILER.add("eventos", events_start, time.perf_counter())
+
+        # O pré-carregamento só começa a consumir tempo depois do primeiro frame
+        if first_frame_ms is not None and not ASSETS.preload_finished():
+            ASSETS.poll_preload()
+        MUSIC.update()
+
+        # --- simulação ---
+        if game_state in ("playing", "next_phase") and not pause_menu:
+            accumulator += frame_dt
+            inputs = read_inputs(pygame.key.get_pressed(), pygame.mouse.get_pos())
+            while accumulator >= tick_dt and game_state in ("playing", "next_phase"):
+                inputs[1]['teleport'] = teleport_requested
+                inputs[1]['mouse_toggle'] = mouse_toggle_requested
+                teleport_requested = mouse_toggle_requested = False
+                if args.record:
+                    if session.frame == 0 and session.seed is not None:
+                        # Partida nova (reset): começa outra gravação
+                        recorder = ReplayRecorder(session)
+                    elif recorder is not None and session.seed is None:
+                        print("⚠ Jogo carregado de save: gravação do replay descartada")
+                        recorder = None
+                    if recorder is not None:
+                        recorder.record(inputs)
+                session.step(inputs, tick_dt)
+                accumulator -= tick_dt
+                game_state = session.game_state
+        else:
+            accumulator = 0.0
+        if recorder is not None and game_state not in ("playing", "next_phase"):
+            recorder.save(args.record, session)
+            recorder = None
+        alpha = accumulator / tick_dt
+
+        # --- DRAW SECTION ---
+        dirty_rects = None
+        if game_state in ("intro", "controls", "highscores", "volume_menu"):
+            screen.fill((0,0,0))
+            if renderer:
+                renderer.invalidate()
+
+        if game_state == "intro":
+            draw_text(screen, "🚀 NOVA DESCENT 🚀", 72, WIDTH//2, 60)
+            draw_text(screen, "MENU PRINCIPAL", 40, WIDTH//2, 140)
+            for i, opt in enumerate(menu_options):
+                cor = (255,255,0) if i == menu_index else (200,200,200)
+                draw_text(screen, opt, 36, WIDTH//2, 220 + i*55, cor)
+            draw_text(screen, "Use ↑↓ para navegar, ENTER para selecionar", 22, WIDTH//2, HEIGHT-60)
+            if not ASSETS.preload_finished():
+                pct = ASSETS.preload_progress()
+                bar = pygame.Rect(WIDTH//2 - 150, HEIGHT-20, 300, 8)
+                pygame.draw.rect(screen, (60,60,60), bar)
+                pygame.draw.rect(screen, (100,200,255), (bar.x, bar.y, int(bar.width * pct), bar.height))
+                draw_text(screen, f"Carregando recursos... {int(pct * 100)}%", 18, WIDTH//2, HEIGHT-38, (150,150,150))
+
+        elif game_state == "controls":
+            draw_text(screen, "📋 CONTROLES", 60, WIDTH//2, 60)
+
+            draw_text(screen, "🎮 JOGADOR 1:", 36, WIDTH//2, 150, (100, 200, 255))
+            draw_text(screen, "WASD - Movimentar", 28, WIDTH//2, 190)
+            draw_text(screen, "ESPAÇO - Atirar", 28, WIDTH//2, 225)
+            draw_text(screen, "T - Teleportar (quando disponível)", 28, WIDTH//2, 260)
+            draw_text(screen, "M - Ativar/Desativar controle do mouse", 28, WIDTH//2, 295)
+
+            draw_text(screen, "🎮 JOGADOR 2:", 36, WIDTH//2, 350, (255, 100, 100))
+            draw_text(screen, "SETAS - Movimentar", 28, WIDTH//2, 390)
+            draw_text(screen, "KP0 ou RCTRL - Atirar", 28, WIDTH//2, 425)
+
+            draw_text(screen, "🔄 COMANDOS GERAIS:", 36, WIDTH//2, 490, (200, 255, 100))
+            draw_text(screen, "P - Pausar/Despausar", 28, WIDTH//2, 530)
+            draw_text(screen, "ESC - Menu de Pausa/Sair", 28, WIDTH//2, 565)
+            draw_text(screen, "R - Reiniciar (apenas no GAME OVER)", 28, WIDTH//2, 600)
+            draw_text(screen, "F - Salvar jogo | L - Carregar jogo | F9 - Voltar 5 segundos", 28, WIDTH//2, 635)
+
+            draw_text(screen, "Pressione ENTER ou ESC para voltar ao menu", 24, WIDTH//2, HEIGHT-50)
+
+        elif game_state == "highscores":
+            mode, outcome, board_title = highscore_boards[highscore_board_index]
+            highscores = HIGHSCORES.top(mode, outcome)
+            draw_text(screen, f"🏆 HIGHSCORES - {board_title}", 60, WIDTH//2, 60)
+
+            if not highscores:
+                draw_text(screen, "Nenhum highscore registrado ainda!", 36, WIDTH//2, HEIGHT//2)
+            else:
+                for i, hs in enumerate(highscores[:10]):
+                    name = hs.get("name", "Unknown")
+                    score = hs.get("score", 0)
+                    progress = hs.get("progress", "Fase 1")
+                    date = hs.get("date", "N/A")
+                    victory = hs.get("victory", False)
+
+                    # Destaque para os 3 primeiros
+                    if i == 0:
+                        color = (255, 215, 0)  # Ouro
+                        medal = "🥇"
+                    elif i == 1:
+                        color = (192, 192, 192)  # Prata
+                        medal = "🥈"
+                    elif i == 2:
+                        color = (205, 127, 50)  # Bronze
+                        medal = "🥉"
+                    else:
+                        color = (200, 200, 200)
+                        medal = f"{i+1}."
+
+                    y_pos = 150 + i * 50
+
+                    # Nome e pontuação
+                    draw_text(screen, f"{medal} {name}: {score} pts", 26, WIDTH//2 - 180, y_pos, color)
+
+                    # Progresso (com emoji se venceu)
+                    progress_text = f"✓ {progress}" if victory else f"→ {progress}"
+                    progress_color = (100, 255, 100) if victory else (200, 200, 100)
+                    draw_text(screen, progress_text, 22, WIDTH//2 + 100, y_pos, progress_color)
+
+                    # Data
+                    draw_text(screen, f"({date})", 18, WIDTH//2 + 100, y_pos + 25, (150, 150, 150))
+
+            draw_text(screen, "← → troca o quadro | ENTER ou ESC volta ao menu", 24, WIDTH//2, HEIGHT-50)
+
+        elif game_state == "volume_menu":
+            draw_volume_menu(screen)
+
+        else:
+            if renderer:
+                dirty_rects = renderer.render(session, screen, overlay=pause_menu or PROFILER.visible, alpha=alpha)
+            else:
+                screen.fill((0,0,0))
+                session.draw(screen, alpha)
+
+            # Menu de pausa sobreposto
+            if pause_menu and game_state == "playing":
+                # Semi-transparência sobre o jogo
+                overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+                overlay.fill((0, 0, 0, 180))
+                screen.blit(overlay, (0, 0))
+
+                draw_text(screen, "⏸️ JOGO PAUSADO", 60, WIDTH//2, 120)
+
+                for i, opt in enumerate(pause_options):
+                    cor = (255, 255, 0) if i == pause_index else (200, 200, 200)
+                    draw_text(screen, opt, 36, WIDTH//2, 220 + i*55, cor)
+
+                draw_text(screen, "Use ↑↓ para navegar, ENTER para selecionar", 22, WIDTH//2, HEIGHT-60)
+
+        if PROFILER.visible:
+            PROFILER.draw(screen)
+
+        with PROFILER.section("flip"):
+            if dirty_rects is not None:
+                pygame.display.update(dirty_rects)
+            else:
+                pygame.display.flip()
+        PROFILER.end_frame(session.group_counts() if session else None)
+
+        if first_frame_ms is None:
+            first_frame_ms = (time.perf_counter() - STARTUP_T0) * 1000.0
+            if args.startup_time:
+                print(f"⏱ Primeiro frame em {first_frame_ms:.1f} ms "
+                      f"(imports {(main_start - STARTUP_T0) * 1000.0:.1f} ms, "
+                      f"janela e menu {first_frame_ms - (main_start - STARTUP_T0) * 1000.0:.1f} ms)")
+                running = False
+
+    if recorder is not None:
+        recorder.save(args.record, session)
+    if args.profile_out:
+        PROFILER.export(args.profile_out)
+        print(f"⏱ Profiler exportado: {args.profile_out} ({PROFILER.frames} frames)")
+    SAVE_WRITER.flush()
+    HIGHSCORES.flush()
+    pygame.quit()
+    sys.exit()
+
+if __name__ == "__main__":
+    main()
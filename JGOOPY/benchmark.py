@@ -0,0 +1,259 @@
+# benchmark.py
+# Benchmark sem janela do NOVA DESCENT: cenários roteirizados, resultado em JSON.
+#
+#   python benchmark.py                          # todos os cenários, 1800 ticks cada
+#   python benchmark.py --out antes.json         # salva para comparar versões
+#   python benchmark.py --game outra/NOVA_DESCENT.py --scenario fase1_densa
+#
+# Cada cenário roda em um processo separado (pools, caches e pico de memória isolados).
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows: sem ru_maxrss
+    resource = None
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_GAME = os.path.join(HERE, "NOVA_DESCENT.py")
+FOREVER = 10 ** 12   # duração "infinita" (ms) para escudos, upgrades e ataques do chefão
+
+# ---------------- Carregar o jogo ----------------
+def load_game_module(path):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    spec = importlib.util.spec_from_file_location("nova_descent_bench", path)
+    nd = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(nd)
+    return nd
+
+# ---------------- Cenários ----------------
+# setup(nd, session) prepara a sessão; os jogadores ficam com escudo para o
+# cenário não terminar em game over no meio da medição.
+def _shield_all(session):
+    for p in (session.player1, session.player2) if session.two_player else (session.player1,):
+        p.activate_shield(FOREVER)
+
+def setup_phase1_dense(nd, session):
+    nd.MAX_METEORS = 60
+    nd.POINTS_TO_NEXT_PHASE = FOREVER
+    session.reset(two_p=False, music=False, seed=session.seed)
+    _shield_all(session)
+
+def setup_phase2_waves(nd, session):
+    nd.TOTAL_ENEMIES_PHASE2 = FOREVER   # ondas sem fim
+    nd.ENEMIES_PER_WAVE = 8
+    session.clear_groups(session.meteors)
+    session.phase_state = "phase2"
+    session.current_enemy_wave = 1
+    session.spawn_enemy_wave(nd.ENEMIES_PER_WAVE)
+    _shield_all(session)
+
+def make_boss_setup(mode):
+    def setup(nd, session):
+        session.clear_groups(session.meteors)
+        session.phase_state = "phase3"
+        session.boss = nd.Boss(session, nd.WIDTH // 2, 150)
+        session.boss.health = FOREVER
+        session.boss.attack_mode = mode
+        session.boss.attack_duration = FOREVER
+        session.all_sprites.add(session.boss)
+        _shield_all(session)
+    return setup
+
+def setup_duo_extra_guns(nd, session):
+    nd.POINTS_TO_NEXT_PHASE = FOREVER
+    session.reset(two_p=True, music=False, seed=session.seed)
+    for p in (session.player1, session.player2):
+        p.activate_upgrade(FOREVER)
+    _shield_all(session)
+
+SCENARIOS = {
+    "fase1_densa": (setup_phase1_dense, {}),
+    "fase2_ondas": (setup_phase2_waves, {}),
+    "chefao_normal": (make_boss_setup("normal"), {}),
+    "chefao_spread": (make_boss_setup("spread"), {}),
+    "chefao_rapid": (make_boss_setup("rapid"), {}),
+    "chefao_storm": (make_boss_setup("storm"), {"bullet_storm": True}),
+    "duo_extra_guns": (setup_duo_extra_guns, {"two_player": True}),
+}
+
+def bot_inputs(nd, tick, two_player):
+    """Entradas determinísticas: atira sempre e varre a tela de um lado ao outro"""
+    inputs = nd.empty_inputs()
+    for num in (1, 2) if two_player else (1,):
+        sweep = (tick + num * 60) % 240
+        inputs[num]["shoot"] = True
+        inputs[num]["left"] = sweep < 120
+        inputs[num]["right"] = sweep >= 120
+    return inputs
+
+# ---------------- Execução ----------------
+def percentiles(values, points=(50, 95, 99)):
+    ordered = sorted(values)
+    last = len(ordered) - 1
+    return {f"p{p}": ordered[min(last, int(round(p / 100.0 * last)))] for p in points}
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KiB, macOS em bytes
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+def run_scenario(game_path, name, ticks, draw, warmup, seed):
+    nd = load_game_module(game_path)
+    setup, options = SCENARIOS[name]
+    if options.get("bullet_storm") and getattr(nd, "np", None) is None:
+        return {"skipped": "numpy não instalado"}
+
+    screen = nd.init_display(headless=True)
+    session = nd.GameSession(audio=False, record_highscores=False, seed=seed,
+                             two_player=options.get("two_player", False),
+                             bullet_storm=options.get("bullet_storm", False))
+    setup(nd, session)
+    # Versões antigas do jogo não têm session.tick_rate
+    dt = 1.0 / getattr(session, "tick_rate", nd.TICK_RATE)
+    two_player = session.two_player
+
+    for tick in range(warmup):
+        session.step(bot_inputs(nd, tick, two_player), dt)
+
+    step_ms, frame_ms = [], []
+    peak_counts = {}
+    perf = time.perf_counter
+    start = perf()
+    for tick in range(warmup, warmup + ticks):
+        t0 = perf()
+        session.step(bot_inputs(nd, tick, two_player), dt)
+        t1 = perf()
+        if draw:
+            session.draw(screen)
+        t2 = perf()
+        step_ms.append((t1 - t0) * 1000.0)
+        frame_ms.append((t2 - t0) * 1000.0)
+        for group, n in session.group_counts().items():
+            if n > peak_counts.get(group, 0):
+                peak_counts[group] = n
+    elapsed = perf() - start
+
+    result = {
+        "ticks": ticks,
+        "seconds": elapsed,
+        "ticks_per_sec": ticks / elapsed if elapsed else 0.0,
+        "step_ms": dict(percentiles(step_ms), mean=sum(step_ms) / len(step_ms)),
+        "frame_ms": dict(percentiles(frame_ms), mean=sum(frame_ms) / len(frame_ms)),
+        "peak_rss_mb": peak_rss_mb(),
+        "peak_counts": peak_counts,
+        "final_state": [session.game_state, session.phase_state],
+    }
+    if hasattr(nd, "pool_stats"):
+        result["pools"] = nd.pool_stats()
+    saves = measure_saves(nd, session)
+    if saves is not None:
+        result["save"] = saves
+    return result
+
+def measure_saves(nd, session, repeat=20):
+    """Latência (ms, mediana) e tamanho do save binário, cru e com zlib, no estado final do cenário"""
+    if not hasattr(nd, "snapshot_world"):
+        return None
+    perf = time.perf_counter
+    def median_ms(fn):
+        times = []
+        for _ in range(repeat):
+            t0 = perf()
+            out = fn()
+            times.append((perf() - t0) * 1000.0)
+        return percentiles(times, (50,))["p50"], out
+
+    snap_ms, snap = median_ms(lambda: nd.snapshot_world(session))
+    result = {"snapshot_ms": snap_ms}
+    for label, compress in (("raw", False), ("zlib", True)):
+        encode_ms, data = median_ms(lambda: nd.encode_save(snap, compress))
+        decode_ms, decoded = median_ms(lambda: nd.decode_save(data))
+        result[label] = {"bytes": len(data), "encode_ms": encode_ms, "decode_ms": decode_ms}
+    restore_ms, _ = median_ms(lambda: nd.restore_world(session, decoded))
+    result["restore_ms"] = restore_ms
+    return result
+
+def file_sha1(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark sem janela do NOVA DESCENT")
+    parser.add_argument("--game", default=DEFAULT_GAME, help="NOVA_DESCENT.py a medir (padrão: o deste diretório)")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="cenário a rodar (repetível; padrão: todos)")
+    parser.add_argument("--ticks", type=int, default=1800, help="ticks medidos por cenário (padrão %(default)s)")
+    parser.add_argument("--warmup", type=int, default=120, help="ticks de aquecimento fora da medição")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--no-draw", action="store_true", help="mede só a simulação, sem desenhar")
+    parser.add_argument("--out", help="arquivo JSON de saída (padrão: stdout)")
+    parser.add_argument("--run-one", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    game = os.path.abspath(args.game)
+
+    if args.run_one:
+        # Processo filho: roda um cenário e devolve o resultado na última linha do stdout
+        result = run_scenario(game, args.run_one, args.ticks, not args.no_draw, args.warmup, args.seed)
+        print(json.dumps(result))
+        return 0
+
+    report = {
+        "game": game,
+        "game_sha1": file_sha1(game),
+        "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "ticks": args.ticks,
+        "draw": not args.no_draw,
+        "seed": args.seed,
+        "scenarios": {},
+    }
+    for name in args.scenario or list(SCENARIOS):
+        cmd = [sys.executable, os.path.abspath(__file__), "--game", game, "--run-one", name,
+               "--ticks", str(args.ticks), "--warmup", str(args.warmup), "--seed", str(args.seed)]
+        if args.no_draw:
+            cmd.append("--no-draw")
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        lines = proc.stdout.strip().splitlines()
+        if proc.returncode != 0 or not lines:
+            result = {"error": (proc.stderr.strip().splitlines() or ["falhou"])[-1]}
+        else:
+            result = json.loads(lines[-1])
+        report["scenarios"][name] = result
+        if "ticks_per_sec" in result:
+            line = (f"{name:16s} {result['ticks_per_sec']:8.0f} ticks/s  "
+                    f"p95 {result['frame_ms']['p95']:6.2f} ms  p99 {result['frame_ms']['p99']:6.2f} ms")
+            if "save" in result:
+                save = result["save"]
+                line += (f"  save {save['zlib']['bytes'] / 1024:6.1f} KiB "
+                         f"{save['snapshot_ms'] + save['zlib']['encode_ms']:5.2f}/"
+                         f"{save['zlib']['decode_ms'] + save['restore_ms']:5.2f} ms")
+            print(line, file=sys.stderr)
+        else:
+            print(f"{name:16s} {result}", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())